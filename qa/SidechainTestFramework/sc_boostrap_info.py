@@ -7,14 +7,21 @@ SCCreationInfo: {
     "sc_id":
     "forward_amout":
     "withdrawal_epoch_length":
+    "genesis_slots_rewind": number of consensus slots the genesis block is created in the past, that is the number of
+                            blocks that can be forged right after the bootstrap (None: half a consensus epoch)
 }
 """
+
+import random
+
+
 class SCCreationInfo(object):
 
-    def __init__(self, mc_node, forward_amount=100, withdrawal_epoch_length=1000):
+    def __init__(self, mc_node, forward_amount=100, withdrawal_epoch_length=1000, genesis_slots_rewind=None):
         self.mc_node = mc_node
         self.forward_amount = forward_amount
         self.withdrawal_epoch_length = withdrawal_epoch_length
+        self.genesis_slots_rewind = genesis_slots_rewind
 
 
 """
@@ -57,6 +64,104 @@ class SCNodeConfiguration(object):
         self.mc_connection_info = mc_connection_info
 
 
+"""
+The p2p connections between sidechain nodes, independently from the number of nodes.
+The JSON representation is only for documentation.
+
+SCNetworkTopology: {
+    "kind": one of "star" (every node connected to "center"), "ring", "mesh" (every node connected to every other),
+            "random_regular" (every node connected to "degree" random other nodes, generated from "seed")
+            or "edges" (the given "edges")
+    "center":
+    "degree":
+    "seed":
+    "edges": [[node_a, node_b], ...]
+}
+
+Nodes are identified by their index. Connections are bidirectional: (a, b) and (b, a) are the same edge.
+"""
+class SCNetworkTopology(object):
+
+    STAR = "star"
+    RING = "ring"
+    MESH = "mesh"
+    RANDOM_REGULAR = "random_regular"
+    EDGES = "edges"
+
+    # Random pairs tried before looking for the remaining suitable pairs one by one
+    RANDOM_PAIR_ATTEMPTS = 100
+    MAX_RANDOM_GRAPH_ATTEMPTS = 100
+
+    def __init__(self, kind, center=0, degree=None, seed=0, edges=None):
+        self.kind = kind
+        self.center = center
+        self.degree = degree
+        self.seed = seed
+        self.edges = edges
+
+    @staticmethod
+    def __edge(a, b):
+        return (a, b) if a < b else (b, a)
+
+    def get_edges(self, num_nodes):
+        """
+        Output: the sorted list of the edges (a, b), with a < b, of the topology for num_nodes nodes
+        """
+        if self.kind == SCNetworkTopology.STAR:
+            edges = [self.__edge(self.center, n) for n in range(num_nodes) if n != self.center]
+        elif self.kind == SCNetworkTopology.RING:
+            edges = [self.__edge(n, (n + 1) % num_nodes) for n in range(num_nodes) if num_nodes > 1]
+        elif self.kind == SCNetworkTopology.MESH:
+            edges = [(a, b) for a in range(num_nodes) for b in range(a + 1, num_nodes)]
+        elif self.kind == SCNetworkTopology.RANDOM_REGULAR:
+            edges = self.__random_regular_edges(num_nodes)
+        elif self.kind == SCNetworkTopology.EDGES:
+            edges = [self.__edge(a, b) for a, b in self.edges]
+        else:
+            raise ValueError("Unknown topology " + str(self.kind))
+        for a, b in edges:
+            if a == b or a < 0 or b >= num_nodes:
+                raise ValueError("Invalid edge ({0}, {1}) for {2} nodes".format(a, b, num_nodes))
+        return sorted(set(edges))
+
+    def __random_regular_edges(self, num_nodes):
+        degree = self.degree
+        if degree is None or degree >= num_nodes or (num_nodes * degree) % 2 != 0:
+            raise ValueError("No {0}-regular graph with {1} nodes".format(degree, num_nodes))
+        rng = random.Random(self.seed)
+        for _ in range(SCNetworkTopology.MAX_RANDOM_GRAPH_ATTEMPTS):
+            # Pair the free connection slots ("stubs") of the nodes, avoiding loops and duplicated edges
+            stubs = [n for n in range(num_nodes) for _ in range(degree)]
+            edges = set()
+            while len(stubs) > 0:
+                pair = None
+                for _ in range(SCNetworkTopology.RANDOM_PAIR_ATTEMPTS):
+                    i, j = rng.sample(range(len(stubs)), 2)
+                    if stubs[i] != stubs[j] and self.__edge(stubs[i], stubs[j]) not in edges:
+                        pair = (i, j)
+                        break
+                if pair is None:
+                    suitable = [(i, j) for i in range(len(stubs)) for j in range(i + 1, len(stubs))
+                                if stubs[i] != stubs[j] and self.__edge(stubs[i], stubs[j]) not in edges]
+                    if len(suitable) == 0:
+                        break  # dead end, start again
+                    pair = rng.choice(suitable)
+                i, j = pair
+                edges.add(self.__edge(stubs[i], stubs[j]))
+                for index in sorted(pair, reverse=True):
+                    del stubs[index]
+            if len(stubs) == 0:
+                return list(edges)
+        raise ValueError("Failed to generate a random {0}-regular graph with {1} nodes".format(degree, num_nodes))
+
+    def get_degrees(self, num_nodes):
+        degrees = [0] * num_nodes
+        for a, b in self.get_edges(num_nodes):
+            degrees[a] += 1
+            degrees[b] += 1
+        return degrees
+
+
 """
 The full network of many sidechain nodes connected to many mainchain nodes.
 The JSON representation is only for documentation.
@@ -67,14 +172,16 @@ SCNetworkConfiguration: {
         SCNodeConfiguration_0
         ...
         SCNodeConfiguration_i
-    ]
+    ],
+    "topology": an instance of SCNetworkTopology, or None to leave the SC nodes unconnected
 }
 """
 class SCNetworkConfiguration(object):
 
-    def __init__(self, sc_creation_info, *sc_nodes_configuration):
+    def __init__(self, sc_creation_info, *sc_nodes_configuration, **kwargs):
         self.sc_creation_info = sc_creation_info
         self.sc_nodes_configuration = sc_nodes_configuration
+        self.topology = kwargs.get("topology")
 
 
 """
@@ -0,0 +1,190 @@
+import threading
+
+from test_framework.fanout import gather
+from SidechainTestFramework.sc_forging_util import find_block_by_id
+
+"""
+Local index of the active chain of a SC node, for O(1) inclusion checks instead of searching blocks JSON.
+
+SCChainIndex follows the node: every update() asks only for the blocks added since the previous one
+(block/findIdByHeight from the last indexed height, block/findById), and drops the indexed blocks no longer in the
+active chain after a fork.
+Maps kept for the active chain:
+ - height -> SC block id, and back;
+ - SC transaction id -> SC block id (including the forward transfers aggregated from mainchain);
+ - mainchain header hash -> SC block id, for both headers and reference data;
+ - ommer id -> SC block id, for ommers at any nesting level.
+
+The checks of scutil and sc_forging_util share one index per node (get_sc_chain_index).
+
+Example:
+    index = get_sc_chain_index(sc_node)
+    generate_next_blocks(sc_node, "first node", 10)
+    index.update()
+    assert_true(index.block_of_transaction(txid) is not None)
+"""
+
+# Maximum number of blocks fetched concurrently by update()
+UPDATE_CHUNK_SIZE = 100
+
+
+class SCChainIndex(object):
+
+    def __init__(self, sc_node):
+        self.sc_node = sc_node
+        self.height = 0
+        self.__ids_by_height = {}
+        self.__heights_by_id = {}
+        self.__blocks_by_tx = {}
+        self.__blocks_by_mc_header = {}
+        self.__blocks_by_mc_reference = {}
+        self.__blocks_by_ommer = {}
+        # Keys added by each indexed block, to remove them when the block leaves the active chain
+        self.__keys_by_height = {}
+
+    def __node_id_at_height(self, height):
+        response = self.sc_node.block_findIdByHeight(height=height)
+        if "result" not in response:
+            return None
+        return response["result"]["blockId"]
+
+    def __fork_height(self):
+        """
+        Height of the last indexed block still in the active chain of the node.
+        """
+        height = self.height
+        while height > 0 and self.__node_id_at_height(height) != self.__ids_by_height[height]:
+            height -= 1
+        return height
+
+    def __rollback(self, height):
+        while self.height > height:
+            block_id = self.__ids_by_height.pop(self.height)
+            del self.__heights_by_id[block_id]
+            tx_ids, mc_headers, mc_references, ommers = self.__keys_by_height.pop(self.height)
+            for tx_id in tx_ids:
+                self.__blocks_by_tx.pop(tx_id, None)
+            for mc_header in mc_headers:
+                self.__blocks_by_mc_header.pop(mc_header, None)
+            for mc_reference in mc_references:
+                self.__blocks_by_mc_reference.pop(mc_reference, None)
+            for ommer in ommers:
+                self.__blocks_by_ommer.pop(ommer, None)
+            self.height -= 1
+
+    def __collect_ommers(self, ommers, ommer_ids):
+        for ommer in ommers:
+            ommer_ids.append(ommer["header"]["id"])
+            self.__collect_ommers(ommer.get("ommers", []), ommer_ids)
+
+    def __add_block(self, block):
+        block_id = block["id"]
+        self.height += 1
+        self.__ids_by_height[self.height] = block_id
+        self.__heights_by_id[block_id] = self.height
+
+        tx_ids = [tx["id"] for tx in block.get("sidechainTransactions", [])]
+        mc_references = []
+        for reference_data in block.get("mainchainBlockReferencesData", []):
+            mc_references.append(reference_data["headerHash"])
+            aggregated_tx = reference_data.get("sidechainRelatedAggregatedTransaction")
+            if aggregated_tx is not None:
+                tx_ids.append(aggregated_tx["id"])
+        mc_headers = [header["hash"] for header in block.get("mainchainHeaders", [])]
+        ommers = []
+        self.__collect_ommers(block.get("ommers", []), ommers)
+
+        for tx_id in tx_ids:
+            self.__blocks_by_tx[tx_id] = block_id
+        for mc_header in mc_headers:
+            self.__blocks_by_mc_header[mc_header] = block_id
+        for mc_reference in mc_references:
+            self.__blocks_by_mc_reference[mc_reference] = block_id
+        for ommer in ommers:
+            self.__blocks_by_ommer[ommer] = block_id
+        self.__keys_by_height[self.height] = (tx_ids, mc_headers, mc_references, ommers)
+
+    def update(self):
+        """
+        Index the blocks added to the active chain of the node since the last update.
+        Return the number of indexed blocks.
+        """
+        indexed = 0
+        while True:
+            best_height = self.sc_node.block_best()["result"]["height"]
+            self.__rollback(self.__fork_height())
+            if best_height <= self.height:
+                return indexed
+            heights = range(self.height + 1, min(best_height, self.height + UPDATE_CHUNK_SIZE) + 1)
+            block_ids = gather([lambda height=height: self.__node_id_at_height(height) for height in heights])
+            if None in block_ids:
+                block_ids = block_ids[:block_ids.index(None)]  # the active chain got shorter meanwhile
+            blocks = gather([lambda block_id=block_id: find_block_by_id(self.sc_node, block_id)["result"]["block"]
+                             for block_id in block_ids])
+            for block in blocks:
+                parent_id = self.__ids_by_height.get(self.height)
+                if parent_id is not None and block["header"]["parentId"] != parent_id:
+                    break  # the active chain changed meanwhile: look for the fork again
+                self.__add_block(block)
+                indexed += 1
+
+    def block_id_at(self, height):
+        return self.__ids_by_height.get(height)
+
+    def height_of(self, block_id):
+        return self.__heights_by_id.get(block_id)
+
+    def contains_block(self, block_id):
+        return block_id in self.__heights_by_id
+
+    def block_of_transaction(self, tx_id):
+        """
+        Id of the active chain block including the transaction, or None.
+        """
+        return self.__blocks_by_tx.get(tx_id)
+
+    def block_of_mc_header(self, mc_block_hash):
+        """
+        Id of the active chain block including the header of the mainchain block, or None.
+        """
+        return self.__blocks_by_mc_header.get(mc_block_hash)
+
+    def block_of_mc_reference_data(self, mc_block_hash):
+        """
+        Id of the active chain block including the reference data of the mainchain block, or None.
+        """
+        return self.__blocks_by_mc_reference.get(mc_block_hash)
+
+    def block_of_ommer(self, ommer_id):
+        """
+        Id of the active chain block including the ommer, directly or as a subommer, or None.
+        """
+        return self.__blocks_by_ommer.get(ommer_id)
+
+
+sc_chain_indexes = {}
+sc_chain_indexes_lock = threading.Lock()
+
+
+def get_sc_chain_index(sc_node):
+    """
+    Index of the active chain of sc_node shared by all the checks, as of its last update.
+    """
+    with sc_chain_indexes_lock:
+        if sc_node.url not in sc_chain_indexes:
+            sc_chain_indexes[sc_node.url] = SCChainIndex(sc_node)
+        return sc_chain_indexes[sc_node.url]
+
+
+def find_indexed_block(sc_node, lookup, key):
+    """
+    Id of the block found for key by the SCChainIndex method named lookup (e.g. "block_of_mc_header"), updating the
+    index of sc_node if key is not indexed yet. SC blocks never change, so a block found before the update still
+    includes key, even if it left the active chain meanwhile.
+    """
+    index = get_sc_chain_index(sc_node)
+    block_id = getattr(index, lookup)(key)
+    if block_id is None:
+        index.update()
+        block_id = getattr(index, lookup)(key)
+    return block_id
@@ -0,0 +1,92 @@
+import time
+
+from test_framework.fanout import gather
+from test_framework.latency_histogram import LatencyHistogram
+from SidechainTestFramework.sidechainauthproxy import MAX_CONNECTIONS_PER_NODE
+from SidechainTestFramework.scutil import generate_forging_request, get_next_epoch_slot
+from SidechainTestFramework.sc_load_generator import check_api_result, LoadGeneratorException
+
+"""
+Forging latency measures for SC nodes.
+
+forge_next_block_timed forges like generate_next_block, without printing, and records in a ForgingMeasure:
+ - forge: latency of the successful block/generate call, i.e. the time the node needs to build, sign and apply the
+   block;
+ - total: latency of the whole operation seen by a client, block/forgingInfo and slots without a leader included.
+Blocks per second are computed on the total latency.
+
+Example:
+    measure = ForgingMeasure("mempool 1000")
+    for i in range(10):
+        fill_mempool(sc_node, transactions[i * 1000:(i + 1) * 1000])
+        forge_next_block_timed(sc_node, measure)
+    print(measure.report())
+"""
+
+# Code of the block/generate error for a slot without a leader
+NO_LEADER_ERROR = "0105"
+
+
+class ForgingMeasure(object):
+
+    def __init__(self, name):
+        self.name = name
+        self.forge_latency = LatencyHistogram()
+        self.total_latency = LatencyHistogram()
+        self.blocks = 0
+        self.skipped_slots = 0
+        self.elapsed = 0
+
+    def blocks_per_second(self):
+        return self.blocks / self.elapsed if self.elapsed > 0 else 0
+
+    def report(self):
+        return "\n".join(["{0}: {1} blocks, {2:.2f} blocks/s, {3} slots without leader".format(
+                              self.name, self.blocks, self.blocks_per_second(), self.skipped_slots),
+                          "  " + self.forge_latency.format_summary("forge"),
+                          "  " + self.total_latency.format_summary("total")])
+
+
+def forge_next_block_timed(node, measure):
+    """
+    Forge a block in the first slot with a leader after the best block, like generate_next_block.
+    Output: the id of the new block
+    """
+    start = time.time()
+    forging_info = check_api_result(node.block_forgingInfo(), "Forging info")
+    slots_in_epoch = forging_info["consensusSlotsInEpoch"]
+    epoch, slot = get_next_epoch_slot(forging_info["bestEpochNumber"], forging_info["bestSlotNumber"],
+                                      slots_in_epoch)
+    while True:
+        request_start = time.time()
+        forge_result = node.block_generate(generate_forging_request(epoch, slot))
+        request_end = time.time()
+        if "error" not in forge_result or forge_result["error"]["code"] != NO_LEADER_ERROR:
+            break
+        measure.skipped_slots += 1
+        epoch, slot = get_next_epoch_slot(epoch, slot, slots_in_epoch)
+    block_id = check_api_result(forge_result, "Block generation")["blockId"]
+
+    measure.forge_latency.record(request_end - request_start)
+    measure.total_latency.record(request_end - start)
+    measure.blocks += 1
+    measure.elapsed += request_end - start
+    return block_id
+
+
+def fill_mempool(node, transactions):
+    """
+    Send the signed transactions (hex strings, see prepare_load_transactions) to the mempool of node.
+    """
+    def send(transaction_bytes):
+        check_api_result(node.transaction_sendTransaction(transactionBytes=transaction_bytes),
+                         "Transaction submission")
+
+    for first in range(0, len(transactions), MAX_CONNECTIONS_PER_NODE):
+        gather([lambda transaction=transaction: send(transaction)
+                for transaction in transactions[first:first + MAX_CONNECTIONS_PER_NODE]])
+    mempool_size = len(check_api_result(node.transaction_allTransactions(format=False),
+                                        "Mempool request")["transactionIds"])
+    if mempool_size < len(transactions):
+        raise LoadGeneratorException("Only {0} of {1} transactions in the mempool".format(mempool_size,
+                                                                                          len(transactions)))
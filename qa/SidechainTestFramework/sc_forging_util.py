@@ -1,8 +1,93 @@
 from test_framework.util import assert_equal, fail
+from SidechainTestFramework.sidechainauthproxy import SidechainAuthServiceProxy
+from collections import OrderedDict
 import json
+import os
+import threading
+
+"""
+SC blocks never change once created, so the responses of block/findById are kept in a per-node LRU cache shared
+by all the checks below: checking many properties of the same block downloads it only once.
+The cache of each node is limited in bytes of the raw responses, see SC_BLOCK_CACHE_SIZE (default: 64 MB).
+Cached responses are shared: callers must not modify them.
+"""
+
+DEFAULT_BLOCK_CACHE_SIZE = 64 * 1024 * 1024
+
+
+class BlockCache(object):
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.__blocks = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, block_id):
+        with self.__lock:
+            entry = self.__blocks.pop(block_id, None)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.__blocks[block_id] = entry  # most recently used goes last
+            self.hits += 1
+            return entry[0]
+
+    def put(self, block_id, response, size):
+        if size > self.max_bytes:
+            return
+        with self.__lock:
+            old_entry = self.__blocks.pop(block_id, None)
+            if old_entry is not None:
+                self.size -= old_entry[1]
+            self.__blocks[block_id] = (response, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted_size) = self.__blocks.popitem(last=False)
+                self.size -= evicted_size
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "blocks": len(self.__blocks), "bytes": self.size}
+
+
+block_caches = {}
+block_caches_lock = threading.Lock()
+
+
+def get_block_cache(sc_node):
+    with block_caches_lock:
+        if sc_node.url not in block_caches:
+            block_caches[sc_node.url] = BlockCache(int(os.getenv("SC_BLOCK_CACHE_SIZE", DEFAULT_BLOCK_CACHE_SIZE)))
+        return block_caches[sc_node.url]
+
+
+def find_block_by_id(sc_node, scblock_id):
+    """
+    Same result of sc_node.block_findById(blockId=scblock_id), from the cache of the node if already downloaded.
+    """
+    cache = get_block_cache(sc_node)
+    res = cache.get(scblock_id)
+    if res is None:
+        raw_response = SidechainAuthServiceProxy(sc_node.url, raw_response=True).block_findById(blockId=scblock_id)
+        res = raw_response.json()
+        if "result" in res:
+            cache.put(scblock_id, res, len(raw_response.raw))
+    return res
+
+
+def find_indexed_block(sc_node, lookup, key):
+    """
+    See find_indexed_block of sc_chain_index.py.
+    """
+    # Imported here: sc_chain_index fetches the blocks with find_block_by_id of this module
+    from SidechainTestFramework import sc_chain_index
+    return sc_chain_index.find_indexed_block(sc_node, lookup, key)
+
 
 def check_scparent(parent_scblock_id, scblock_id, sc_node):
-    res = sc_node.block_findById(blockId=scblock_id)
+    res = find_block_by_id(sc_node, scblock_id)
     assert_equal(parent_scblock_id, res["result"]["block"]["header"]["parentId"],
                  "SC Block {0} parent id is different.".format(scblock_id))
     print("SC Block {0} has parent id {1}.".format(scblock_id, parent_scblock_id))
@@ -14,7 +99,11 @@ def check_mcreference_presence(mcblock_hash, scblock_id, sc_node):
 
 
 def check_mcheader_presence(mcblock_hash, scblock_id, sc_node):
-    res = sc_node.block_findById(blockId=scblock_id)
+    if find_indexed_block(sc_node, "block_of_mc_header", mcblock_hash) == scblock_id:
+        print("MC hash {0} is present in SC Block {1} mainchain headers.".format(mcblock_hash, scblock_id))
+        return
+    # Blocks out of the active chain are not indexed
+    res = find_block_by_id(sc_node, scblock_id)
     # print(json.dumps(res, indent=4))
     headers = res["result"]["block"]["mainchainHeaders"]
     for header in headers:
@@ -25,7 +114,11 @@ def check_mcheader_presence(mcblock_hash, scblock_id, sc_node):
 
 
 def check_mcreferencedata_presence(mcblock_hash, scblock_id, sc_node):
-    res = sc_node.block_findById(blockId=scblock_id)
+    if find_indexed_block(sc_node, "block_of_mc_reference_data", mcblock_hash) == scblock_id:
+        print("MC hash {0} is present in SC Block {1} mainchain reference data.".format(mcblock_hash, scblock_id))
+        return
+    # Blocks out of the active chain are not indexed
+    res = find_block_by_id(sc_node, scblock_id)
     # print(json.dumps(res, indent=4))
     refDataList = res["result"]["block"]["mainchainBlockReferencesData"]
     for refData in refDataList:
@@ -36,35 +129,35 @@ def check_mcreferencedata_presence(mcblock_hash, scblock_id, sc_node):
 
 
 def check_mcheaders_amount(amount, scblock_id, sc_node):
-    res = sc_node.block_findById(blockId=scblock_id)
+    res = find_block_by_id(sc_node, scblock_id)
     headers = res["result"]["block"]["mainchainHeaders"]
     assert_equal(amount, len(headers), "SC Block {0} mainchain headers amount is different".format(scblock_id))
     print("SC block {0} contains {1} mainchain headers.".format(scblock_id, amount))
 
 
 def check_mcreferencedata_amount(amount, scblock_id, sc_node):
-    res = sc_node.block_findById(blockId=scblock_id)
+    res = find_block_by_id(sc_node, scblock_id)
     headers = res["result"]["block"]["mainchainBlockReferencesData"]
     assert_equal(amount, len(headers), "SC Block {0} mainchain ref data amount is different".format(scblock_id))
     print("SC block {0} contains {1} mainchain reference data.".format(scblock_id, amount))
 
 
 def check_ommers_amount(amount, scblock_id, sc_node):
-    res = sc_node.block_findById(blockId=scblock_id)
+    res = find_block_by_id(sc_node, scblock_id)
     ommers = res["result"]["block"]["ommers"]
     assert_equal(amount, len(ommers), "SC Block {0} ommers amount is different".format(scblock_id))
     print("SC block {0} contains {1} ommers.".format(scblock_id, amount))
 
 
 def check_ommers_cumulative_score(score, scblock_id, sc_node):
-    res = sc_node.block_findById(blockId=scblock_id)
+    res = find_block_by_id(sc_node, scblock_id)
     actual_score = res["result"]["block"]["header"]["ommersCumulativeScore"]
     assert_equal(score, actual_score, "SC Block {0} ommers cumulative score is different".format(scblock_id))
     print("SC block {0} has cumulative score {1}.".format(scblock_id, score))
 
 
 def check_ommer(ommer_scblock_id, ommer_mcheaders_hashes, scblock_id, sc_node):
-    res = sc_node.block_findById(blockId=scblock_id)
+    res = find_block_by_id(sc_node, scblock_id)
     ommers = res["result"]["block"]["ommers"]
     for ommer in ommers:
         if ommer["header"]["id"] == ommer_scblock_id:
@@ -84,7 +177,7 @@ def check_ommer(ommer_scblock_id, ommer_mcheaders_hashes, scblock_id, sc_node):
 
 
 def check_subommer(ommer_scblock_id, subommer_scblock_id, subommer_mcheader_hashes, scblock_id, sc_node):
-    res = sc_node.block_findById(blockId=scblock_id)
+    res = find_block_by_id(sc_node, scblock_id)
     ommers = res["result"]["block"]["ommers"]
     for ommer in ommers:
         if ommer["header"]["id"] == ommer_scblock_id:
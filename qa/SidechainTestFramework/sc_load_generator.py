@@ -0,0 +1,338 @@
+import json
+import multiprocessing
+try:
+    import queue as Queue
+except ImportError:
+    import Queue
+import sys
+import threading
+import time
+try:
+    import urllib.parse as urlparse
+except ImportError:
+    import urlparse
+
+from test_framework.fanout import gather
+from test_framework.latency_histogram import LatencyHistogram
+from SidechainTestFramework.sidechainauthproxy import SidechainAuthServiceProxy, ConnectionPool, \
+    MAX_CONNECTIONS_PER_NODE, HTTP_TIMEOUT
+from SidechainTestFramework.sc_forging_util import find_block_by_id
+from SidechainTestFramework.scutil import generate_next_block
+
+"""
+Open-loop transaction load for a SC node.
+
+The load is made of payments already signed before the measure starts (prepare_load_transactions): each one spends
+a different box of the wallet of the node, so they are all valid at the same time and the SC node only has to
+validate them, not to build them. During the measure (run_load) they are sent at a fixed rate by worker processes,
+each with many sender threads: transaction i is due at start + i / tps whatever happened to the previous ones (open
+loop). Latencies are measured from the due time, not from the time the request was actually sent, so a node that
+stalls is charged for all the transactions that should have been sent meanwhile (no coordinated omission).
+
+Three latencies are recorded for each transaction, as LatencyHistogram (see latency_histogram.py):
+ - submit: until transaction/sendTransaction returns;
+ - mempool: until the transaction is seen in transaction/allTransactions (polled every MEMPOOL_POLL_INTERVAL);
+ - block: until a block including it is forged (blocks are forged every block_interval seconds during the load).
+
+Example:
+    transactions = prepare_load_transactions(sc_node, 1000)
+    result = run_load(sc_node, transactions, tps=50, workers=2)
+    print(result.report())
+"""
+
+# Outputs of each transaction funding the load boxes
+MAX_FUNDING_OUTPUTS = 100
+# Concurrent createCoreTransaction requests while preparing the load
+PREPARE_CONCURRENCY = MAX_CONNECTIONS_PER_NODE
+# Delay between the end of the preparation of the workers and the due time of the first transaction
+LOAD_START_DELAY = 1
+MEMPOOL_POLL_INTERVAL = 0.05
+# Maximum number of blocks forged after the load to include the transactions left in the mempool
+MAX_FLUSH_BLOCKS = 10
+# Seconds between the checks of the worker processes while waiting for their results
+WORKERS_CHECK_INTERVAL = 1
+
+
+class LoadGeneratorException(Exception):
+    def __init__(self, message):
+        Exception.__init__(self, message)
+
+
+def check_api_result(response, operation):
+    if "result" not in response:
+        raise LoadGeneratorException("{0} failed: {1}".format(operation, json.dumps(response.get("error"))))
+    return response["result"]
+
+
+def fund_load_boxes(sc_node, node_name, boxes_count, box_value):
+    """
+    Create boxes_count boxes of box_value zennies each, owned by new keys of the wallet of sc_node, and forge the
+    blocks including them. One key is created for every MAX_FUNDING_OUTPUTS boxes.
+    Output: the set of the public keys owning the new boxes
+    """
+    public_keys = set()
+    while boxes_count > 0:
+        outputs_count = min(boxes_count, MAX_FUNDING_OUTPUTS)
+        public_key = check_api_result(sc_node.wallet_createPrivateKey25519(),
+                                      "Key creation")["proposition"]["publicKey"]
+        public_keys.add(public_key)
+        request = {"outputs": [{"publicKey": public_key, "value": box_value}] * outputs_count, "fee": 0}
+        check_api_result(sc_node.transaction_sendCoinsToAddress(json.dumps(request)), "Funding transaction")
+        # The change of the funding transaction can be spent only once it is in a block
+        generate_next_block(sc_node, node_name)
+        boxes_count -= outputs_count
+    return public_keys
+
+
+def prepare_load_transactions(sc_node, transactions_count, box_value=1000, node_name="load node"):
+    """
+    Fund and sign transactions_count payments of box_value zennies (no fee) between keys of the wallet of sc_node.
+    The genesis account of the node must own at least transactions_count * box_value zennies.
+    Output: the list of the signed transactions, as hex strings for transaction/sendTransaction
+    """
+    public_keys = fund_load_boxes(sc_node, node_name, transactions_count, box_value)
+    boxes = [box for box in sc_node.wallet_allBoxes.stream("result.boxes")
+             if box["proposition"]["publicKey"] in public_keys and box["value"] == box_value]
+    if len(boxes) < transactions_count:
+        raise LoadGeneratorException("Only {0} of {1} load boxes found in the wallet".format(len(boxes),
+                                                                                             transactions_count))
+
+    def sign(box):
+        request = {"transactionInputs": [{"boxId": box["id"]}],
+                   "regularOutputs": [{"publicKey": box["proposition"]["publicKey"], "value": box["value"]}],
+                   "withdrawalRequests": [],
+                   "forgerOutputs": [],
+                   "format": False}
+        response = sc_node.transaction_createCoreTransaction(json.dumps(request))
+        return check_api_result(response, "Transaction signing")["transactionBytes"]
+
+    transactions = []
+    for first in range(0, transactions_count, PREPARE_CONCURRENCY):
+        chunk = boxes[first:min(first + PREPARE_CONCURRENCY, transactions_count)]
+        transactions.extend(gather([lambda box=box: sign(box) for box in chunk]))
+    return transactions
+
+
+def send_transactions(url, schedule, start_time, threads_count, results):
+    """
+    Worker process: send the transactions of schedule, a list of (index, due time offset, transaction bytes),
+    with threads_count threads, then put the list of (index, transaction id, due time, accepted time, error) on
+    the results queue.
+    """
+    # Connections of the parent process are not shared with this process
+    parsed_url = urlparse.urlparse(url)
+    pool = ConnectionPool(parsed_url.scheme, parsed_url.hostname, parsed_url.port or 80, threads_count)
+    sc_node = SidechainAuthServiceProxy(url, connection_pool=pool)
+    records = []
+    records_lock = threading.Lock()
+
+    def sender(thread_schedule):
+        for index, offset, transaction_bytes in thread_schedule:
+            due_time = start_time + offset
+            delay = due_time - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            transaction_id = error = None
+            try:
+                response = sc_node.transaction_sendTransaction(transactionBytes=transaction_bytes)
+                transaction_id = check_api_result(response, "Transaction submission")["transactionId"]
+            except Exception:
+                error = str(sys.exc_info()[1])
+            accepted_time = time.time()
+            with records_lock:
+                records.append((index, transaction_id, due_time, accepted_time, error))
+
+    threads = [threading.Thread(target=sender, args=(schedule[thread_index::threads_count],))
+               for thread_index in range(threads_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put(records)
+
+
+class MempoolWatcher(threading.Thread):
+    """
+    Record the time each transaction is seen for the first time in the mempool of the node.
+    """
+
+    def __init__(self, sc_node):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.sc_node = sc_node
+        self.first_seen = {}
+        self.error = None
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.is_set():
+                for transaction_id in self.sc_node.transaction_allTransactions.stream("result.transactionIds",
+                                                                                      format=False):
+                    if transaction_id not in self.first_seen:
+                        self.first_seen[transaction_id] = time.time()
+                self.stopped.wait(MEMPOOL_POLL_INTERVAL)
+        except Exception:
+            self.error = sys.exc_info()[1]
+
+
+class BlockForger(threading.Thread):
+    """
+    Forge a block every block_interval seconds and record the time each transaction is included in a block.
+    """
+
+    def __init__(self, sc_node, node_name, block_interval):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.sc_node = sc_node
+        self.node_name = node_name
+        self.block_interval = block_interval
+        self.included = {}
+        self.blocks = []
+        self.error = None
+        self.stopped = threading.Event()
+
+    def forge(self):
+        block_id = generate_next_block(self.sc_node, self.node_name)
+        forged_time = time.time()
+        block = find_block_by_id(self.sc_node, block_id)["result"]["block"]
+        transactions = block["sidechainTransactions"]
+        for transaction in transactions:
+            self.included.setdefault(transaction["id"], forged_time)
+        self.blocks.append((block_id, forged_time, len(transactions)))
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.block_interval):
+                self.forge()
+        except Exception:
+            self.error = sys.exc_info()[1]
+
+
+class LoadResult(object):
+
+    def __init__(self, tps, duration, records, first_seen, included, blocks, left_in_mempool):
+        self.tps = tps
+        self.duration = duration
+        self.submitted = len(records)
+        self.errors = [(index, error) for index, _, _, _, error in records if error is not None]
+        self.blocks = blocks
+        self.left_in_mempool = left_in_mempool
+        self.submit_latency = LatencyHistogram()
+        self.mempool_latency = LatencyHistogram()
+        self.block_latency = LatencyHistogram()
+        self.not_seen_in_mempool = 0
+        self.not_included = 0
+        for _, transaction_id, due_time, accepted_time, error in records:
+            if error is not None:
+                continue
+            self.submit_latency.record(accepted_time - due_time)
+            if transaction_id in first_seen:
+                self.mempool_latency.record(first_seen[transaction_id] - due_time)
+            else:
+                self.not_seen_in_mempool += 1
+            if transaction_id in included:
+                self.block_latency.record(included[transaction_id] - due_time)
+            else:
+                self.not_included += 1
+
+    def achieved_tps(self):
+        return (self.submitted - len(self.errors)) / float(self.duration) if self.duration > 0 else 0
+
+    def report(self):
+        lines = ["Target {0} tx/s, achieved {1:.1f} tx/s over {2:.1f}s: {3} transactions, {4} errors, {5} blocks"
+                 .format(self.tps, self.achieved_tps(), self.duration, self.submitted, len(self.errors),
+                         len(self.blocks)),
+                 self.submit_latency.format_summary("submit"),
+                 self.mempool_latency.format_summary("mempool"),
+                 self.block_latency.format_summary("block")]
+        if self.not_seen_in_mempool > 0:
+            lines.append("{0} transactions left the mempool before being seen by its poll (every {1:.0f}ms)"
+                         .format(self.not_seen_in_mempool, MEMPOOL_POLL_INTERVAL * 1000))
+        if self.not_included > 0:
+            lines.append("{0} transactions not included in a block".format(self.not_included))
+        if len(self.left_in_mempool) > 0:
+            lines.append("{0} transactions still in the mempool after {1} more blocks, e.g. {2}".format(
+                len(self.left_in_mempool), MAX_FLUSH_BLOCKS, ", ".join(self.left_in_mempool[:3])))
+        if len(self.errors) > 0:
+            lines.append("First error: {0}".format(self.errors[0][1]))
+        return "\n".join(lines)
+
+
+def collect_worker_records(processes, results, deadline):
+    """
+    Records put on the results queue by all the worker processes.
+    Raise LoadGeneratorException if a worker exits without its records, or if they are not received before deadline.
+    """
+    records = []
+    received = 0
+    while received < len(processes):
+        try:
+            records.extend(results.get(timeout=WORKERS_CHECK_INTERVAL))
+            received += 1
+        except Queue.Empty:
+            failed = [str(process.exitcode) for process in processes if process.exitcode not in (None, 0)]
+            if len(failed) > 0:
+                raise LoadGeneratorException("Load worker processes exited with codes {0}".format(", ".join(failed)))
+            if time.time() >= deadline:
+                raise LoadGeneratorException("Load worker processes did not finish: {0} of {1} reported".format(
+                    received, len(processes)))
+    return records
+
+
+def run_load(sc_node, transactions, tps, workers=1, threads_per_worker=8, block_interval=5,
+             node_name="load node"):
+    """
+    Send the signed transactions to sc_node at tps transactions per second, from workers processes with
+    threads_per_worker sender threads each, forging a block every block_interval seconds. After the last
+    submission, up to MAX_FLUSH_BLOCKS blocks are forged until the mempool is empty.
+    Output: a LoadResult
+    """
+    schedule = [(index, index / float(tps), transaction) for index, transaction in enumerate(transactions)]
+    start_time = time.time() + LOAD_START_DELAY
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=send_transactions,
+                                         args=(sc_node.url, schedule[worker::workers], start_time,
+                                               threads_per_worker, results))
+                 for worker in range(workers)]
+    for process in processes:
+        process.daemon = True
+        process.start()
+
+    mempool_watcher = MempoolWatcher(sc_node)
+    block_forger = BlockForger(sc_node, node_name, block_interval)
+    mempool_watcher.start()
+    block_forger.start()
+
+    try:
+        # A sender can wait for a single request up to HTTP_TIMEOUT
+        last_due_time = start_time + (schedule[-1][1] if len(schedule) > 0 else 0)
+        records = collect_worker_records(processes, results, last_due_time + HTTP_TIMEOUT)
+        end_time = max([accepted_time for _, _, _, accepted_time, _ in records] + [start_time])
+        for process in processes:
+            process.join()
+
+        block_forger.stopped.set()
+        block_forger.join()
+        if block_forger.error is not None:
+            raise LoadGeneratorException("Block forging failed: {0}".format(block_forger.error))
+        # Flush the mempool, to measure the inclusion of all the accepted transactions
+        for _ in range(MAX_FLUSH_BLOCKS):
+            if len(sc_node.transaction_allTransactions(format=False)["result"]["transactionIds"]) == 0:
+                break
+            block_forger.forge()
+        left_in_mempool = sc_node.transaction_allTransactions(format=False)["result"]["transactionIds"]
+        mempool_watcher.stopped.set()
+        mempool_watcher.join()
+        if mempool_watcher.error is not None:
+            raise LoadGeneratorException("Mempool polling failed: {0}".format(mempool_watcher.error))
+    finally:
+        block_forger.stopped.set()
+        mempool_watcher.stopped.set()
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    records.sort()
+    return LoadResult(tps, end_time - start_time, records, mempool_watcher.first_seen, block_forger.included,
+                      block_forger.blocks, left_in_mempool)
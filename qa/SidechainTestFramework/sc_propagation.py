@@ -0,0 +1,193 @@
+import random
+import threading
+import time
+
+from test_framework.latency_histogram import LatencyHistogram
+from SidechainTestFramework.scutil import TimeoutException, check_sc_nodes_topology, sync_sc_blocks
+from SidechainTestFramework.sc_forging_benchmark import ForgingMeasure, forge_next_block_timed
+
+"""
+Block propagation delays in a SC network.
+
+Before each block the connected peers of every node are checked to be exactly its neighbours in the declared topology,
+so the hop distance of a node from the source is its distance through the edges of the topology.
+While a block is forged on the source node, one thread per sampled node polls the tip of its chain (block/findLastIds)
+every PROPAGATION_POLL_INTERVAL and records when the new block becomes the tip. The propagation delay of a node is the
+time between the arrival on the source node and the arrival on that node, so the forging time is not included; the
+precision is about the poll interval plus the latency of a request.
+The polls load the nodes being measured, so only a sample of the nodes is polled: the source and nodes drawn in turn
+from each hop distance, drawn again for every block so that all the nodes are measured over many blocks. The sample
+size bounds the request rate, the poll interval stays the same for any size of the network; the report states the
+request rate of the observers. The other nodes are only checked to reach the block before the next measure.
+
+Example:
+    stats = PropagationStats()
+    edges = connect_sc_nodes_topology(self.sc_nodes, topology)
+    for i in range(20):
+        measure_block_propagation(self.sc_nodes, 0, stats, edges)
+    print(stats.report())
+"""
+
+# Poll interval of each sampled node, in seconds
+PROPAGATION_POLL_INTERVAL = 0.01
+# Number of nodes polled for each block, the source included
+DEFAULT_SAMPLED_NODES = 10
+PROPAGATION_TIMEOUT = 60
+
+
+def get_hop_distances(nodes_count, edges, source):
+    """
+    Output: for each node, the number of hops from source through edges, None if not reachable
+    """
+    neighbours = [set() for _ in range(nodes_count)]
+    for a, b in edges:
+        neighbours[a].add(b)
+        neighbours[b].add(a)
+    distances = [None] * nodes_count
+    distances[source] = 0
+    frontier = [source]
+    while len(frontier) > 0:
+        next_frontier = []
+        for node in frontier:
+            for peer in neighbours[node]:
+                if distances[peer] is None:
+                    distances[peer] = distances[node] + 1
+                    next_frontier.append(peer)
+        frontier = next_frontier
+    return distances
+
+
+def select_sampled_nodes(distances, sampled_nodes):
+    """
+    Output: the sorted indexes of at most sampled_nodes nodes, the source (at distance 0) and random nodes drawn in turn
+    from each hop distance; all the nodes if sampled_nodes is None
+    """
+    if sampled_nodes is None or sampled_nodes >= len(distances):
+        return range(len(distances))
+    by_hops = {}
+    for node, hops in enumerate(distances):
+        if hops != 0:
+            by_hops.setdefault(hops, []).append(node)
+    groups = [by_hops[hops] for hops in sorted(by_hops, key=lambda hops: (hops is None, hops))]
+    for group in groups:
+        random.shuffle(group)
+    sample = [distances.index(0)]
+    while len(sample) < sampled_nodes:
+        for group in groups:
+            if len(group) > 0 and len(sample) < sampled_nodes:
+                sample.append(group.pop())
+    return sorted(sample)
+
+
+class TipWatcher(threading.Thread):
+    """
+    Record the time each block becomes the tip of the chain of a node.
+    """
+
+    def __init__(self, node, poll_interval, start_delay=0):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.node = node
+        self.poll_interval = poll_interval
+        self.start_delay = start_delay
+        self.first_seen = {}
+        self.polls = 0
+        self.error = None
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            self.stopped.wait(self.start_delay)
+            while not self.stopped.is_set():
+                tip = self.node.block_findLastIds(number=1)["result"]["lastBlockIds"][0]
+                self.polls += 1
+                if tip not in self.first_seen:
+                    self.first_seen[tip] = time.time()
+                self.stopped.wait(self.poll_interval)
+        except Exception as e:
+            self.error = e
+
+
+class PropagationStats(object):
+
+    def __init__(self):
+        self.delay = LatencyHistogram()
+        self.full_propagation = LatencyHistogram()
+        self.delay_by_hops = {}
+        self.forging = ForgingMeasure("forging")
+        self.blocks = []
+        self.polls = 0
+        self.polling_time = 0
+        self.sampled_nodes = 0
+
+    def add(self, block_id, arrivals, distances):
+        """
+        arrivals: for each sampled node, the time the block became its tip; the source is the node at distance 0
+        """
+        source_arrival = arrivals[distances.index(0)]
+        delays = [arrival - source_arrival for arrival in arrivals]
+        for delay, hops in zip(delays, distances):
+            if hops == 0:
+                continue
+            self.delay.record(max(0, delay))
+            self.delay_by_hops.setdefault(hops, LatencyHistogram()).record(max(0, delay))
+        self.full_propagation.record(max([0] + delays))
+        self.blocks.append({"blockId": block_id, "delays": delays, "hops": distances})
+
+    def add_polls(self, polls, polling_time, sampled_nodes):
+        self.polls += polls
+        self.polling_time += polling_time
+        self.sampled_nodes = sampled_nodes
+
+    def report(self):
+        lines = ["{0} blocks".format(len(self.blocks)),
+                 self.delay.format_summary("delay (sampled nodes)"),
+                 self.full_propagation.format_summary("delay (last sampled node)")]
+        for hops in sorted(self.delay_by_hops, key=lambda hops: (hops is None, hops)):
+            label = "unreachable" if hops is None else "{0} hops".format(hops)
+            lines.append(self.delay_by_hops[hops].format_summary("delay ({0})".format(label)))
+        lines.append(self.forging.forge_latency.format_summary("forging"))
+        if self.polling_time > 0:
+            lines.append("observer overhead: {0} tip requests, {1:.0f} requests/s to {2} sampled nodes (poll "
+                         "interval {3:.0f}ms per node)".format(self.polls, self.polls / self.polling_time,
+                                                               self.sampled_nodes, PROPAGATION_POLL_INTERVAL * 1000))
+        return "\n".join(lines)
+
+
+def measure_block_propagation(nodes, source, stats, edges, timeout=PROPAGATION_TIMEOUT,
+                              sampled_nodes=DEFAULT_SAMPLED_NODES):
+    """
+    Forge a block on nodes[source] and record in stats (a PropagationStats) the delay of its arrival on a sample of
+    the nodes, then wait for the block on all the nodes.
+    edges: the topology of the network, as returned by connect_sc_nodes_topology; checked against the connected peers
+    sampled_nodes: number of polled nodes, the source included; None to poll all the nodes
+    Output: the id of the forged block
+    """
+    check_sc_nodes_topology(nodes, edges)
+    distances = get_hop_distances(len(nodes), edges, source)
+    sample = select_sampled_nodes(distances, sampled_nodes)
+    watchers = [TipWatcher(nodes[node], PROPAGATION_POLL_INTERVAL, PROPAGATION_POLL_INTERVAL * i / len(sample))
+                for i, node in enumerate(sample)]
+    polling_start = time.time()
+    for watcher in watchers:
+        watcher.start()
+    try:
+        block_id = forge_next_block_timed(nodes[source], stats.forging)
+        start = time.time()
+        while not all(block_id in watcher.first_seen for watcher in watchers):
+            failed = [i for i, watcher in enumerate(watchers) if watcher.error is not None]
+            if len(failed) > 0:
+                raise watchers[failed[0]].error
+            if time.time() - start >= timeout:
+                missing = [str(node) for node, watcher in zip(sample, watchers) if block_id not in watcher.first_seen]
+                raise TimeoutException("Waiting for block {0} on SC nodes {1}".format(block_id, ", ".join(missing)))
+            time.sleep(PROPAGATION_POLL_INTERVAL)
+    finally:
+        for watcher in watchers:
+            watcher.stopped.set()
+        for watcher in watchers:
+            watcher.join()
+        stats.add_polls(sum(watcher.polls for watcher in watchers), time.time() - polling_start, len(sample))
+    stats.add(block_id, [watcher.first_seen[block_id] for watcher in watchers], [distances[node] for node in sample])
+    sync_sc_blocks(nodes, wait_for=timeout)
+    return block_id
@@ -0,0 +1,100 @@
+import os
+import random
+import subprocess
+import time
+
+from test_framework.latency_histogram import LatencyHistogram
+from SidechainTestFramework.scutil import sidechainclient_processes
+
+"""
+Resource and API cost measures of a SC node, to follow how they grow with the chain height:
+ - latency of block/best and block/findById (blocks at random heights, not cached on the client side);
+ - resident memory of the SC node process (the JVM);
+ - size of the blockchain directory of the SC node.
+
+Example:
+    metrics = collect_chain_metrics(sc_node, 0, self.options.tmpdir)
+    print(format_chain_metrics(metrics))
+"""
+
+# Requests of each API latency measure
+DEFAULT_LATENCY_SAMPLES = 50
+
+
+def sc_node_rss(i):
+    """
+    Resident memory of the process of SC node i, in bytes, or None if unknown.
+    """
+    process = sidechainclient_processes.get(i)
+    if process is None:
+        return None
+    status_path = "/proc/{0}/status".format(process.pid)
+    if os.path.isfile(status_path):
+        with open(status_path) as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+        return None
+    try:
+        return int(subprocess.check_output(["ps", "-o", "rss=", "-p", str(process.pid)]).strip()) * 1024
+    except (subprocess.CalledProcessError, OSError, ValueError):
+        return None
+
+
+def directory_size(path):
+    size = 0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            try:
+                size += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass  # removed meanwhile, e.g. compacted storage files
+    return size
+
+
+def sc_blockchain_dir(dirname, i):
+    return os.path.join(dirname, "sc_node" + str(i), "blockchain")
+
+
+def measure_latency(call, samples):
+    histogram = LatencyHistogram()
+    for _ in range(samples):
+        start = time.time()
+        call()
+        histogram.record(time.time() - start)
+    return histogram
+
+
+def collect_chain_metrics(sc_node, i, dirname, samples=DEFAULT_LATENCY_SAMPLES):
+    """
+    Output: a dict with the height of SC node i, the summaries of the latencies of block/best and block/findById
+    (see LatencyHistogram.summary, in seconds), the RSS of the node and the size of its blockchain directory in bytes
+    """
+    height = sc_node.block_best()["result"]["height"]
+    best_latency = measure_latency(sc_node.block_best, samples)
+
+    block_ids = [sc_node.block_findIdByHeight(height=random.randint(1, height))["result"]["blockId"]
+                 for _ in range(samples)]
+    find_latency = LatencyHistogram()
+    for block_id in block_ids:
+        start = time.time()
+        sc_node.block_findById(blockId=block_id)
+        find_latency.record(time.time() - start)
+
+    return {"height": height,
+            "block_best": best_latency.summary(),
+            "block_findById": find_latency.summary(),
+            "rss": sc_node_rss(i),
+            "blockchain_size": directory_size(sc_blockchain_dir(dirname, i))}
+
+
+def format_chain_metrics(metrics):
+    def megabytes(size):
+        return "n/a" if size is None else "{0:.1f}MB".format(size / 1048576.0)
+
+    def latency(summary):
+        return "p50={0:.1f}ms p99={1:.1f}ms".format(summary["p50"] * 1000, summary["p99"] * 1000)
+
+    return "height {0}: best {1}, findById {2}, RSS {3}, blockchain {4}".format(
+        metrics["height"], latency(metrics["block_best"]), latency(metrics["block_findById"]),
+        megabytes(metrics["rss"]), megabytes(metrics["blockchain_size"]))
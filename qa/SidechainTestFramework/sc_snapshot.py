@@ -0,0 +1,125 @@
+import json
+import os
+import shutil
+import time
+from decimal import Decimal
+
+from test_framework.datadir_clone import clone_datadir
+from SidechainTestFramework.sc_boostrap_info import SCBootstrapInfo, Account, VrfAccount, WithdrawalCertificateData
+
+"""
+Snapshots of the state reached right after a sidechain bootstrap and the first start of its SC nodes.
+
+A snapshot contains:
+ - the mainchain blocks mined during the bootstrap (the one with the sidechain creation transaction),
+   which are submitted again to the mainchain node on restore;
+ - the datadirs of the SC nodes, without configuration files and logs;
+ - the serialized SCBootstrapInfo (see sc_boostrap_info.py).
+
+Snapshots are stored in <cache dir>/<key>, where the key identifies the bootstrap parameters, the mainchain state
+the sidechain was created on and the binaries used (see get_sc_snapshot_key in scutil.py).
+Environment variables:
+ - SC_SNAPSHOT_CACHE: the cache directory (default: cache/sc_snapshots)
+ - SC_SNAPSHOT_MAX_AGE: snapshots older than this number of seconds are rebuilt (default: 3600). The sidechain
+   genesis block timestamp is set at bootstrap, so a too old snapshot would start the sidechain far in the past.
+"""
+
+SC_SNAPSHOT_FILE = "snapshot.json"
+DEFAULT_SC_SNAPSHOT_MAX_AGE = 3600
+
+
+def get_sc_snapshot_cache_dir():
+    return os.getenv("SC_SNAPSHOT_CACHE", os.path.join("cache", "sc_snapshots"))
+
+
+def get_sc_snapshot_max_age():
+    return int(os.getenv("SC_SNAPSHOT_MAX_AGE", DEFAULT_SC_SNAPSHOT_MAX_AGE))
+
+
+def bootstrap_info_to_json(bootstrap_info):
+    data = dict(bootstrap_info.__dict__)
+    for field in ["genesis_account", "genesis_vrf_account", "withdrawal_certificate_data"]:
+        if data[field] is not None:
+            data[field] = dict(data[field].__dict__)
+    data["genesis_account_balance"] = str(data["genesis_account_balance"])
+    return data
+
+
+def bootstrap_info_from_json(data):
+    genesis_account = None
+    if data["genesis_account"] is not None:
+        genesis_account = Account(data["genesis_account"]["secret"], data["genesis_account"]["publicKey"])
+    genesis_vrf_account = None
+    if data["genesis_vrf_account"] is not None:
+        genesis_vrf_account = VrfAccount(data["genesis_vrf_account"]["secret"],
+                                         data["genesis_vrf_account"]["publicKey"])
+    certificate_data = data["withdrawal_certificate_data"]
+    withdrawal_certificate_data = WithdrawalCertificateData(certificate_data["threshold"],
+                                                            certificate_data["genSysConstant"],
+                                                            certificate_data["verificationKey"],
+                                                            certificate_data["schnorr_secrets"],
+                                                            certificate_data["schnorr_public_keys"])
+    balance = data["genesis_account_balance"]
+    genesis_account_balance = int(balance) if balance.isdigit() else Decimal(balance)
+    return SCBootstrapInfo(data["sidechain_id"], genesis_account, genesis_account_balance,
+                           data["mainchain_block_height"], data["sidechain_genesis_block_hex"], data["pow_data"],
+                           data["network"], data["withdrawal_epoch_length"], genesis_vrf_account,
+                           withdrawal_certificate_data)
+
+
+def save_sc_snapshot(key, dirname, bootstrap_info, mc_blocks, number_of_sc_nodes):
+    """
+    Save the SC nodes datadirs, found in dirname, together with the mainchain blocks and the bootstrap info.
+    SC nodes must be stopped. The snapshot is built aside and then moved in place, so concurrent test processes
+    never see a partial snapshot.
+    """
+    snapshot_dir = os.path.join(get_sc_snapshot_cache_dir(), key)
+    build_dir = "{0}.{1}.tmp".format(snapshot_dir, os.getpid())
+    os.makedirs(build_dir)
+    for i in range(number_of_sc_nodes):
+        node_dir = "sc_node" + str(i)
+        clone_datadir(os.path.join(dirname, node_dir), os.path.join(build_dir, node_dir),
+                      ignore=shutil.ignore_patterns("*.conf", "log"))
+    with open(os.path.join(build_dir, SC_SNAPSHOT_FILE), 'w') as snapshot_file:
+        json.dump({"bootstrap_info": bootstrap_info_to_json(bootstrap_info),
+                   "mc_blocks": mc_blocks,
+                   "number_of_sc_nodes": number_of_sc_nodes,
+                   "time": time.time()}, snapshot_file)
+
+    if os.path.isdir(snapshot_dir):
+        # An expired snapshot, or one saved meanwhile by another test process.
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+    try:
+        os.rename(build_dir, snapshot_dir)
+    except OSError:
+        shutil.rmtree(build_dir, ignore_errors=True)
+    print("Saved sidechain snapshot {0}".format(key))
+
+
+def restore_sc_snapshot(key, dirname, mc_node):
+    """
+    Restore a snapshot: submit its mainchain blocks to mc_node and copy the SC nodes datadirs into dirname.
+
+    Output: an instance of SCBootstrapInfo (see sc_boostrap_info.py), or None if there is no valid snapshot for the key.
+    """
+    snapshot_dir = os.path.join(get_sc_snapshot_cache_dir(), key)
+    snapshot_path = os.path.join(snapshot_dir, SC_SNAPSHOT_FILE)
+    if not os.path.isfile(snapshot_path):
+        return None
+    with open(snapshot_path, 'r') as snapshot_file:
+        snapshot = json.load(snapshot_file)
+    if time.time() - snapshot["time"] > get_sc_snapshot_max_age():
+        print("Sidechain snapshot {0} is expired".format(key))
+        return None
+
+    for block_hex in snapshot["mc_blocks"]:
+        result = mc_node.submitblock(block_hex)
+        if result is not None and result != "duplicate":
+            raise RuntimeError("Mainchain block of sidechain snapshot {0} rejected: {1}".format(key, result))
+
+    for i in range(snapshot["number_of_sc_nodes"]):
+        node_dir = "sc_node" + str(i)
+        clone_datadir(os.path.join(snapshot_dir, node_dir), os.path.join(dirname, node_dir))
+
+    print("Restored sidechain snapshot {0}".format(key))
+    return bootstrap_info_from_json(snapshot["bootstrap_info"])
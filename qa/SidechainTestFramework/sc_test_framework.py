@@ -5,14 +5,16 @@ from SidechainTestFramework.sc_boostrap_info import SCNetworkConfiguration, SCBo
 from test_framework.test_framework import BitcoinTestFramework
 from test_framework.authproxy import JSONRPCException
 from SidechainTestFramework.sidechainauthproxy import SCAPIException
+from test_framework.mc_event_listener import start_mc_event_listeners
 from test_framework.util import check_json_precision, \
-    initialize_chain_clean, \
+    initialize_chain_clean, initialize_sc_enabled_chain, \
     start_nodes, stop_nodes, \
     sync_blocks, sync_mempools, wait_bitcoinds, websocket_port_by_mc_node_index
 from SidechainTestFramework.scutil import initialize_default_sc_chain_clean, \
-    start_sc_nodes, stop_sc_nodes, \
+    start_sc_nodes, stop_sc_nodes, shutdown_sc_nodes, \
     sync_sc_blocks, sync_sc_mempools, TimeoutException, \
-    bootstrap_sidechain_nodes
+    bootstrap_sidechain_nodes, has_pending_sc_snapshot, save_pending_sc_snapshot
+import SidechainTestFramework.scutil as scutil
 import os
 import traceback
 import sys
@@ -39,11 +41,13 @@ Default behavior: the framework starts 1 SC node connected to 1 MC node.
 '''
 class SidechainTestFramework(BitcoinTestFramework):
 
+    mc_events = None
+
     def add_options(self, parser):
         pass
 
     def setup_chain(self):
-        initialize_chain_clean(self.options.tmpdir, 1)
+        initialize_sc_enabled_chain(self.options.tmpdir, 1)
 
     def setup_network(self, split = False):
         self.nodes = self.setup_nodes()
@@ -55,12 +59,20 @@ class SidechainTestFramework(BitcoinTestFramework):
     def split_network(self):
         pass
 
+    def get_mc_events(self):
+        """
+        Tip changes of the MC nodes, listened from their websocket since the first call.
+        """
+        if self.mc_events is None:
+            self.mc_events = start_mc_event_listeners(len(self.nodes))
+        return self.mc_events
+
     def sync_all(self):
-        sync_blocks(self.nodes)
+        sync_blocks(self.nodes, events=self.get_mc_events())
         sync_mempools(self.nodes)
 
     def sync_nodes(self, mc_nodes):
-        sync_blocks(mc_nodes)
+        sync_blocks(mc_nodes, events=self.get_mc_events())
         sync_mempools(mc_nodes)
 
     def join_network(self):
@@ -98,6 +110,21 @@ class SidechainTestFramework(BitcoinTestFramework):
     def sc_join_network(self):
         pass
 
+    def sc_save_snapshot(self):
+        """
+        Save the state reached after the sidechain bootstrap and the first start of the SC nodes,
+        so that next runs with the same configuration restore it (see sc_snapshot.py).
+        SC nodes are stopped to get consistent datadirs and then started again.
+        """
+        if not has_pending_sc_snapshot():
+            return
+        sc_nodes_running = len(getattr(self, "sc_nodes", [])) > 0
+        if sc_nodes_running:
+            shutdown_sc_nodes(self.sc_nodes)
+        save_pending_sc_snapshot(self.options.tmpdir)
+        if sc_nodes_running:
+            self.sc_setup_network()
+
     def run_test(self):
         pass
 
@@ -117,6 +144,8 @@ class SidechainTestFramework(BitcoinTestFramework):
                           help="Root directory for datadirs")
         parser.add_option("--tracerpc", dest="trace_rpc", default=False, action="store_true",
                           help="Print out all RPC calls as they are made")
+        parser.add_option("--scsnapshots", dest="scsnapshots", default=False, action="store_true",
+                          help="Restore the state after sidechain bootstrap from a snapshot, if any, or save it")
 
         self.add_options(parser)
         self.sc_add_options(parser)
@@ -128,6 +157,8 @@ class SidechainTestFramework(BitcoinTestFramework):
 
         os.environ['PATH'] = self.options.zendir+":"+os.environ['PATH']
 
+        scutil.sc_snapshots_enabled = self.options.scsnapshots
+
         check_json_precision()
 
         success = False
@@ -145,6 +176,9 @@ class SidechainTestFramework(BitcoinTestFramework):
 
             self.sc_setup_network()
 
+            if self.options.scsnapshots:
+                self.sc_save_snapshot()
+
             self.run_test()
 
             success = True
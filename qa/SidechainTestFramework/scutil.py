@@ -5,15 +5,45 @@ import json
 
 from SidechainTestFramework.sc_boostrap_info import MCConnectionInfo, SCBootstrapInfo, SCNetworkConfiguration, Account, \
     VrfAccount, WithdrawalCertificateData
-from sidechainauthproxy import SidechainAuthServiceProxy
+from sidechainauthproxy import SidechainAuthServiceProxy, SCAPIException
 import subprocess
+import threading
+import hashlib
+import shutil
+import atexit
 import time
-import socket
-from contextlib import closing
-
-from test_framework.util import initialize_new_sidechain_in_mainchain
+import glob
+try:
+    import urllib.parse as urlparse
+except ImportError:
+    import urlparse
+
+from test_framework.util import initialize_new_sidechain_in_mainchain, get_binary_hash, get_file_hash, \
+    websocket_port_by_mc_node_index
+from test_framework.port_lease import lease_port, get_port_lease, SC_P2P_PORT, SC_RPC_PORT
+from test_framework.fanout import NodesFanOut, gather
+from test_framework.node_readiness import ReadinessProbe, wait_for_nodes_ready, PROBE_REQUEST_TIMEOUT
+from SidechainTestFramework.sc_snapshot import save_sc_snapshot, restore_sc_snapshot
+from SidechainTestFramework.sc_chain_index import get_sc_chain_index, find_indexed_block
 
 WAIT_CONST = 1
+# Checking memory pools only moves transaction ids, so they can be checked more often
+SYNC_MEMPOOLS_POLL_INTERVAL = 0.1
+# Default maxConnections of the Scorex network settings. Nodes of a network topology get their topology degree.
+DEFAULT_SC_MAX_CONNECTIONS = 20
+# Scorex getPeersInterval: peers exchange their known peers every interval (the first time 2s after the start), then
+# connect to the new ones every 5s while below maxConnections. Nodes of a network topology do not exchange peers.
+DEFAULT_SC_GET_PEERS_INTERVAL = "2m"
+NO_PEER_DISCOVERY_GET_PEERS_INTERVAL = "1d"
+# Connections of a network topology are checked often, and asked again if still missing after the retry interval
+SC_CONNECTIONS_POLL_INTERVAL = 0.05
+SC_CONNECTIONS_RETRY_INTERVAL = 2
+SC_MAX_CONCURRENT_CONNECTS = 64
+# Longer than the 5s interval of the Scorex connections to known peers: no connection must appear meanwhile
+SC_TOPOLOGY_SETTLE_TIME = 6
+
+SIMPLE_APP_JAR = "../examples/simpleapp/target/Sidechains-SDK-simpleapp-0.2.1.jar"
+SDK_JARS = "../examples/simpleapp/target/lib/Sidechains-SDK-*.jar"
 
 
 class TimeoutException(Exception):
@@ -23,11 +53,11 @@ class TimeoutException(Exception):
 
 
 def sc_p2p_port(n):
-    return 8300 + n + os.getpid() % 999
+    return lease_port(SC_P2P_PORT, n)
 
 
 def sc_rpc_port(n):
-    return 8200 + n + os.getpid() % 999
+    return lease_port(SC_RPC_PORT, n)
 
 
 # To be removed
@@ -45,15 +75,23 @@ def wait_for_next_sc_blocks(node, expected_height, wait_for=25):
         time.sleep(WAIT_CONST)
 
 
+def sc_node_readiness_probe(i, url):
+    """
+    SC node i is ready when it answers block/best: its API port is opened before the node views are initialized.
+    """
+    def check():
+        response = SidechainAuthServiceProxy(url, timeout=PROBE_REQUEST_TIMEOUT).block_best()
+        if "result" not in response:
+            raise SCAPIException(json.dumps(response))
+    return ReadinessProbe("SC node " + str(i), sidechainclient_processes[i], check)
+
+
 def wait_for_sc_node_initialization(nodes):
     """
-    Wait for SC Nodes to be fully initialized. This is done by pinging a node until its socket will be fully open
+    Wait for SC Nodes to be fully initialized, probing all of them at the same time.
+    Raise NodeStartupException if a node exits or is not ready before the startup timeout.
     """
-    for i in range(len(nodes)):
-        rpc_port = sc_rpc_port(i)
-        with closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as sock:
-            while not sock.connect_ex(("127.0.0.1", rpc_port)) == 0:
-                time.sleep(WAIT_CONST)
+    wait_for_nodes_ready([sc_node_readiness_probe(i, node.url) for i, node in enumerate(nodes)])
 
 
 def sync_sc_blocks(api_connections, wait_for=25, p=False):
@@ -64,7 +102,7 @@ def sync_sc_blocks(api_connections, wait_for=25, p=False):
     while True:
         if time.time() - start >= wait_for:
             raise TimeoutException("Syncing blocks")
-        counts = [int(x.block_best()["result"]["height"]) for x in api_connections]
+        counts = [int(best["result"]["height"]) for best in NodesFanOut(api_connections).block_best()]
         if p:
             print (counts)
         if counts == [counts[0]] * len(counts):
@@ -72,37 +110,170 @@ def sync_sc_blocks(api_connections, wait_for=25, p=False):
         time.sleep(WAIT_CONST)
 
 
+def get_sc_mempools_ids(api_connections):
+    """
+    Ids of the transactions in the memory pool of every node, asked to all of them at the same time.
+    Output: a list with a set of ids for each node
+    """
+    return [set(response["result"]["transactionIds"])
+            for response in NodesFanOut(api_connections).transaction_allTransactions(format=False)]
+
+
+def get_sc_mempools_lag(mempools_ids):
+    """
+    For each node the number of transactions it misses among the ones found in any memory pool.
+    """
+    all_ids = set().union(*mempools_ids)
+    return [len(all_ids) - len(all_ids & ids) for ids in mempools_ids]
+
+
 def sync_sc_mempools(api_connections, wait_for=25):
     """
-    Wait for maximum wait_for seconds for everybody to have the same transactions in their memory pools
+    Wait for maximum wait_for seconds for everybody to have the same transactions in their memory pools.
+    Only transaction ids are compared. On timeout the exception reports the nodes behind the others.
     """
     start = time.time()
     while True:
-        refpool = api_connections[0].transaction_allTransactions()["result"]["transactions"]
-        if time.time() - start >= wait_for:
-            raise TimeoutException("Syncing mempools")
-        num_match = 1
-        for i in range(1, len(api_connections)):
-            nodepool = api_connections[i].transaction_allTransactions()["result"]["transactions"]
-            if cmp(nodepool, refpool) == 0:
-                num_match = num_match + 1
-        if num_match == len(api_connections):
+        lag = get_sc_mempools_lag(get_sc_mempools_ids(api_connections))
+        if max(lag) == 0:
             break
-        time.sleep(WAIT_CONST)
+        if time.time() - start >= wait_for:
+            raise TimeoutException("Syncing mempools: " + ", ".join(
+                "node {0} misses {1} transactions".format(i, missing) for i, missing in enumerate(lag) if missing > 0))
+        time.sleep(SYNC_MEMPOOLS_POLL_INTERVAL)
 
 
 sidechainclient_processes = {}
 
+# Set by the test framework to save and restore sidechain snapshots in bootstrap_sidechain_nodes (see sc_snapshot.py)
+sc_snapshots_enabled = False
+pending_sc_snapshot = None
+
+
+
+SC_BOOTSTRAP_TOOL_JAR = "../tools/sctool/target/Sidechains-SDK-ScBootstrappingTools-0.2.1.jar"
+
+bootstrap_tool_process = None
+bootstrap_tool_lock = threading.Lock()
+
+
+class BootstrapToolException(Exception):
+    def __init__(self, error):
+        Exception.__init__(self, error)
+        self.error = error
+
+
+def start_bootstrap_tool():
+    """
+    Start ScBootstrappingTools in server mode. The same process serves all the commands of the run,
+    so the JVM startup is paid only once.
+    """
+    global bootstrap_tool_process
+    if bootstrap_tool_process is None or bootstrap_tool_process.poll() is not None:
+        bootstrap_tool_process = subprocess.Popen(["java", "-jar", SC_BOOTSTRAP_TOOL_JAR, "server"],
+                                                  stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    return bootstrap_tool_process
+
+
+def stop_bootstrap_tool():
+    global bootstrap_tool_process
+    with bootstrap_tool_lock:
+        if bootstrap_tool_process is not None:
+            if bootstrap_tool_process.poll() is None:
+                bootstrap_tool_process.stdin.close()
+                bootstrap_tool_process.wait()
+            bootstrap_tool_process = None
+
+
+atexit.register(stop_bootstrap_tool)
+
+
+# Commands whose output depends only on their parameters and on the tool itself ("genesisinfo" embeds the current time).
+CACHEABLE_BOOTSTRAP_COMMANDS = ["generatekey", "generateVrfKey", "generatekeys", "generateVrfKeys", "generateProofInfo"]
+
+bootstrap_tool_jar_hash = None
+
+
+def get_bootstrap_tool_cache_dir():
+    return os.getenv("SC_BOOTSTRAP_TOOL_CACHE", os.path.join("cache", "sctool"))
+
+
+def get_bootstrap_tool_jar_hash():
+    """
+    Hash of ScBootstrappingTools jar content. It is recomputed only if the jar file was modified.
+    """
+    global bootstrap_tool_jar_hash
+    jar_stat = os.stat(SC_BOOTSTRAP_TOOL_JAR)
+    jar_version = (jar_stat.st_size, jar_stat.st_mtime)
+    if bootstrap_tool_jar_hash is None or bootstrap_tool_jar_hash[0] != jar_version:
+        bootstrap_tool_jar_hash = (jar_version, get_file_hash(SC_BOOTSTRAP_TOOL_JAR))
+    return bootstrap_tool_jar_hash[1]
+
+
+def get_bootstrap_tool_cache_path(command_name, json_parameters):
+    """
+    Location of the cached output of a command: <cache dir>/<jar hash>/<hash of command name and parameters>.json
+    """
+    key = hashlib.sha256(json.dumps([command_name, json_parameters], sort_keys=True)).hexdigest()
+    return os.path.join(get_bootstrap_tool_cache_dir(), get_bootstrap_tool_jar_hash(), key + ".json")
+
+
+def remove_stale_bootstrap_tool_cache(jar_hash):
+    """
+    Remove the outputs cached for any other version of the ScBootstrappingTools jar.
+    """
+    cache_dir = get_bootstrap_tool_cache_dir()
+    for entry in os.listdir(cache_dir):
+        if entry != jar_hash and os.path.isdir(os.path.join(cache_dir, entry)):
+            shutil.rmtree(os.path.join(cache_dir, entry), ignore_errors=True)
 
 
 def launch_bootstrap_tool(command_name, json_parameters):
+    """
+    Run a ScBootstrappingTools command. Outputs of deterministic commands are cached on disk,
+    so they are computed only once for each version of the tool.
+    """
+    if command_name not in CACHEABLE_BOOTSTRAP_COMMANDS:
+        return run_bootstrap_tool_command(command_name, json_parameters)
+
+    cache_path = get_bootstrap_tool_cache_path(command_name, json_parameters)
+    if os.path.isfile(cache_path):
+        with open(cache_path, 'r') as cache_file:
+            return json.load(cache_file)
+
+    output = run_bootstrap_tool_command(command_name, json_parameters)
+
+    cache_entry_dir = os.path.dirname(cache_path)
+    if not os.path.isdir(cache_entry_dir):
+        try:
+            os.makedirs(cache_entry_dir)
+        except OSError:
+            pass  # created at the same time by another test process
+        remove_stale_bootstrap_tool_cache(os.path.basename(cache_entry_dir))
+    # Write and rename, so that concurrent test processes never read a partially written entry.
+    tmp_path = "{0}.{1}.tmp".format(cache_path, os.getpid())
+    with open(tmp_path, 'w') as cache_file:
+        json.dump(output, cache_file)
+    try:
+        os.rename(tmp_path, cache_path)
+    except OSError:
+        os.remove(tmp_path)  # on Windows rename fails if another process already stored the same entry
+    return output
+
+
+def run_bootstrap_tool_command(command_name, json_parameters):
     json_param = json.dumps(json_parameters)
-    java_ps = subprocess.Popen(["java", "-jar",
-                               "../tools/sctool/target/Sidechains-SDK-ScBootstrappingTools-0.2.1.jar",
-                               command_name, json_param], stdout=subprocess.PIPE)
-    sc_bootstrap_output = java_ps.communicate()[0]
-    jsone_node = json.loads(sc_bootstrap_output)
-    return jsone_node
+    with bootstrap_tool_lock:
+        bootstrap_tool = start_bootstrap_tool()
+        bootstrap_tool.stdin.write(command_name + " " + json_param + "\n")
+        bootstrap_tool.stdin.flush()
+        sc_bootstrap_output = bootstrap_tool.stdout.readline()
+    if not sc_bootstrap_output:
+        raise BootstrapToolException("ScBootstrappingTools exited while processing command " + command_name)
+    response = json.loads(sc_bootstrap_output)
+    if "error" in response:
+        raise BootstrapToolException(response["error"])
+    return response["result"]
 
 """
 Generate a genesis info by calling ScBootstrappingTools with command "genesisinfo"
@@ -110,6 +281,7 @@ Parameters:
  - n: sidechain node nth
  - genesis_info: genesis info provided by a mainchain node
  - genesis_secret:
+ - genesis_slots_rewind: number of consensus slots the genesis block is created in the past (None: tool default)
  
 Output: a JSON object to be included in the settings file of the sidechain node nth.
 {
@@ -121,26 +293,28 @@ Output: a JSON object to be included in the settings file of the sidechain node
     "withdrawalEpochLength": xxx
 }
 """
-def generate_genesis_data(genesis_info, genesis_secret, vrf_secret):
+def generate_genesis_data(genesis_info, genesis_secret, vrf_secret, genesis_slots_rewind=None):
     jsonParameters = {"secret": genesis_secret, "vrfSecret": vrf_secret, "info": genesis_info}
+    if genesis_slots_rewind is not None:
+        jsonParameters["genesisSlotsRewind"] = genesis_slots_rewind
     jsonNode = launch_bootstrap_tool("genesisinfo", jsonParameters)
     return jsonNode
 
 
 """
-Generate secrets by calling ScBootstrappingTools with command "generatekey"
+Generate secrets by calling ScBootstrappingTools with command "generatekeys"
 Parameters:
- - seed
+ - seed: the i-th key is generated from seed "<seed>_<i>", starting from 1
  - number_of_accounts: the number of keys to be generated
  
 Output: an array of instances of Account (see sc_bootstrap_info.py).
 """
 def generate_secrets(seed, number_of_accounts):
     accounts = []
-    secrets = []
-    for i in range(number_of_accounts):
-        jsonParameters = {"seed": "{0}_{1}".format(seed, i + 1)}
-        secrets.append(launch_bootstrap_tool("generatekey", jsonParameters))
+    if number_of_accounts <= 0:
+        return accounts
+    jsonParameters = {"seed": seed, "count": number_of_accounts}
+    secrets = launch_bootstrap_tool("generatekeys", jsonParameters)["keys"]
 
     for i in range(len(secrets)):
         secret = secrets[i]
@@ -149,9 +323,9 @@ def generate_secrets(seed, number_of_accounts):
 
 
 """
-Generate Vrf keys by calling ScBootstrappingTools with command "generateVrfKey"
+Generate Vrf keys by calling ScBootstrappingTools with command "generateVrfKeys"
 Parameters:
- - seed
+ - seed: the i-th key is generated from seed "<seed>_<i>", starting from 1
  - number_of_accounts: the number of keys to be generated
 
 Output: an array of instances of VrfKey (see sc_bootstrap_info.py).
@@ -159,10 +333,10 @@ Output: an array of instances of VrfKey (see sc_bootstrap_info.py).
 
 def generate_vrf_secrets(seed, number_of_vrf_keys):
     vrf_keys = []
-    secrets = []
-    for i in range(number_of_vrf_keys):
-        jsonParameters = {"seed": "{0}_{1}".format(seed, i + 1)}
-        secrets.append(launch_bootstrap_tool("generateVrfKey", jsonParameters))
+    if number_of_vrf_keys <= 0:
+        return vrf_keys
+    jsonParameters = {"seed": seed, "count": number_of_vrf_keys}
+    secrets = launch_bootstrap_tool("generateVrfKeys", jsonParameters)["keys"]
 
     for i in range(len(secrets)):
         secret = secrets[i]
@@ -208,8 +382,11 @@ Parameters:
  - n: sidechain node nth
  - bootstrap_info: an instance of SCBootstrapInfo (see sc_bootstrap_info.py)
  - websocket_config: an instance of MCConnectionInfo (see sc_boostrap_info.py)
+ - max_connections: maximum number of p2p connections of the node
+ - peer_discovery: if False, the node does not ask its peers for other peers to connect to
 """
-def initialize_sc_datadir(dirname, n, bootstrap_info=SCBootstrapInfo, websocket_config=MCConnectionInfo()):
+def initialize_sc_datadir(dirname, n, bootstrap_info=SCBootstrapInfo, websocket_config=MCConnectionInfo(),
+                          max_connections=DEFAULT_SC_MAX_CONNECTIONS, peer_discovery=True):
 
     apiAddress = "127.0.0.1"
     configsData = []
@@ -255,7 +432,9 @@ def initialize_sc_datadir(dirname, n, bootstrap_info=SCBootstrapInfo, websocket_
         "ZEN_CLI_ARGS": json.dumps(zencliArgs),
         "THRESHOLD" : bootstrap_info.withdrawal_certificate_data.threshold,
         "SIGNER_PUBLIC_KEY": json.dumps(bootstrap_info.withdrawal_certificate_data.schnorr_public_keys),
-        "SIGNER_PRIVATE_KEY": json.dumps(bootstrap_info.withdrawal_certificate_data.schnorr_secrets)
+        "SIGNER_PRIVATE_KEY": json.dumps(bootstrap_info.withdrawal_certificate_data.schnorr_secrets),
+        "MAX_CONNECTIONS": max_connections,
+        "GET_PEERS_INTERVAL": DEFAULT_SC_GET_PEERS_INTERVAL if peer_discovery else NO_PEER_DISCOVERY_GET_PEERS_INTERVAL
     }
 
     configsData.append({
@@ -333,7 +512,7 @@ def get_websocket_configuration(index, array_of_MCConnectionInfo):
 
 def start_sc_node(i, dirname, extra_args=None, rpchost=None, timewait=None, binary=None):
     """
-    Start a SC node and returns API connection to it
+    Start a SC node without waiting for it to be initialized and returns API connection to it
     """
     # Will we have  extra args for SC too ?
     datadir = os.path.join(dirname, "sc_node" + str(i))
@@ -342,7 +521,7 @@ def start_sc_node(i, dirname, extra_args=None, rpchost=None, timewait=None, bina
         lib_separator = ";"
 
     if binary is None:
-        binary = "../examples/simpleapp/target/Sidechains-SDK-simpleapp-0.2.1.jar" + lib_separator + "../examples/simpleapp/target/lib/* com.horizen.examples.SimpleApp"
+        binary = SIMPLE_APP_JAR + lib_separator + "../examples/simpleapp/target/lib/* com.horizen.examples.SimpleApp"
     #        else if platform.system() == 'Linux':
     bashcmd = 'java -cp ' + binary + " " + (datadir + ('/node%s.conf' % i))
     sidechainclient_processes[i] = subprocess.Popen(bashcmd.split())
@@ -354,7 +533,8 @@ def start_sc_node(i, dirname, extra_args=None, rpchost=None, timewait=None, bina
 
 def start_sc_nodes(num_nodes, dirname, extra_args=None, rpchost=None, binary=None):
     """
-    Start multiple SC clients, return connections to them
+    Start multiple SC clients, return connections to them.
+    All the JVMs are started at once and their initialization is probed in parallel.
     """
     if extra_args is None: extra_args = [None for i in range(num_nodes)]
     if binary is None: binary = [None for i in range(num_nodes)]
@@ -377,6 +557,24 @@ def stop_sc_node(node, i):
     del sidechainclient_processes[i]
 
 
+def shutdown_sc_nodes(nodes, wait_for=60):
+    """
+    Stop all SC nodes letting them close their storages, killing the ones still alive after wait_for seconds.
+    """
+    global sidechainclient_processes
+    for sc in sidechainclient_processes.values():
+        sc.terminate()
+    start = time.time()
+    for sc in sidechainclient_processes.values():
+        while sc.poll() is None and time.time() - start < wait_for:
+            time.sleep(0.1)
+        if sc.poll() is None:
+            sc.kill()
+            sc.wait()
+    sidechainclient_processes.clear()
+    del nodes[:]
+
+
 def stop_sc_nodes(nodes):
     # Must be changed with a sort of .stop() API call
     global sidechainclient_processes
@@ -422,6 +620,89 @@ def connect_sc_nodes_bi(nodes, a, b):
     connect_sc_nodes(nodes[b], a)
 
 
+def get_sc_connected_peers(nodes):
+    """
+    Output: for each node, the set of the indexes of its connected peers (SC nodes are named node<index>)
+    """
+    connected_peers = []
+    for response in NodesFanOut(nodes).node_connectedPeers():
+        peers = set()
+        for peer in response["result"]["peers"]:
+            if peer["name"].startswith("node") and peer["name"][4:].isdigit():
+                peers.add(int(peer["name"][4:]))
+        connected_peers.append(peers)
+    return connected_peers
+
+
+def get_sc_topology_mismatches(nodes, edges):
+    """
+    Compare the connected peers of the nodes with their neighbours in edges.
+    Output: the list of (node, missing peers, extra peers) of the nodes whose connected peers differ
+    """
+    neighbours = [set() for _ in nodes]
+    for a, b in edges:
+        neighbours[a].add(b)
+        neighbours[b].add(a)
+    connected_peers = get_sc_connected_peers(nodes)
+    return [(node, sorted(neighbours[node] - connected_peers[node]), sorted(connected_peers[node] - neighbours[node]))
+            for node in range(len(nodes)) if connected_peers[node] != neighbours[node]]
+
+
+def format_sc_topology_mismatches(mismatches):
+    return "; ".join("node {0}: missing {1}, extra {2}".format(node, missing, extra)
+                     for node, missing, extra in mismatches)
+
+
+def check_sc_nodes_topology(nodes, edges):
+    """
+    Fail if the connected peers of any node are not exactly its neighbours in edges.
+    """
+    mismatches = get_sc_topology_mismatches(nodes, edges)
+    assert_true(len(mismatches) == 0, "SC network differs from its topology: " +
+                format_sc_topology_mismatches(mismatches))
+
+
+def connect_sc_nodes_topology(nodes, topology, wait_for=60):
+    """
+    Connect the SC nodes as described by topology, an instance of SCNetworkTopology (see sc_boostrap_info.py),
+    e.g. the topology of the SCNetworkConfiguration used to bootstrap them.
+    All the connections are asked at the same time, then the connected peers of all the nodes are checked together
+    until both sides of every edge see each other. Connections still missing after SC_CONNECTIONS_RETRY_INTERVAL
+    are asked again.
+    The nodes must have been bootstrapped with the same topology, so they do not look for other peers: after
+    SC_TOPOLOGY_SETTLE_TIME the connected peers of every node must still be exactly its topology neighbours.
+    Output: the list of the edges (a, b) of the topology
+    """
+    edges = topology.get_edges(len(nodes))
+    print("Connecting {0} SC nodes with {1} connections ({2} topology)...".format(len(nodes), len(edges),
+                                                                                  topology.kind))
+
+    def connect(edges_to_connect):
+        for first in range(0, len(edges_to_connect), SC_MAX_CONCURRENT_CONNECTS):
+            gather([lambda a=a, b=b: nodes[a].node_connect(json.dumps({"host": "127.0.0.1",
+                                                                       "port": str(sc_p2p_port(b))}))
+                    for a, b in edges_to_connect[first:first + SC_MAX_CONCURRENT_CONNECTS]])
+
+    connect(edges)
+    start = last_connect = time.time()
+    while True:
+        connected_peers = get_sc_connected_peers(nodes)
+        missing = [(a, b) for a, b in edges if b not in connected_peers[a] or a not in connected_peers[b]]
+        if len(missing) == 0:
+            check_sc_nodes_topology(nodes, edges)
+            time.sleep(SC_TOPOLOGY_SETTLE_TIME)
+            check_sc_nodes_topology(nodes, edges)
+            return edges
+        now = time.time()
+        if now - start >= wait_for:
+            raise TimeoutException("Connecting SC nodes, {0} connections missing: {1}".format(
+                len(missing), ", ".join("{0}-{1}".format(a, b) for a, b in missing)))
+        if now - last_connect >= SC_CONNECTIONS_RETRY_INTERVAL:
+            connect(missing)
+            last_connect = now
+        time.sleep(SC_CONNECTIONS_POLL_INTERVAL)
+
+
 def connect_to_mc_node(sc_node, mc_node, *kwargs):
     pass
 
@@ -472,8 +753,15 @@ Verify if a mainchain block is included in a sidechain block.
 Parameters:
  - sc_block: the JSON representation of a sidechain block. See com.horizen.block.SidechainBlock
  - expected_mc_block: the JSON representation of a mainchain block
+ - sc_node: the sidechain node of sc_block. If given and sc_block is in its active chain, the answer comes from the
+   chain index of the node (see sc_chain_index.py) instead of searching the block
 """
-def is_mainchain_block_included_in_sc_block(sc_block, expected_mc_block):
+def is_mainchain_block_included_in_sc_block(sc_block, expected_mc_block, sc_node=None):
+
+    if sc_node is not None:
+        including_block_id = find_indexed_block(sc_node, "block_of_mc_header", expected_mc_block["hash"])
+        if including_block_id == sc_block["id"] or get_sc_chain_index(sc_node).contains_block(sc_block["id"]):
+            return including_block_id == sc_block["id"]
 
     mc_block_headers_json = sc_block["mainchainHeaders"]
     is_mac_block_included = False
@@ -512,12 +800,11 @@ Parameters:
  - expected_balance: expected balance for that account
 """
 def check_box_balance(sc_node, account, box_type, expected_boxes_count, expected_balance):
-    response = sc_node.wallet_allBoxes()
-    boxes = response["result"]["boxes"]
     boxes_balance = 0
     boxes_count = 0
     pub_key = account.publicKey
-    for box in boxes:
+    # Boxes are read one at a time from the response, so memory usage doesn't depend on the wallet size
+    for box in sc_node.wallet_allBoxes.stream("result.boxes"):
         if box["proposition"]["publicKey"] == pub_key and (box["typeId"] == box_type or box_type == 0):
             box_value = box["value"]
             assert_true(box_value > 0,
@@ -582,9 +869,21 @@ network: {
  - bootstrap information of the sidechain nodes. An instance of SCBootstrapInfo (see sc_boostrap_info.py)    
 """
 def bootstrap_sidechain_nodes(dirname, network=SCNetworkConfiguration):
+    global pending_sc_snapshot
     total_number_of_sidechain_nodes = len(network.sc_nodes_configuration)
     sc_creation_info = network.sc_creation_info
-    sc_nodes_bootstrap_info = create_sidechain(sc_creation_info)
+    sc_nodes_bootstrap_info = None
+    if sc_snapshots_enabled:
+        snapshot_key = get_sc_snapshot_key(network)
+        sc_nodes_bootstrap_info = restore_sc_snapshot(snapshot_key, dirname, sc_creation_info.mc_node)
+        if sc_nodes_bootstrap_info is None:
+            mc_height = sc_creation_info.mc_node.getblockcount()
+            sc_nodes_bootstrap_info = create_sidechain(sc_creation_info)
+            pending_sc_snapshot = (snapshot_key, sc_nodes_bootstrap_info,
+                                   get_mc_blocks_hex(sc_creation_info.mc_node, mc_height),
+                                   total_number_of_sidechain_nodes)
+    else:
+        sc_nodes_bootstrap_info = create_sidechain(sc_creation_info)
     sc_nodes_bootstrap_info_empty_account = SCBootstrapInfo(sc_nodes_bootstrap_info.sidechain_id,
                                                             None,
                                                             sc_nodes_bootstrap_info.genesis_account_balance,
@@ -595,15 +894,89 @@ def bootstrap_sidechain_nodes(dirname, network=SCNetworkConfiguration):
                                                             sc_nodes_bootstrap_info.withdrawal_epoch_length,
                                                             sc_nodes_bootstrap_info.genesis_vrf_account,
                                                             sc_nodes_bootstrap_info.withdrawal_certificate_data)
+    # The nodes of a network topology can not connect to more peers than their topology neighbours, nor learn about
+    # other peers, so the network does not drift into a denser graph
+    max_connections = [DEFAULT_SC_MAX_CONNECTIONS] * total_number_of_sidechain_nodes
+    if network.topology is not None:
+        max_connections = [max(1, degree) for degree in network.topology.get_degrees(total_number_of_sidechain_nodes)]
+    peer_discovery = network.topology is None
     for i in range(total_number_of_sidechain_nodes):
         sc_node_conf = network.sc_nodes_configuration[i]
         if i == 0:
-            bootstrap_sidechain_node(dirname, i, sc_nodes_bootstrap_info, sc_node_conf)
+            bootstrap_sidechain_node(dirname, i, sc_nodes_bootstrap_info, sc_node_conf, max_connections[i],
+                                     peer_discovery)
         else:
-            bootstrap_sidechain_node(dirname, i, sc_nodes_bootstrap_info_empty_account, sc_node_conf)
+            bootstrap_sidechain_node(dirname, i, sc_nodes_bootstrap_info_empty_account, sc_node_conf,
+                                     max_connections[i], peer_discovery)
 
     return sc_nodes_bootstrap_info
 
+"""
+Key identifying the state reached by bootstrapping a sidechain network (see sc_snapshot.py): the mainchain state
+the sidechain is created on, the SCCreationInfo parameters, the SC nodes configuration and the binaries hashes.
+Ports change at every run, so the websocket address of each SC node is replaced by the index of its mainchain node.
+
+Parameters:
+ - network: an instance of SCNetworkConfiguration (see sc_boostrap_info.py)
+"""
+def get_sc_snapshot_key(network):
+    sc_creation_info = network.sc_creation_info
+    sc_nodes = []
+    for sc_node_configuration in network.sc_nodes_configuration:
+        mc_connection_info = sc_node_configuration.mc_connection_info
+        sc_nodes.append([get_mc_node_index_by_websocket_address(mc_connection_info.address),
+                         mc_connection_info.connectionTimeout,
+                         mc_connection_info.reconnectionDelay,
+                         mc_connection_info.reconnectionMaxAttempts])
+    key_data = {
+        "mc_best_block": sc_creation_info.mc_node.getbestblockhash(),
+        "forward_amount": str(sc_creation_info.forward_amount),
+        "withdrawal_epoch_length": sc_creation_info.withdrawal_epoch_length,
+        "genesis_slots_rewind": sc_creation_info.genesis_slots_rewind,
+        "sc_nodes": sc_nodes,
+        "zend": get_binary_hash(os.getenv("BITCOIND", "bitcoind")),
+        "sc_bootstrap_tool": get_bootstrap_tool_jar_hash(),
+        "sc_node": get_file_hash(SIMPLE_APP_JAR),
+        "sdk": [get_file_hash(path) for path in sorted(glob.glob(SDK_JARS))]
+    }
+    return hashlib.sha256(json.dumps(key_data, sort_keys=True)).hexdigest()
+
+
+def get_mc_node_index_by_websocket_address(address):
+    port = urlparse.urlparse(address).port
+    for i in range(get_port_lease().max_nodes):
+        if websocket_port_by_mc_node_index(i) == port:
+            return i
+    return address
+
+
+"""
+Hex of the mainchain blocks above the given height, in order of height.
+"""
+def get_mc_blocks_hex(mc_node, from_height):
+    with mc_node.batch() as batch:
+        hashes = [batch.getblockhash(height) for height in range(from_height + 1, mc_node.getblockcount() + 1)]
+    with mc_node.batch() as batch:
+        blocks = [batch.getblock(block_hash.result(), False) for block_hash in hashes]
+    return [block.result() for block in blocks]
+
+
+"""
+Save the sidechain snapshot recorded by the last bootstrap_sidechain_nodes call, if any.
+SC nodes must be stopped, so that their datadirs are consistent.
+"""
+def save_pending_sc_snapshot(dirname):
+    global pending_sc_snapshot
+    if pending_sc_snapshot is not None:
+        (snapshot_key, bootstrap_info, mc_blocks, number_of_sc_nodes) = pending_sc_snapshot
+        save_sc_snapshot(snapshot_key, dirname, bootstrap_info, mc_blocks, number_of_sc_nodes)
+        pending_sc_snapshot = None
+
+
+def has_pending_sc_snapshot():
+    return pending_sc_snapshot is not None
+
+
 """
 Create a sidechain transaction inside a mainchain node.
 
@@ -628,7 +1001,8 @@ def create_sidechain(sc_creation_info):
                                     withdrawal_certificate_data.genSysConstant,
                                     withdrawal_certificate_data.verificationKey)
 
-    genesis_data = generate_genesis_data(genesis_info[0], genesis_account.secret, vrf_key.secret)
+    genesis_data = generate_genesis_data(genesis_info[0], genesis_account.secret, vrf_key.secret,
+                                         sc_creation_info.genesis_slots_rewind)
     sidechain_id = genesis_info[2]
 
     return SCBootstrapInfo(sidechain_id, genesis_account, sc_creation_info.forward_amount, genesis_info[1],
@@ -642,10 +1016,14 @@ Parameters:
  - n: sidechain node nth: used to create directory "sc_node_n"
  - bootstrap_info: an instance of SCBootstrapInfo (see sc_boostrap_info.py)
  - sc_node_configuration: an instance of SCNodeConfiguration (see sc_boostrap_info.py)
+ - max_connections: maximum number of p2p connections of the node
+ - peer_discovery: if False, the node does not ask its peers for other peers to connect to
  
 """
-def bootstrap_sidechain_node(dirname, n, bootstrap_info, sc_node_configuration):
-    initialize_sc_datadir(dirname, n, bootstrap_info, sc_node_configuration.mc_connection_info)
+def bootstrap_sidechain_node(dirname, n, bootstrap_info, sc_node_configuration,
+                             max_connections=DEFAULT_SC_MAX_CONNECTIONS, peer_discovery=True):
+    initialize_sc_datadir(dirname, n, bootstrap_info, sc_node_configuration.mc_connection_info, max_connections,
+                          peer_discovery)
 
 def generate_forging_request(epoch, slot):
     return json.dumps({"epochNumber": epoch, "slotNumber": slot})
@@ -687,4 +1065,44 @@ def generate_next_blocks(node, node_name, blocks_count):
     blocks_ids = []
     for i in range(blocks_count):
         blocks_ids.append(generate_next_block(node, node_name))
+    return blocks_ids
+
+
+"""
+Number of consensus slots between the best block of node and the current time. Blocks in later slots are rejected as
+blocks in the future and every block takes its own slot, so at most this number of blocks can be forged now.
+The genesis block is created genesis_slots_rewind slots in the past (see SCCreationInfo) and time adds a slot every
+consensusSecondsInSlot seconds.
+"""
+def get_forgeable_slots(node):
+    seconds_in_slot = node.block_forgingInfo()["result"]["consensusSecondsInSlot"]
+    best_block_timestamp = node.block_best()["result"]["block"]["header"]["timestamp"]
+    return int(time.time() - best_block_timestamp) // seconds_in_slot
+
+
+"""
+Forge blocks_count blocks with block/generateNext: the node forges many blocks per request and skips the slots without
+a leader on its side. It stops starting blocks once its API timeout is elapsed, well before the HTTP request timeout,
+so the requests are repeated until all the blocks are forged.
+Fail at once if the chain can not reach the height in the current time (see get_forgeable_slots).
+
+Output: the list of the ids of the forged blocks
+"""
+def generate_blocks_bulk(node, node_name, blocks_count):
+    forgeable_slots = get_forgeable_slots(node)
+    assert_true(blocks_count <= forgeable_slots,
+                "SC {0} can not forge {1} blocks now, only {2} slots are before the current time: "
+                "bootstrap it with a bigger genesis_slots_rewind (see SCCreationInfo)".format(
+                    node_name, blocks_count, forgeable_slots))
+    blocks_ids = []
+    while len(blocks_ids) < blocks_count:
+        forge_result = node.block_generateNext(number=blocks_count - len(blocks_ids))
+        assert_true(forge_result.has_key("result"), "Error during blocks generation for SC {0}: {1}".format(
+            node_name, json.dumps(forge_result.get("error"))))
+        blocks_ids.extend(forge_result["result"]["blockIds"])
+        error = forge_result["result"].get("error")
+        assert_true(error is None and len(forge_result["result"]["blockIds"]) > 0,
+                    "Error during blocks generation for SC {0} after {1} blocks: {2}".format(
+                        node_name, len(blocks_ids), json.dumps(error)))
+    print("Successfully forged {0} blocks, best block id {1}".format(len(blocks_ids), blocks_ids[-1] if blocks_ids else None))
     return blocks_ids
\ No newline at end of file
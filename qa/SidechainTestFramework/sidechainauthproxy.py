@@ -2,26 +2,47 @@ try:
     import http.client as httplib
 except ImportError:
     import httplib
+try:
+    import queue as Queue
+except ImportError:
+    import Queue
 import base64
-import decimal
+import itertools
 import json
 import logging
 import re
+import select
+import socket
+import threading
+import time
 try:
     import urllib.parse as urlparse
 except ImportError:
     import urlparse
 
+from test_framework.json_codec import DEFAULT_CODEC, LazyJSON
+from test_framework.json_stream import iter_json_array
+
 USER_AGENT = "SidechainAuthServiceProxy/0.1"
 
-HTTP_TIMEOUT = 6000000
+# Maximum time in seconds for a single request, override it with the timeout parameter for slower calls
+HTTP_TIMEOUT = 600
+
+# Maximum number of connections to a single SC node
+MAX_CONNECTIONS_PER_NODE = 16
+
+# Idle connections older than this are closed instead of being reused: the SC node API server
+# closes idle connections on its side after a while.
+MAX_IDLE_TIME = 30
+
+log = logging.getLogger("SidechainRPC")
 
 
 class SCAPIException(Exception):
     def __init__(self, sc_api_error):
         Exception.__init__(self)
         self.error = sc_api_error
-        
+
 """
    Adaption of AuthServiceProxy class from BTF for Scorex REST API. Differences are very minimal:
    1) Method names follows a path-like style. Therefore method names are passed to __call__ method with underscores
@@ -29,19 +50,98 @@ class SCAPIException(Exception):
    2) Auth header must be a string that hashes to the field "api-key-hash" specified in each SC node conf file. If
       no string is specified or authentication is disabled by default, this field could be omitted;
    3) In case of errors, instead of JSONRPCException we use SCAPIException
+   4) HTTP connections are taken from a pool shared by all the proxies to the same SC node (see ConnectionPool), so
+      a proxy can be used from many threads at the same time.
+   5) With raw_response=True calls return a LazyJSON (see json_codec.py) instead of the decoded response, e.g. for
+      load generators that only need to know that the request succeeded.
+   6) Big arrays in responses can be read one element at a time with stream(), e.g.
+      for box in sc_node.wallet_allBoxes.stream("result.boxes"): ...
 """
 
+
+class ConnectionPool(object):
+    """
+    Bounded pool of keep-alive HTTP connections to a single SC node.
+    A thread asking for a connection when all of them are in use waits until one is released.
+    Idle connections are checked before reuse: the ones closed by the node or idle for too long are replaced.
+    """
+
+    def __init__(self, scheme, host, port, max_connections=MAX_CONNECTIONS_PER_NODE):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.__idle = Queue.LifoQueue()
+        self.__slots = threading.BoundedSemaphore(max_connections)
+
+    def __new_connection(self, timeout):
+        if self.scheme == 'https':
+            return httplib.HTTPSConnection(self.host, self.port, None, None, False, timeout)
+        return httplib.HTTPConnection(self.host, self.port, False, timeout)
+
+    @staticmethod
+    def __is_alive(conn, last_used):
+        if conn.sock is None:
+            return True  # not connected yet, or closed after the last response: it will connect again
+        if time.time() - last_used > MAX_IDLE_TIME:
+            return False
+        # An idle connection must have nothing to read: readable means closed by the node (or garbage)
+        readable, _, _ = select.select([conn.sock], [], [], 0)
+        return len(readable) == 0
+
+    def acquire(self, timeout):
+        """
+        Return a pair (connection, reused): reused is True if the connection was already used for other requests.
+        """
+        self.__slots.acquire()
+        try:
+            while True:
+                try:
+                    conn, last_used = self.__idle.get_nowait()
+                except Queue.Empty:
+                    conn = self.__new_connection(timeout)
+                    return conn, False
+                if self.__is_alive(conn, last_used):
+                    conn.timeout = timeout
+                    if conn.sock is not None:
+                        conn.sock.settimeout(timeout)
+                    return conn, conn.sock is not None
+                conn.close()
+        except:
+            self.__slots.release()
+            raise
+
+    def release(self, conn, reusable=True):
+        if reusable:
+            self.__idle.put((conn, time.time()))
+        else:
+            conn.close()
+        self.__slots.release()
+
+
+connection_pools = {}
+connection_pools_lock = threading.Lock()
+
+
+def get_connection_pool(url):
+    port = 80 if url.port is None else url.port
+    key = (url.scheme, url.hostname, port)
+    with connection_pools_lock:
+        if key not in connection_pools:
+            connection_pools[key] = ConnectionPool(url.scheme, url.hostname, port)
+        return connection_pools[key]
+
+
 class SidechainAuthServiceProxy(object):
-    __id_count = 0
+    __id_count = itertools.count(1)
 
-    def __init__(self, service_url, service_name=None, timeout=HTTP_TIMEOUT, connection=None):
+    def __init__(self, service_url, service_name=None, timeout=HTTP_TIMEOUT, connection_pool=None, codec=None,
+                 raw_response=False):
         self.__service_url = service_url
         self.__service_name = service_name
+        self.__timeout = timeout
+        self.__codec = codec if codec is not None else DEFAULT_CODEC
+        self.__raw_response = raw_response
         self.__url = urlparse.urlparse(service_url)
-        if self.__url.port is None:
-            port = 80
-        else:
-            port = self.__url.port
         (user, passwd) = (self.__url.username, self.__url.password)
         try:
             user = user.encode('utf8')
@@ -55,16 +155,11 @@ class SidechainAuthServiceProxy(object):
         authpair = user + b':' + passwd
         self.__auth_header = b'Basic ' + base64.b64encode(authpair)
 
-        if connection:
-            # Callables re-use the connection of the original proxy
-            self.__conn = connection
-        elif self.__url.scheme == 'https':
-            self.__conn = httplib.HTTPSConnection(self.__url.hostname, port,
-                                                  None, None, False,
-                                                  timeout)
+        if connection_pool:
+            # Callables re-use the connection pool of the original proxy
+            self.__pool = connection_pool
         else:
-            self.__conn = httplib.HTTPConnection(self.__url.hostname, port,
-                                                 False, timeout)
+            self.__pool = get_connection_pool(self.__url)
 
     def __getattr__(self, name):
         if name.startswith('__') and name.endswith('__'):
@@ -72,38 +167,63 @@ class SidechainAuthServiceProxy(object):
             raise AttributeError
         if self.__service_name is not None:
             name = "%s.%s" % (self.__service_name, name)
-        return SidechainAuthServiceProxy(self.__service_url, name, connection=self.__conn)
+        return SidechainAuthServiceProxy(self.__service_url, name, self.__timeout, connection_pool=self.__pool,
+                                         codec=self.__codec, raw_response=self.__raw_response)
 
-    def _request(self, method, path, postdata):
-        '''
-        Do a HTTP request, with retry if we get disconnected (e.g. due to a timeout).
-        This is a workaround for https://bugs.python.org/issue3566 which is fixed in Python 3.5.
-        '''
-        
+    def __send(self, conn, reused, method, path, postdata):
         headers = {'Host': self.__url.hostname,
                    'User-Agent': USER_AGENT,
                    'Authorization': self.__auth_header,
                    'Content-type': 'application/json'}
+        sent = False
         try:
-            self.__conn.request(method, path, postdata, headers)
-            return self._get_response()
-        except Exception as e:
-            # If connection was closed, try again.
-            # Python 3.5+ raises BrokenPipeError instead of BadStatusLine when the connection was reset.
-            # ConnectionResetError happens on FreeBSD with Python 3.4.
-            # These classes don't exist in Python 2.x, so we can't refer to them directly.
-            if ((isinstance(e, httplib.BadStatusLine) and e.line == "''")
-                or e.__class__.__name__ in ('BrokenPipeError', 'ConnectionResetError')):
-                self.__conn.close()
-                self.__conn.request(method, path, postdata, headers)
-                return self._get_response()
-            else:
+            conn.request(method, path, postdata, headers)
+            sent = True
+            return conn.getresponse()
+        except (httplib.BadStatusLine, httplib.CannotSendRequest, socket.error) as e:
+            # If a kept alive connection was closed meanwhile, try again. Timeouts are not retried, nor POST
+            # requests already sent: the node may have processed them (e.g. transaction/sendTransaction).
+            if not reused or isinstance(e, socket.timeout) or (sent and method != 'GET'):
                 raise
+            conn.close()
+            conn.request(method, path, postdata, headers)
+            return conn.getresponse()
 
-    #For backward compatibility with pre-exisistent Hybrid App APIs, the method accept *args too. 
-    #In the new SC APIs there will be only **kwargs.
-    def __call__(self, *args, **kwargs):
-        SidechainAuthServiceProxy.__id_count += 1
+    def _request(self, method, path, postdata):
+        '''
+        Do a HTTP request on a pooled connection. If a reused connection turns out to be closed by the node before
+        the request is written (or before the response of a GET), the request is sent again on a new one.
+        '''
+        conn, reused = self.__pool.acquire(self.__timeout)
+        reusable = False
+        try:
+            response = self._get_response(self.__send(conn, reused, method, path, postdata))
+            reusable = True
+            return response
+        finally:
+            self.__pool.release(conn, reusable)
+
+    def stream(self, array_path, *args, **kwargs):
+        """
+        Call the API like __call__, but yield the elements of the array at array_path of the response (dot separated
+        keys, "*" for arrays, see json_stream.py) while they are received, instead of decoding the whole response.
+        The connection is held until the generator is exhausted or closed.
+        """
+        method, path, postdata = self.__prepare_request(args, kwargs)
+        conn, reused = self.__pool.acquire(self.__timeout)
+        reusable = False
+        try:
+            http_response = self.__send(conn, reused, method, path, postdata)
+            if http_response.status != 200:
+                raise SCAPIException(http_response.read().decode('utf8'))
+            for element in iter_json_array(http_response.read, array_path.split("."), self.__codec):
+                yield element
+            http_response.read()
+            reusable = True
+        finally:
+            self.__pool.release(conn, reusable)
+
+    def __prepare_request(self, args, kwargs):
         if re.match(r'^get', self.__service_name):
             method = 'GET'
             path = re.split(r'get_', self.__service_name, maxsplit=1)[1]
@@ -116,15 +236,23 @@ class SidechainAuthServiceProxy(object):
             postdata = args[0]
         if len(kwargs) > 0:
             postdata = json.dumps(kwargs)
+        return method, path, postdata
+
+    #For backward compatibility with pre-exisistent Hybrid App APIs, the method accept *args too.
+    #In the new SC APIs there will be only **kwargs.
+    def __call__(self, *args, **kwargs):
+        request_id = next(SidechainAuthServiceProxy.__id_count)
+        method, path, postdata = self.__prepare_request(args, kwargs)
+        log.debug("-%s-> %s %s" % (request_id, path, postdata))
         response = self._request(method, path, postdata)
         return response
 
-    def _get_response(self):
-        http_response = self.__conn.getresponse()
+    def _get_response(self, http_response):
         if http_response is None:
             raise SCAPIException("missing HTTP response from server")
-        responsedata = http_response.read().decode('utf8')
-        if http_response.status is not 200: #For the moment we check for errors in this way
-            raise SCAPIException(responsedata)
-        response = json.loads(responsedata, parse_float=decimal.Decimal)
-        return response
\ No newline at end of file
+        responsedata = http_response.read()
+        if http_response.status != 200: #For the moment we check for errors in this way
+            raise SCAPIException(responsedata.decode('utf8'))
+        if self.__raw_response:
+            return LazyJSON(responsedata, self.__codec)
+        return self.__codec.decode(responsedata)
@@ -3,7 +3,7 @@ import json
 from SidechainTestFramework.sc_boostrap_info import SCNodeConfiguration, SCCreationInfo, MCConnectionInfo, \
     SCNetworkConfiguration
 from SidechainTestFramework.sc_test_framework import SidechainTestFramework
-from test_framework.util import assert_equal, initialize_chain_clean, start_nodes, \
+from test_framework.util import assert_equal, initialize_sc_enabled_chain, start_nodes, \
     websocket_port_by_mc_node_index, connect_nodes_bi, assert_true, assert_false
 from SidechainTestFramework.scutil import check_box_balance, connect_sc_nodes, \
     bootstrap_sidechain_nodes, start_sc_nodes, is_mainchain_block_included_in_sc_block, generate_next_blocks, \
@@ -33,7 +33,7 @@ class MCSCConnectedNodes(SidechainTestFramework):
     sc_nodes_bootstrap_info=None
 
     def setup_chain(self):
-        initialize_chain_clean(self.options.tmpdir, self.number_of_mc_nodes)
+        initialize_sc_enabled_chain(self.options.tmpdir, self.number_of_mc_nodes)
 
     def setup_nodes(self):
         return start_nodes(self.number_of_mc_nodes, self.options.tmpdir)
@@ -80,9 +80,9 @@ class MCSCConnectedNodes(SidechainTestFramework):
         assert_equal(second_sc_node_best_block["height"], 1, "The best block has not the specified height.")
 
         sc_1_mc_block_inclusion = is_mainchain_block_included_in_sc_block(first_sc_node_best_block["block"],
-                                                              first_mainchain_node_block)
+                                                              first_mainchain_node_block, first_sidechain_node)
         sc_2_mc_block_inclusion = is_mainchain_block_included_in_sc_block(second_sc_node_best_block["block"],
-                                                              first_mainchain_node_block)
+                                                              first_mainchain_node_block, second_sidechain_node)
         assert_true(sc_1_mc_block_inclusion, "The mainchain block is not included for SC node 1.")
         assert_true(sc_2_mc_block_inclusion, "The mainchain block is not included for SC node 2.")
 
@@ -114,12 +114,14 @@ class MCSCConnectedNodes(SidechainTestFramework):
         assert_equal(first_sc_node_best_block["height"], 2, "The best block has not the specified height.")
 
         sc_1_mc_block_inclusion = is_mainchain_block_included_in_sc_block(first_sc_node_best_block["block"],
-                                                                               first_mainchain_node_new_block)
+                                                                               first_mainchain_node_new_block,
+                                                                               first_sidechain_node)
         assert_true(sc_1_mc_block_inclusion, "The mainchain block is not included for SC node 1.")
 
         # verify the mc block is NOT included inside SC node 2
         sc_2_mc_block_inclusion = is_mainchain_block_included_in_sc_block(second_sc_node_best_block["block"],
-                                                                          first_mainchain_node_new_block)
+                                                                          first_mainchain_node_new_block,
+                                                                          second_sidechain_node)
         assert_false(sc_2_mc_block_inclusion, "The mainchain block is included for SC node 2.")
 
         first_sc_mc_best_block_ref_info = first_sidechain_node.mainchain_bestBlockReferenceInfo()["result"]
@@ -143,7 +145,8 @@ class MCSCConnectedNodes(SidechainTestFramework):
 
         # verify the block is included inside SC node 2
         second_sc_node_best_block = second_sidechain_node.block_best()["result"]
-        sc_2_mc_block_inclusion = is_mainchain_block_included_in_sc_block(second_sc_node_best_block["block"], first_mainchain_node_new_block)
+        sc_2_mc_block_inclusion = is_mainchain_block_included_in_sc_block(second_sc_node_best_block["block"], first_mainchain_node_new_block,
+                                                                          second_sidechain_node)
         assert_true(sc_2_mc_block_inclusion, "The mainchain block is not included for SC node 2.")
 
 
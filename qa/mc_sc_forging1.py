@@ -3,10 +3,12 @@
 from SidechainTestFramework.sc_test_framework import SidechainTestFramework
 from SidechainTestFramework.sc_boostrap_info import SCNodeConfiguration, SCCreationInfo, MCConnectionInfo, \
     SCNetworkConfiguration
-from test_framework.util import initialize_chain_clean, start_nodes, \
-    websocket_port_by_mc_node_index, connect_nodes_bi, disconnect_nodes_bi
+from test_framework.util import initialize_sc_enabled_chain, start_nodes, \
+    websocket_port_by_mc_node_index, connect_nodes_bi, disconnect_nodes_bi, assert_false
 from SidechainTestFramework.scutil import bootstrap_sidechain_nodes, start_sc_nodes, generate_next_blocks
 from SidechainTestFramework.sc_forging_util import *
+from SidechainTestFramework.sc_chain_index import get_sc_chain_index
+from test_framework.mc_event_listener import wait_for_mc_block
 
 """
 Check Latus forger behavior for:
@@ -34,6 +36,7 @@ Test:
     - Forge one more SC block, verify that there is no MC data, no ommers.
     - Mine 6 Mc block in MC node 3. Connect and synchronize MC node 1 and 3.
     - Forge SC block, verify that previously forged blocks were set as ommers, verify MC data inclusion.
+    - After the forks, verify that the chain index of the SC node (sc_chain_index.py) dropped the orphaned blocks.
     
     MC blocks on MC node 1 in the end:
     220     -   221
@@ -58,7 +61,7 @@ class MCSCForging1(SidechainTestFramework):
     number_of_sidechain_nodes = 1
 
     def setup_chain(self):
-        initialize_chain_clean(self.options.tmpdir, self.number_of_mc_nodes)
+        initialize_sc_enabled_chain(self.options.tmpdir, self.number_of_mc_nodes)
 
     def setup_network(self, split = False):
         # Setup nodes and connect them
@@ -117,6 +120,10 @@ class MCSCForging1(SidechainTestFramework):
         check_mcreferencedata_amount(1, scblock_id1, sc_node1)
         check_mcreference_presence(mcblock_hash1, scblock_id1, sc_node1)
         check_ommers_amount(0, scblock_id1, sc_node1)
+        chain_index = get_sc_chain_index(sc_node1)
+        chain_index.update()
+        assert_equal(scblock_id1, chain_index.block_id_at(chain_index.height))
+        assert_equal(scblock_id1, chain_index.block_of_mc_header(mcblock_hash1))
 
 
         # Test 3: Generate SC block, when new MC blocks following different Tip appear. Ommers expected.
@@ -124,9 +131,10 @@ class MCSCForging1(SidechainTestFramework):
         fork_mcblock_hash1 = mc_node2.generate(1)[0]
         fork_mcblock_hash2 = mc_node2.generate(1)[0]
 
-        # Connect and synchronize MC node 1 to MC node 2
+        # Connect and synchronize MC node 1 to MC node 2: wait for the tip change event of the fork on MC node 1
         connect_nodes_bi(self.nodes, 0, 1)
-        self.sync_nodes([mc_node1, mc_node2])
+        assert_equal(fork_mcblock_hash2, wait_for_mc_block(0, fork_mcblock_hash2, timeout=60),
+                     "MC node 1 did not switch to the fork of MC node 2")
         # MC Node 1 should replace mcblock_hash1 Tip with [fork_mcblock_hash1, fork_mcblock_hash2]
         assert_equal(fork_mcblock_hash2, mc_node1.getbestblockhash())
 
@@ -142,6 +150,13 @@ class MCSCForging1(SidechainTestFramework):
         check_ommers_amount(1, scblock_id2, sc_node1)
         check_ommers_cumulative_score(1, scblock_id2, sc_node1)
         check_ommer(scblock_id1, [mcblock_hash1], scblock_id2, sc_node1)
+        # Verify that the chain index replaced the orphaned SC block with its ommer container
+        chain_index.update()
+        assert_equal(scblock_id2, chain_index.block_id_at(chain_index.height))
+        assert_false(chain_index.contains_block(scblock_id1))
+        assert_equal(None, chain_index.block_of_mc_header(mcblock_hash1))
+        assert_equal(scblock_id2, chain_index.block_of_mc_header(fork_mcblock_hash1))
+        assert_equal(scblock_id2, chain_index.block_of_ommer(scblock_id1))
 
 
         # Test 4: Generate SC block, when new MC blocks following the same Tip appear + 2 previous RefData expecting to be synchronized.
@@ -206,6 +221,16 @@ class MCSCForging1(SidechainTestFramework):
         for ommer_id in expected_ommers_ids:
             check_ommer(ommer_id, [], scblock_id6, sc_node1)
         check_subommer(scblock_id2, scblock_id1, [mcblock_hash1], scblock_id6, sc_node1)
+        # Verify that the chain index dropped the 4 orphaned SC blocks and indexed the ommers at every level
+        chain_index.update()
+        assert_equal(scblock_id6, chain_index.block_id_at(chain_index.height))
+        assert_equal(scblock_id0, chain_index.block_id_at(chain_index.height - 1))
+        for ommer_id in expected_ommers_ids + [scblock_id1]:
+            assert_false(chain_index.contains_block(ommer_id))
+            assert_equal(scblock_id6, chain_index.block_of_ommer(ommer_id))
+        assert_equal(None, chain_index.block_of_mc_reference_data(fork_mcblock_hash1))
+        for mchash in another_fork_mcblocks_hashes:
+            assert_equal(scblock_id6, chain_index.block_of_mc_header(mchash))
 
 
 if __name__ == "__main__":
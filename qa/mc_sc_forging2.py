@@ -3,7 +3,7 @@
 from SidechainTestFramework.sc_test_framework import SidechainTestFramework
 from SidechainTestFramework.sc_boostrap_info import SCNodeConfiguration, SCCreationInfo, MCConnectionInfo, \
     SCNetworkConfiguration
-from test_framework.util import initialize_chain_clean, start_nodes, \
+from test_framework.util import initialize_sc_enabled_chain, start_nodes, \
     websocket_port_by_mc_node_index, connect_nodes_bi, disconnect_nodes_bi
 from SidechainTestFramework.scutil import bootstrap_sidechain_nodes, start_sc_nodes, generate_next_blocks
 from SidechainTestFramework.sc_forging_util import *
@@ -45,7 +45,7 @@ class MCSCForging2(SidechainTestFramework):
     number_of_sidechain_nodes = 1
 
     def setup_chain(self):
-        initialize_chain_clean(self.options.tmpdir, self.number_of_mc_nodes)
+        initialize_sc_enabled_chain(self.options.tmpdir, self.number_of_mc_nodes)
 
     def setup_network(self, split = False):
         # Setup nodes and connect them
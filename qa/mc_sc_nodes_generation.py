@@ -3,6 +3,7 @@ from SidechainTestFramework.sc_test_framework import SidechainTestFramework
 from test_framework.util import assert_equal, assert_true, initialize_chain_clean, start_nodes, connect_nodes_bi, sync_mempools, sync_blocks
 from SidechainTestFramework.scutil import initialize_default_sc_chain_clean, start_sc_nodes, connect_sc_nodes, sync_sc_mempools, sync_sc_blocks, \
                                           wait_for_next_sc_blocks
+from SidechainTestFramework.sc_chain_index import get_sc_chain_index
 import json
 import random
 import shutil
@@ -68,10 +69,10 @@ class MainchainSidechainNodeBlockGenerationTest(SidechainTestFramework):
         assert_true(txid in block["tx"], "Transaction {0} not included in the new block for MC {1}".format(txid, nodename))
         
     def check_tx_in_sc_block(self, node, nodename, txid):
-        tx_list = []
-        for tx in node.debug_info()["bestBlock"]["transactions"]:
-            tx_list.append(tx["id"])
-        assert_true(txid in tx_list, "Transaction {0} not included in the new block for SC {1}".format(str(txid), nodename))
+        chain_index = get_sc_chain_index(node)
+        chain_index.update()
+        assert_true(chain_index.block_of_transaction(txid) == chain_index.block_id_at(chain_index.height),
+                    "Transaction {0} not included in the new block for SC {1}".format(str(txid), nodename))
     
     def check_tx_in_mc_mempool(self, node, nodename, txid):
             assert_true(txid in node.getrawmempool(), "Transaction {0} not in mempool for MC {1}".format(txid, nodename))
@@ -1,54 +1,118 @@
 #!/usr/bin/env python2
+import os
 import sys
-from test_framework.util import assert_equal
-from mc_node_alive import MCNodeAlive
-from mc_sc_connected_nodes import MCSCConnectedNodes
-from mc_sc_forging1 import MCSCForging1
-from mc_sc_forging2 import MCSCForging2
-from mc_sc_forging3 import MCSCForging3
-from mc_sc_nodes_alive import MCSCNodesAlive
-from mc_sc_nodes_generation import MainchainSidechainNodeBlockGenerationTest
-from sc_backward_transfer import SCBackwardTransfer
-from sc_bootstrap import SCBootstrap
-from sc_forward_transfer import SCForwardTransfer
-
-def run_test(test):
-    try:
-        print("----> Running test - " + str(test.__class__))
-        test.main()
-    except SystemExit as e:
-        return e.code
-    return 0
+import subprocess
+import time
+import optparse
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+
+"""
+Run the STF test suite.
+
+Every test script is executed in its own process by a pool of workers. Each worker has:
+    - its own root directory for datadirs: <tmpdir>/<test name>
+    - its own port range, leased by the test process itself (see test_framework/port_lease.py)
+    - its own log file: <logdir>/<test name>.log
+
+At the end a combined report with pass/fail status and wall-clock time of every test is printed
+and written to sc_test.log.
+"""
+
+TESTS = [
+    "mc_node_alive.py",
+    "mc_sc_connected_nodes.py",
+    "mc_sc_forging1.py",
+    "mc_sc_forging2.py",
+    "mc_sc_forging3.py",
+    "mc_sc_nodes_alive.py",
+    "sc_backward_transfer.py",
+    "sc_bootstrap.py",
+    "sc_bulk_forging.py",
+    "sc_forward_transfer.py",
+    "sc_network_topology.py",
+]
+
+
+class TestResult(object):
 
-def run_tests(log_file):
-    sys.stdout = log_file
-    result = run_test(MCNodeAlive())
-    assert_equal(0, result, "mc_node_alive test failed!")
+    def __init__(self, test, return_code, duration, log_path):
+        self.test = test
+        self.return_code = return_code
+        self.duration = duration
+        self.log_path = log_path
 
-    result = run_test(MCSCConnectedNodes())
-    assert_equal(0, result, "mc_node_alive test failed!")
+    def passed(self):
+        return self.return_code == 0
 
-    result = run_test(MCSCForging1())
-    assert_equal(0, result, "mc_sc_forging1 test failed!")
 
-    result = run_test(MCSCForging2())
-    assert_equal(0, result, "mc_sc_forging2 test failed!")
+def run_test(test, options):
+    """
+    Run a single test script in a separate process.
+    """
+    test_name = os.path.splitext(test)[0]
+    tmpdir = os.path.join(options.tmpdir, test_name)
+    log_path = os.path.join(options.logdir, test_name + ".log")
+    args = [sys.executable, test, "--tmpdir=" + tmpdir] + options.test_args
+    start = time.time()
+    with open(log_path, "w") as log_file:
+        return_code = subprocess.call(args, stdout=log_file, stderr=subprocess.STDOUT)
+    result = TestResult(test, return_code, time.time() - start, log_path)
+    print("{0} {1} ({2:.1f}s)".format("PASSED" if result.passed() else "FAILED", test, result.duration))
+    sys.stdout.flush()
+    return result
 
-    result = run_test(MCSCForging3())
-    assert_equal(0, result, "mc_sc_forging3 test failed!")
 
-    result = run_test(MCSCNodesAlive())
-    assert_equal(0, result, "mc_sc_nodes_alive test failed!")
+def run_tests(tests, options):
+    jobs = max(1, min(options.jobs, len(tests)))
 
-    result = run_test(SCBackwardTransfer())
-    assert_equal(0, result, "sc_backward_transfer test failed!")
+    if not os.path.isdir(options.logdir):
+        os.makedirs(options.logdir)
+
+    print("Running {0} tests with {1} workers".format(len(tests), jobs))
+    pool = ThreadPool(jobs)
+    start = time.time()
+    try:
+        results = pool.map(lambda test: run_test(test, options), tests)
+    finally:
+        pool.close()
+        pool.join()
+    return results, time.time() - start
 
-    result = run_test(SCBootstrap())
-    assert_equal(0, result, "sc_bootstrap test failed!")
 
-    result = run_test(SCForwardTransfer())
-    assert_equal(0, result, "sc_forward_transfer test failed!")
+def write_report(results, wall_clock, out):
+    out.write("{0:<32} {1:<8} {2:>10}\n".format("Test", "Status", "Time (s)"))
+    for result in results:
+        out.write("{0:<32} {1:<8} {2:>10.1f}\n".format(result.test, "PASSED" if result.passed() else "FAILED",
+                                                       result.duration))
+    failed = [result for result in results if not result.passed()]
+    out.write("\n{0} passed, {1} failed\n".format(len(results) - len(failed), len(failed)))
+    out.write("Wall-clock time: {0:.1f}s, sum of test times: {1:.1f}s\n".format(
+        wall_clock, sum(result.duration for result in results)))
+    for result in failed:
+        out.write("See {0} for the output of failed test {1}\n".format(result.log_path, result.test))
+
 
 if __name__ == "__main__":
-    log_file = open("sc_test.log", "w")
-    run_tests(log_file)
+    parser = optparse.OptionParser(usage="%prog [options] [test.py ...] [-- <arguments for every test>]")
+    parser.add_option("--jobs", "-j", dest="jobs", type="int", default=cpu_count(),
+                      help="Number of tests to run at the same time (default: %default)")
+    parser.add_option("--tmpdir", dest="tmpdir", default="../examples/simpleapp/target/tmp",
+                      help="Root directory for the datadirs of every test (default: %default)")
+    parser.add_option("--logdir", dest="logdir", default="sc_test_logs",
+                      help="Directory for the log files of every test (default: %default)")
+    (options, args) = parser.parse_args()
+
+    options.test_args = []
+    if "--" in sys.argv:
+        options.test_args = sys.argv[sys.argv.index("--") + 1:]
+        args = args[:len(args) - len(options.test_args)]
+
+    tests = args if len(args) > 0 else TESTS
+    results, wall_clock = run_tests(tests, options)
+
+    write_report(results, wall_clock, sys.stdout)
+    with open("sc_test.log", "w") as report_file:
+        write_report(results, wall_clock, report_file)
+
+    sys.exit(0 if all(result.passed() for result in results) else 1)
@@ -8,6 +8,7 @@ from SidechainTestFramework.sc_boostrap_info import SCNodeConfiguration, SCCreat
 from SidechainTestFramework.sc_test_framework import SidechainTestFramework
 from test_framework.util import fail, assert_equal, assert_true, start_nodes, \
     websocket_port_by_mc_node_index
+from test_framework.mc_event_listener import wait_for_certificate
 from SidechainTestFramework.scutil import bootstrap_sidechain_nodes, \
     start_sc_nodes, check_box_balance, check_wallet_balance, generate_next_blocks
 from SidechainTestFramework.sc_forging_util import *
@@ -106,12 +107,8 @@ class SCBackwardTransfer(SidechainTestFramework):
         check_mcreference_presence(we1_1_mcblock_hash, scblock_id3, sc_node)
 
         # Wait until Certificate will appear in MC node mempool
-        attempts = 20
-        while mc_node.getmempoolinfo()["size"] == 0 and attempts > 0:
-            print("Wait for certificate in mc mempool...")
-            time.sleep(10)
-            attempts -= 1
-            sc_node.block_best() # just a ping to SC node. For some reason, STF can't request SC node API after a while idle.
+        print("Wait for certificate in mc mempool...")
+        wait_for_certificate(mc_node, timeout=200)
         assert_equal(1, mc_node.getmempoolinfo()["size"], "Certificate was not added to Mc node mmepool.")
 
         # Get Certificate for Withdrawal epoch 0 and verify it
@@ -204,12 +201,8 @@ class SCBackwardTransfer(SidechainTestFramework):
         check_mcreference_presence(we2_1_mcblock_hash, we2_1_scblock_id, sc_node)
 
         # Wait until Certificate will appear in MC node mempool
-        attempts = 20
-        while mc_node.getmempoolinfo()["size"] == 0 and attempts > 0:
-            print("Wait for certificate in mc mempool...")
-            time.sleep(10)
-            attempts -= 1
-            sc_node.block_best()  # just a ping to SC node. For some reason, STF can't request SC node API after a while idle.
+        print("Wait for certificate in mc mempool...")
+        wait_for_certificate(mc_node, timeout=200)
         assert_equal(1, mc_node.getmempoolinfo()["size"], "Certificate was not added to Mc node mmepool.")
 
         # Get Certificate for Withdrawal epoch 1 and verify it
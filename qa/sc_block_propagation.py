@@ -0,0 +1,75 @@
+#!/usr/bin/env python2
+from SidechainTestFramework.sc_test_framework import SidechainTestFramework
+from SidechainTestFramework.sc_boostrap_info import SCNodeConfiguration, SCCreationInfo, MCConnectionInfo, \
+    SCNetworkConfiguration, SCNetworkTopology
+from test_framework.util import assert_equal, start_nodes, websocket_port_by_mc_node_index
+from SidechainTestFramework.scutil import bootstrap_sidechain_nodes, start_sc_nodes, connect_sc_nodes_topology
+from SidechainTestFramework.sc_propagation import PropagationStats, measure_block_propagation, \
+    DEFAULT_SAMPLED_NODES
+
+"""
+Benchmark: block propagation delays in a SC network (not part of the regression tests in run_sc_tests.py).
+
+Configuration:
+    Start 1 MC node and --scnodes SC nodes connected to it.
+    Connect the SC nodes with the --topology of SCNetworkTopology.
+
+Run:
+    Forge --blocks blocks on the first SC node (the only one with forging stake), one at a time, and record when each
+    block reaches a sample of --samplednodes nodes, polled every 10ms (see sc_propagation.py). The connected peers of
+    every node are checked against the topology before each block. Print the delay percentiles over the sampled nodes,
+    for the last sampled node reached and by hop distance from the first node, and the request rate of the tip polls:
+    a larger sample measures more nodes per block but loads the network more.
+
+Example:
+    python sc_block_propagation.py --scnodes=30 --topology=random_regular --degree=4 --blocks=50
+"""
+class SCBlockPropagation(SidechainTestFramework):
+
+    sc_network = None
+    sc_edges = None
+
+    def add_options(self, parser):
+        parser.add_option("--scnodes", dest="scnodes", type="int", default=10,
+                          help="Number of SC nodes")
+        parser.add_option("--topology", dest="topology", default=SCNetworkTopology.RING,
+                          help="star, ring, mesh or random_regular")
+        parser.add_option("--degree", dest="degree", type="int", default=3,
+                          help="Connections of each node of the random_regular topology")
+        parser.add_option("--blocks", dest="blocks", type="int", default=20,
+                          help="Number of measured blocks")
+        parser.add_option("--samplednodes", dest="samplednodes", type="int", default=DEFAULT_SAMPLED_NODES,
+                          help="Number of nodes polled for each block, the first node included")
+
+    def setup_nodes(self):
+        return start_nodes(1, self.options.tmpdir)
+
+    def sc_setup_chain(self):
+        mc_node = self.nodes[0]
+        sc_nodes_configuration = [SCNodeConfiguration(
+            MCConnectionInfo(address="ws://{0}:{1}".format(mc_node.hostname, websocket_port_by_mc_node_index(0))))
+            for _ in range(self.options.scnodes)]
+        topology = SCNetworkTopology(self.options.topology, degree=self.options.degree)
+        self.sc_network = SCNetworkConfiguration(SCCreationInfo(mc_node, 100, 1000), *sc_nodes_configuration,
+                                                 topology=topology)
+        bootstrap_sidechain_nodes(self.options.tmpdir, self.sc_network)
+
+    def sc_setup_network(self, split=False):
+        self.sc_nodes = self.sc_setup_nodes()
+        self.sc_edges = connect_sc_nodes_topology(self.sc_nodes, self.sc_network.topology)
+        self.sc_sync_all()
+
+    def sc_setup_nodes(self):
+        return start_sc_nodes(self.options.scnodes, self.options.tmpdir)
+
+    def run_test(self):
+        stats = PropagationStats()
+        for i in range(self.options.blocks):
+            measure_block_propagation(self.sc_nodes, 0, stats, self.sc_edges, sampled_nodes=self.options.samplednodes)
+        assert_equal(self.options.blocks, len(stats.blocks), "Unexpected number of measured blocks")
+        print("Block propagation in {0} SC nodes, {1} topology:".format(self.options.scnodes, self.options.topology))
+        print(stats.report())
+
+
+if __name__ == "__main__":
+    SCBlockPropagation().main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python2
+
+from SidechainTestFramework.sc_test_framework import SidechainTestFramework
+from SidechainTestFramework.sc_boostrap_info import SCNodeConfiguration, SCCreationInfo, MCConnectionInfo, \
+    SCNetworkConfiguration
+from test_framework.util import assert_equal, assert_true, assert_raises, start_nodes, \
+    websocket_port_by_mc_node_index
+from SidechainTestFramework.scutil import bootstrap_sidechain_nodes, start_sc_nodes, generate_blocks_bulk, \
+    get_forgeable_slots
+
+"""
+Check bulk forging with block/generateNext beyond the default window of half a consensus epoch (360 slots in regtest).
+
+Configuration:
+    Start 1 MC node and 1 SC node connected to it.
+    The SC genesis block is created GENESIS_SLOTS_REWIND consensus slots in the past.
+
+Test:
+    - Forge BLOCKS_COUNT blocks, more than half a consensus epoch, and verify the SC chain height and best block.
+    - Verify that forging more blocks than the slots before the current time fails without forging anything.
+"""
+
+GENESIS_SLOTS_REWIND = 1000
+BLOCKS_COUNT = 500
+
+
+class SCBulkForging(SidechainTestFramework):
+
+    number_of_mc_nodes = 1
+    number_of_sidechain_nodes = 1
+
+    def setup_nodes(self):
+        return start_nodes(self.number_of_mc_nodes, self.options.tmpdir)
+
+    def sc_setup_chain(self):
+        mc_node = self.nodes[0]
+        sc_node_configuration = SCNodeConfiguration(
+            MCConnectionInfo(address="ws://{0}:{1}".format(mc_node.hostname, websocket_port_by_mc_node_index(0)))
+        )
+        network = SCNetworkConfiguration(SCCreationInfo(mc_node, 100, 1000, GENESIS_SLOTS_REWIND),
+                                         sc_node_configuration)
+        bootstrap_sidechain_nodes(self.options.tmpdir, network)
+
+    def sc_setup_nodes(self):
+        return start_sc_nodes(self.number_of_sidechain_nodes, self.options.tmpdir)
+
+    def run_test(self):
+        sc_node = self.sc_nodes[0]
+        forgeable_slots = get_forgeable_slots(sc_node)
+        assert_true(forgeable_slots >= GENESIS_SLOTS_REWIND,
+                    "Genesis block created {0} slots in the past instead of {1}".format(forgeable_slots,
+                                                                                        GENESIS_SLOTS_REWIND))
+
+        blocks_ids = generate_blocks_bulk(sc_node, "first node", BLOCKS_COUNT)
+        assert_equal(BLOCKS_COUNT, len(blocks_ids))
+        assert_equal(len(set(blocks_ids)), len(blocks_ids), "Block ids forged more than once")
+        best = sc_node.block_best()["result"]
+        assert_equal(BLOCKS_COUNT + 1, best["height"])
+        assert_equal(blocks_ids[-1], best["block"]["id"])
+        assert_equal(blocks_ids[0], sc_node.block_findIdByHeight(height=2)["result"]["blockId"])
+
+        forgeable_slots = get_forgeable_slots(sc_node)
+        assert_raises(AssertionError, generate_blocks_bulk, sc_node, "first node", forgeable_slots + 1)
+        assert_equal(BLOCKS_COUNT + 1, sc_node.block_best()["result"]["height"])
+
+
+if __name__ == "__main__":
+    SCBulkForging().main()
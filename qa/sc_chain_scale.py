@@ -0,0 +1,109 @@
+#!/usr/bin/env python2
+import json
+import os
+
+from SidechainTestFramework.sc_test_framework import SidechainTestFramework
+from SidechainTestFramework.sc_boostrap_info import SCNodeConfiguration, SCCreationInfo, MCConnectionInfo, \
+    SCNetworkConfiguration
+from test_framework.util import assert_equal, assert_true, start_nodes, websocket_port_by_mc_node_index
+from SidechainTestFramework.scutil import bootstrap_sidechain_nodes, start_sc_nodes, generate_blocks_bulk, \
+    get_forgeable_slots
+from SidechainTestFramework.sc_scale_metrics import collect_chain_metrics, format_chain_metrics
+
+"""
+Scale scenario: costs of a SC node as its chain grows (not part of the regression tests in run_sc_tests.py).
+
+Configuration: 1 MC node and 1 SC node connected to it. The SC genesis block is created enough consensus slots in
+the past to forge blocks up to the highest checkpoint (one block per slot, blocks in the future are rejected).
+
+Run:
+    - grow the SC chain up to each height of --checkpoints with block/generateNext, mining a MC block every
+      --mcrefinterval SC blocks, so the chain contains MC references
+    - at each checkpoint measure the latency of block/best and block/findById, the RSS of the SC node and the size of
+      its blockchain directory (see sc_scale_metrics.py)
+    - print the cost against the chain height, and the storage used per block between checkpoints: a value growing
+      with the height means superlinear storage growth. The measures are saved as JSON in --output.
+
+Note: every withdrawal epoch (1000 MC blocks) the SC node creates a certificate, which takes a while: keep
+height / mcrefinterval low to stay in the first epochs.
+
+Example:
+    python sc_chain_scale.py --checkpoints=1000,10000,100000 --mcrefinterval=100
+"""
+
+
+class SCChainScale(SidechainTestFramework):
+
+    def add_options(self, parser):
+        parser.add_option("--checkpoints", dest="checkpoints", default="100,1000,10000",
+                          help="Comma separated list of SC chain heights where the costs are measured")
+        parser.add_option("--mcrefinterval", dest="mcrefinterval", type="int", default=20,
+                          help="Number of SC blocks forged for each MC block")
+        parser.add_option("--samples", dest="samples", type="int", default=50,
+                          help="Number of requests of each API latency measure")
+        parser.add_option("--output", dest="output", default="chain_scale.json",
+                          help="JSON file of the measures (tmpdir is removed at the end of the run)")
+
+    def setup_nodes(self):
+        return start_nodes(1, self.options.tmpdir)
+
+    def sc_setup_chain(self):
+        mc_node = self.nodes[0]
+        sc_node_configuration = SCNodeConfiguration(
+            MCConnectionInfo(address="ws://{0}:{1}".format(mc_node.hostname, websocket_port_by_mc_node_index(0)))
+        )
+        network = SCNetworkConfiguration(SCCreationInfo(mc_node, 100, 1000, max(self.get_checkpoints())),
+                                         sc_node_configuration)
+        bootstrap_sidechain_nodes(self.options.tmpdir, network)
+
+    def sc_setup_nodes(self):
+        return start_sc_nodes(1, self.options.tmpdir)
+
+    def grow_chain(self, height):
+        mc_node = self.nodes[0]
+        sc_node = self.sc_nodes[0]
+        current_height = sc_node.block_best()["result"]["height"]
+        while current_height < height:
+            mc_node.generate(1)
+            blocks_count = min(self.options.mcrefinterval, height - current_height)
+            generate_blocks_bulk(sc_node, "first node", blocks_count)
+            current_height += blocks_count
+        assert_equal(height, sc_node.block_best()["result"]["height"], "Unexpected SC chain height")
+
+    def get_checkpoints(self):
+        return sorted(set(int(height) for height in self.options.checkpoints.split(",")))
+
+    def run_test(self):
+        sc_node = self.sc_nodes[0]
+        output = os.path.abspath(self.options.output)
+        checkpoints = self.get_checkpoints()
+
+        blocks_count = checkpoints[-1] - sc_node.block_best()["result"]["height"]
+        forgeable_slots = get_forgeable_slots(sc_node)
+        assert_true(blocks_count <= forgeable_slots,
+                    "Checkpoint {0} is beyond the forgeable window: {1} blocks to forge, only {2} slots before the "
+                    "current time".format(checkpoints[-1], blocks_count, forgeable_slots))
+
+        measures = []
+        for height in checkpoints:
+            self.grow_chain(height)
+            metrics = collect_chain_metrics(sc_node, 0, self.options.tmpdir, self.options.samples)
+            measures.append(metrics)
+            print(format_chain_metrics(metrics))
+            with open(output, "w") as output_file:
+                json.dump(measures, output_file, indent=4)
+
+        print("Cost against SC chain height (measures saved in {0}):".format(output))
+        previous = None
+        for metrics in measures:
+            line = format_chain_metrics(metrics)
+            if previous is not None:
+                line += ", {0:.0f} bytes/block since height {1}".format(
+                    (metrics["blockchain_size"] - previous["blockchain_size"]) /
+                    float(metrics["height"] - previous["height"]), previous["height"])
+            print(line)
+            previous = metrics
+
+
+if __name__ == "__main__":
+    SCChainScale().main()
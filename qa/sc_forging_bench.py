@@ -0,0 +1,120 @@
+#!/usr/bin/env python2
+from SidechainTestFramework.sc_test_framework import SidechainTestFramework
+from SidechainTestFramework.sc_boostrap_info import SCNodeConfiguration, SCCreationInfo, MCConnectionInfo, \
+    SCNetworkConfiguration
+from test_framework.util import assert_equal, initialize_sc_enabled_chain, start_nodes, \
+    websocket_port_by_mc_node_index, connect_nodes_bi, disconnect_nodes_bi
+from SidechainTestFramework.scutil import bootstrap_sidechain_nodes, start_sc_nodes, generate_next_block
+from SidechainTestFramework.sc_load_generator import prepare_load_transactions
+from SidechainTestFramework.sc_forging_benchmark import ForgingMeasure, forge_next_block_timed, fill_mempool
+from SidechainTestFramework.sc_forging_util import check_ommers_amount
+
+"""
+Benchmark: forging latency of a SC node (not part of the regression tests in run_sc_tests.py).
+
+Configuration: 2 MC nodes connected together, 1 SC node connected to the first MC node.
+
+Run: --blocks blocks are forged and measured for each scenario
+    - mempool: before each block, the mempool is filled with N transactions (for each N of --mempoolsizes)
+    - mc refs: before each block, N MC blocks are mined (for each N of --mcrefs)
+    - ommers: before each block, the MC nodes are split, N SC blocks are forged on top of MC blocks of the first
+      node, then the second MC node mines a longer chain and the nodes are joined again (for each N of --ommers).
+      The measured block contains N ommers and N + 1 MC headers.
+    The forging latency percentiles and blocks per second of each scenario are printed at the end.
+
+Example:
+    python sc_forging_bench.py --blocks=20 --mempoolsizes=0,100,1000 --mcrefs=1,10 --ommers=1,5
+"""
+
+
+def parse_int_list(value):
+    return [int(item) for item in value.split(",") if item != ""]
+
+
+class SCForgingBenchmark(SidechainTestFramework):
+
+    number_of_mc_nodes = 2
+
+    def add_options(self, parser):
+        parser.add_option("--blocks", dest="blocks", type="int", default=10,
+                          help="Number of measured blocks of each scenario")
+        parser.add_option("--mempoolsizes", dest="mempoolsizes", default="0,100,500",
+                          help="Comma separated list of mempool sizes")
+        parser.add_option("--mcrefs", dest="mcrefs", default="1,5",
+                          help="Comma separated list of MC blocks referenced by each SC block")
+        parser.add_option("--ommers", dest="ommers", default="1,3",
+                          help="Comma separated list of ommers included in each SC block")
+
+    def setup_chain(self):
+        initialize_sc_enabled_chain(self.options.tmpdir, self.number_of_mc_nodes)
+
+    def setup_network(self, split=False):
+        self.nodes = self.setup_nodes()
+        connect_nodes_bi(self.nodes, 0, 1)
+        self.sync_all()
+
+    def setup_nodes(self):
+        return start_nodes(self.number_of_mc_nodes, self.options.tmpdir)
+
+    def sc_setup_chain(self):
+        mc_node = self.nodes[0]
+        sc_node_configuration = SCNodeConfiguration(
+            MCConnectionInfo(address="ws://{0}:{1}".format(mc_node.hostname, websocket_port_by_mc_node_index(0)))
+        )
+        network = SCNetworkConfiguration(SCCreationInfo(mc_node, 600, 1000), sc_node_configuration)
+        bootstrap_sidechain_nodes(self.options.tmpdir, network)
+
+    def sc_setup_nodes(self):
+        return start_sc_nodes(1, self.options.tmpdir)
+
+    def measure_mempool(self, mempool_size):
+        sc_node = self.sc_nodes[0]
+        transactions = prepare_load_transactions(sc_node, mempool_size * self.options.blocks)
+        measure = ForgingMeasure("mempool {0}".format(mempool_size))
+        for i in range(self.options.blocks):
+            fill_mempool(sc_node, transactions[i * mempool_size:(i + 1) * mempool_size])
+            forge_next_block_timed(sc_node, measure)
+        return measure
+
+    def measure_mc_refs(self, mc_refs):
+        sc_node = self.sc_nodes[0]
+        measure = ForgingMeasure("mc refs {0}".format(mc_refs))
+        for i in range(self.options.blocks):
+            self.nodes[0].generate(mc_refs)
+            self.sync_all()
+            forge_next_block_timed(sc_node, measure)
+        return measure
+
+    def measure_ommers(self, ommers):
+        mc_node1, mc_node2 = self.nodes
+        sc_node = self.sc_nodes[0]
+        measure = ForgingMeasure("ommers {0}".format(ommers))
+        for i in range(self.options.blocks):
+            disconnect_nodes_bi(self.nodes, 0, 1)
+            for j in range(ommers):
+                mc_node1.generate(1)
+                generate_next_block(sc_node, "first node")
+            mc_node2.generate(ommers + 1)
+            connect_nodes_bi(self.nodes, 0, 1)
+            self.sync_all()
+            block_id = forge_next_block_timed(sc_node, measure)
+            check_ommers_amount(ommers, block_id, sc_node)
+        return measure
+
+    def run_test(self):
+        self.sync_all()
+        # Bring the SC node up to date with MC, so the first measured block doesn't pay for old MC blocks
+        generate_next_block(self.sc_nodes[0], "first node")
+
+        measures = [self.measure_mempool(mempool_size)
+                    for mempool_size in parse_int_list(self.options.mempoolsizes)]
+        measures += [self.measure_mc_refs(mc_refs) for mc_refs in parse_int_list(self.options.mcrefs)]
+        measures += [self.measure_ommers(ommers) for ommers in parse_int_list(self.options.ommers)]
+
+        for measure in measures:
+            assert_equal(self.options.blocks, measure.blocks, "Unexpected number of forged blocks")
+            print(measure.report())
+
+
+if __name__ == "__main__":
+    SCForgingBenchmark().main()
@@ -52,7 +52,7 @@ class SCForwardTransfer(SidechainTestFramework):
         assert_equal(sc_best_block["height"], 1, "The best block has not the specified height.")
 
         # verify MC block reference's inclusion
-        res = is_mainchain_block_included_in_sc_block(sc_best_block["block"], mc_block)
+        res = is_mainchain_block_included_in_sc_block(sc_best_block["block"], mc_block, sc_node)
         assert_true(res, "The mainchain block is not included in SC node.")
 
         sc_mc_best_block_ref_info = sc_node.mainchain_bestBlockReferenceInfo()["result"]
@@ -80,7 +80,7 @@ class SCForwardTransfer(SidechainTestFramework):
         assert_equal(sc_best_block["height"], 2, "The best block has not the specified height.")
 
         # verify MC block reference's inclusion
-        res = is_mainchain_block_included_in_sc_block(sc_best_block["block"], mc_block)
+        res = is_mainchain_block_included_in_sc_block(sc_best_block["block"], mc_block, sc_node)
         assert_true(res, "The mainchain block is not included in SC node.")
 
         sc_mc_best_block_ref_info = sc_node.mainchain_bestBlockReferenceInfo()["result"]
@@ -0,0 +1,88 @@
+#!/usr/bin/env python2
+import time
+
+from SidechainTestFramework.sc_test_framework import SidechainTestFramework
+from SidechainTestFramework.sc_boostrap_info import SCNodeConfiguration, SCCreationInfo, MCConnectionInfo, \
+    SCNetworkConfiguration, SCNetworkTopology
+from test_framework.util import assert_equal, start_nodes, websocket_port_by_mc_node_index
+from SidechainTestFramework.scutil import bootstrap_sidechain_nodes, start_sc_nodes, connect_sc_nodes_topology, \
+    get_sc_connected_peers, check_sc_nodes_topology, sync_sc_blocks, generate_next_blocks, SC_TOPOLOGY_SETTLE_TIME
+
+"""
+Check the creation of a SC network with a declared topology.
+
+Configuration:
+    Start 1 MC node and --scnodes SC nodes (default: 6) connected to it.
+    Connect the SC nodes with the --topology of SCNetworkTopology (default: random_regular with --degree 3).
+
+Test:
+    - verify the number of connected peers of every node, e.g. 2 in a ring and n-1 for the center of a star
+    - verify that the connected peers of every node are exactly its topology neighbours
+    - forge a block on the first SC node and verify that it reaches all the SC nodes through the topology
+    - verify again the connected peers after more than the Scorex interval of connections to known peers
+
+Large networks, e.g.:
+    python sc_network_topology.py --scnodes=50 --topology=random_regular --degree=4
+"""
+class SCNetworkTopologyTest(SidechainTestFramework):
+
+    sc_network = None
+
+    def add_options(self, parser):
+        parser.add_option("--scnodes", dest="scnodes", type="int", default=6,
+                          help="Number of SC nodes")
+        parser.add_option("--topology", dest="topology", default=SCNetworkTopology.RANDOM_REGULAR,
+                          help="star, ring, mesh or random_regular")
+        parser.add_option("--degree", dest="degree", type="int", default=3,
+                          help="Connections of each node of the random_regular topology")
+
+    def setup_nodes(self):
+        return start_nodes(1, self.options.tmpdir)
+
+    def sc_setup_chain(self):
+        mc_node = self.nodes[0]
+        sc_nodes_configuration = [SCNodeConfiguration(
+            MCConnectionInfo(address="ws://{0}:{1}".format(mc_node.hostname, websocket_port_by_mc_node_index(0))))
+            for _ in range(self.options.scnodes)]
+        topology = SCNetworkTopology(self.options.topology, degree=self.options.degree)
+        self.sc_network = SCNetworkConfiguration(SCCreationInfo(mc_node, 100, 1000), *sc_nodes_configuration,
+                                                 topology=topology)
+        bootstrap_sidechain_nodes(self.options.tmpdir, self.sc_network)
+
+    def sc_setup_network(self, split=False):
+        self.sc_nodes = self.sc_setup_nodes()
+        connect_sc_nodes_topology(self.sc_nodes, self.sc_network.topology)
+        self.sc_sync_all()
+
+    def sc_setup_nodes(self):
+        return start_sc_nodes(self.options.scnodes, self.options.tmpdir)
+
+    def get_expected_degrees(self):
+        num_nodes = self.options.scnodes
+        if self.options.topology == SCNetworkTopology.STAR:
+            return [num_nodes - 1 if n == self.sc_network.topology.center else 1 for n in range(num_nodes)]
+        if self.options.topology == SCNetworkTopology.RING:
+            return [min(2, num_nodes - 1)] * num_nodes
+        if self.options.topology == SCNetworkTopology.MESH:
+            return [num_nodes - 1] * num_nodes
+        return [self.options.degree] * num_nodes
+
+    def run_test(self):
+        edges = self.sc_network.topology.get_edges(self.options.scnodes)
+        connected_peers = get_sc_connected_peers(self.sc_nodes)
+        for node, expected_degree in enumerate(self.get_expected_degrees()):
+            assert_equal(expected_degree, len(connected_peers[node]),
+                         "Unexpected number of connected peers of SC node {0}".format(node))
+        check_sc_nodes_topology(self.sc_nodes, edges)
+        print("All the {0} connections of the {1} topology are established".format(len(edges),
+                                                                                   self.options.topology))
+
+        generate_next_blocks(self.sc_nodes[0], "first node", 1)
+        sync_sc_blocks(self.sc_nodes)
+
+        time.sleep(SC_TOPOLOGY_SETTLE_TIME)
+        check_sc_nodes_topology(self.sc_nodes, edges)
+
+
+if __name__ == "__main__":
+    SCNetworkTopologyTest().main()
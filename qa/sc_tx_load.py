@@ -0,0 +1,70 @@
+#!/usr/bin/env python2
+from SidechainTestFramework.sc_boostrap_info import SCNodeConfiguration, SCCreationInfo, MCConnectionInfo, \
+    SCNetworkConfiguration
+from SidechainTestFramework.sc_test_framework import SidechainTestFramework
+from test_framework.util import assert_true, start_nodes, websocket_port_by_mc_node_index
+from SidechainTestFramework.scutil import bootstrap_sidechain_nodes, start_sc_nodes
+from SidechainTestFramework.sc_load_generator import prepare_load_transactions, run_load
+
+"""
+Benchmark: transaction throughput of a SC node (not part of the regression tests in run_sc_tests.py).
+
+Configuration: 1 MC node and 1 SC node connected to it.
+
+Run:
+    For each rate of --tps:
+        - fund and sign tps * duration payments
+        - send them at that rate (open loop) while forging a block every --blockinterval seconds
+        - print the submit, mempool and block inclusion latencies
+    The node saturates at the first rate whose achieved rate is lower than the target, or whose latencies grow with
+    the duration of the run.
+
+Example:
+    python sc_tx_load.py --tps=10,50,100,200 --duration=30 --workers=4
+"""
+class SCTransactionLoad(SidechainTestFramework):
+
+    sc_nodes_bootstrap_info = None
+
+    def sc_add_options(self, parser):
+        SidechainTestFramework.sc_add_options(self, parser)
+        parser.add_option("--tps", dest="tps", default="10,50",
+                          help="Comma separated list of target rates, in transactions per second")
+        parser.add_option("--duration", dest="duration", type="int", default=20,
+                          help="Duration of the load at each rate, in seconds")
+        parser.add_option("--workers", dest="workers", type="int", default=2,
+                          help="Number of processes sending the transactions")
+        parser.add_option("--threads", dest="threads", type="int", default=8,
+                          help="Number of sender threads of each process")
+        parser.add_option("--blockinterval", dest="blockinterval", type="float", default=5,
+                          help="Seconds between the SC blocks forged during the load")
+
+    def setup_nodes(self):
+        return start_nodes(1, self.options.tmpdir)
+
+    def sc_setup_chain(self):
+        mc_node = self.nodes[0]
+        sc_node_configuration = SCNodeConfiguration(
+            MCConnectionInfo(address="ws://{0}:{1}".format(mc_node.hostname, websocket_port_by_mc_node_index(0)))
+        )
+        network = SCNetworkConfiguration(SCCreationInfo(mc_node, 100, 1000), sc_node_configuration)
+        self.sc_nodes_bootstrap_info = bootstrap_sidechain_nodes(self.options.tmpdir, network)
+
+    def sc_setup_nodes(self):
+        return start_sc_nodes(1, self.options.tmpdir)
+
+    def run_test(self):
+        sc_node = self.sc_nodes[0]
+        for tps in [int(rate) for rate in self.options.tps.split(",")]:
+            transactions_count = tps * self.options.duration
+            print("Preparing {0} transactions for {1} tx/s...".format(transactions_count, tps))
+            transactions = prepare_load_transactions(sc_node, transactions_count)
+            print("Sending {0} tx/s for {1}s...".format(tps, self.options.duration))
+            result = run_load(sc_node, transactions, tps, self.options.workers, self.options.threads,
+                              self.options.blockinterval)
+            print(result.report())
+            assert_true(result.submitted == transactions_count, "Some transactions were not sent.")
+
+
+if __name__ == "__main__":
+    SCTransactionLoad().main()
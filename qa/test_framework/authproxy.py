@@ -42,6 +42,7 @@ import base64
 import decimal
 import json
 import logging
+from json_codec import DEFAULT_CODEC
 try:
     import urllib.parse as urlparse
 except ImportError:
@@ -68,9 +69,10 @@ class AuthServiceProxy(object):
     __id_count = 0
     hostname = ""
 
-    def __init__(self, service_url, service_name=None, timeout=HTTP_TIMEOUT, connection=None):
+    def __init__(self, service_url, service_name=None, timeout=HTTP_TIMEOUT, connection=None, codec=None):
         self.__service_url = service_url
         self.__service_name = service_name
+        self.__codec = codec if codec is not None else DEFAULT_CODEC
         self.__url = urlparse.urlparse(service_url)
         self.hostname = self.__url.hostname
         if self.__url.port is None:
@@ -106,7 +108,7 @@ class AuthServiceProxy(object):
             raise AttributeError
         if self.__service_name is not None:
             name = "%s.%s" % (self.__service_name, name)
-        return AuthServiceProxy(self.__service_url, name, connection=self.__conn)
+        return AuthServiceProxy(self.__service_url, name, connection=self.__conn, codec=self.__codec)
 
     def _request(self, method, path, postdata):
         '''
@@ -138,9 +140,10 @@ class AuthServiceProxy(object):
     def __call__(self, *args):
         AuthServiceProxy.__id_count += 1
 
-        log.debug("-%s-> %s %s"%(AuthServiceProxy.__id_count, self.__service_name,
-                                 json.dumps(args, default=EncodeDecimal)))
-        postdata = json.dumps({'version': '1.1',
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("-%s-> %s %s"%(AuthServiceProxy.__id_count, self.__service_name,
+                                     json.dumps(args, default=EncodeDecimal)))
+        postdata = self.__codec.encode({'version': '1.1',
                                'method': self.__service_name,
                                'params': args,
                                'id': AuthServiceProxy.__id_count}, default=EncodeDecimal)
@@ -153,8 +156,19 @@ class AuthServiceProxy(object):
         else:
             return response['result']
 
+    def batch(self):
+        """
+        Queue the calls made on the returned object and send them in a single JSON-RPC batch request
+        when the with block exits:
+
+            with node.batch() as batch:
+                hashes = [batch.getblockhash(h) for h in heights]
+            blocks = [hash.result() for hash in hashes]
+        """
+        return JSONRPCBatch(self)
+
     def _batch(self, rpc_call_list):
-        postdata = json.dumps(list(rpc_call_list), default=EncodeDecimal)
+        postdata = self.__codec.encode(list(rpc_call_list), default=EncodeDecimal)
         log.debug("--> "+postdata)
         return self._request('POST', self.__url.path, postdata)
 
@@ -164,10 +178,94 @@ class AuthServiceProxy(object):
             raise JSONRPCException({
                 'code': -342, 'message': 'missing HTTP response from server'})
 
-        responsedata = http_response.read().decode('utf8')
-        response = json.loads(responsedata, parse_float=decimal.Decimal)
-        if "error" in response and response["error"] is None:
-            log.debug("<-%s- %s"%(response["id"], json.dumps(response["result"], default=EncodeDecimal)))
-        else:
-            log.debug("<-- "+responsedata)
+        responsedata = http_response.read()
+        response = self.__codec.decode(responsedata)
+        if log.isEnabledFor(logging.DEBUG):
+            if isinstance(response, dict) and "error" in response and response["error"] is None:
+                log.debug("<-%s- %s"%(response["id"], json.dumps(response["result"], default=EncodeDecimal)))
+            else:
+                log.debug("<-- "+responsedata.decode('utf8'))
         return response
+
+
+class JSONRPCBatchResult(object):
+    """
+    Result of a call queued in a JSONRPCBatch, available once the batch is executed.
+    """
+
+    def __init__(self, method):
+        self.method = method
+        self.done = False
+        self.__result = None
+        self.__error = None
+
+    def set(self, response):
+        self.__result = response.get('result')
+        self.__error = response.get('error')
+        if self.__error is None and 'result' not in response:
+            self.__error = {'code': -343, 'message': 'missing JSON-RPC result'}
+        self.done = True
+
+    def error(self):
+        return self.__error
+
+    def result(self):
+        """
+        Return the call result, raise JSONRPCException if the call failed.
+        """
+        if not self.done:
+            raise JSONRPCException({'code': -344, 'message': 'batch not executed yet'})
+        if self.__error is not None:
+            raise JSONRPCException(self.__error)
+        return self.__result
+
+
+class JSONRPCBatch(object):
+    """
+    Collects calls with the same style of AuthServiceProxy and sends them together. Errors are reported per call:
+    a failed call does not prevent the others from being executed. See AuthServiceProxy.batch()
+    """
+
+    def __init__(self, proxy):
+        self.__proxy = proxy
+        self.__calls = []
+        self.__results = []
+
+    def __getattr__(self, name):
+        if name.startswith('__') and name.endswith('__'):
+            # Python internal stuff
+            raise AttributeError
+
+        def call(*args):
+            result = JSONRPCBatchResult(name)
+            self.__calls.append({'version': '1.1', 'method': name, 'params': args, 'id': len(self.__calls)})
+            self.__results.append(result)
+            return result
+        return call
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.execute()
+        return False
+
+    def execute(self):
+        """
+        Send the queued calls and return their results, in the same order of the calls.
+        """
+        calls, results = self.__calls, self.__results
+        self.__calls, self.__results = [], []
+        if len(calls) == 0:
+            return []
+        responses = self.__proxy._batch(calls)
+        if not isinstance(responses, list):
+            # The whole batch was rejected
+            raise JSONRPCException(responses.get('error') or {'code': -345, 'message': 'invalid batch response'})
+        for response in responses:
+            results[response['id']].set(response)
+        for result in results:
+            if not result.done:
+                result.set({'error': {'code': -342, 'message': 'missing response in batch'}})
+        return results
@@ -0,0 +1,115 @@
+#
+# Fast cloning of node datadirs from caches and snapshots
+#
+
+import errno
+import fnmatch
+import os
+import shutil
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+"""
+clone_datadir has the same behavior as shutil.copytree, but each file is cloned with the cheapest available method:
+ 1) reflink (FICLONE ioctl): the clone shares all data blocks with the source until one of them is modified.
+    Supported by btrfs, xfs and other copy-on-write filesystems;
+ 2) hard link, only for files that are never modified in place once written (see IMMUTABLE_FILE_PATTERNS):
+    databases write a new file instead of changing them, so source and clone never affect each other;
+ 3) plain copy.
+"""
+
+FICLONE = 0x40049409
+
+# Table files of LevelDB based storages (zend chainstate and block index, SC node storages):
+# written once, then only read and eventually deleted.
+IMMUTABLE_FILE_PATTERNS = ["*.ldb", "*.sst"]
+
+# Devices on which reflink or hard link already failed, to avoid trying again for every file.
+reflink_unsupported_devices = set()
+hardlink_unsupported_devices = set()
+
+UNSUPPORTED_ERRNOS = [getattr(errno, name) for name in ["EOPNOTSUPP", "EXDEV", "EINVAL", "ENOTTY", "EPERM", "ENOSYS"]
+                      if hasattr(errno, name)]
+
+
+def reflink_file(src, dst):
+    """
+    Clone src to dst sharing data blocks. Return False if the filesystem does not support it.
+    """
+    if fcntl is None:
+        return False
+    device = os.stat(os.path.dirname(os.path.abspath(dst))).st_dev
+    if device in reflink_unsupported_devices:
+        return False
+    with open(src, 'rb') as src_file:
+        with open(dst, 'wb') as dst_file:
+            try:
+                fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+            except IOError as e:
+                if e.errno not in UNSUPPORTED_ERRNOS:
+                    raise
+                reflink_unsupported_devices.add(device)
+                cloned = False
+            else:
+                cloned = True
+    if not cloned:
+        os.remove(dst)
+        return False
+    shutil.copystat(src, dst)
+    return True
+
+
+def hardlink_file(src, dst):
+    """
+    Link dst to src. Return False if hard links are not supported between them.
+    """
+    if not hasattr(os, "link"):
+        return False
+    device = os.stat(os.path.dirname(os.path.abspath(dst))).st_dev
+    if device in hardlink_unsupported_devices:
+        return False
+    try:
+        os.link(src, dst)
+    except OSError as e:
+        if e.errno not in UNSUPPORTED_ERRNOS + [errno.EMLINK]:
+            raise
+        hardlink_unsupported_devices.add(device)
+        return False
+    return True
+
+
+def is_immutable_file(name):
+    return any(fnmatch.fnmatch(name, pattern) for pattern in IMMUTABLE_FILE_PATTERNS)
+
+
+def clone_file(src, dst):
+    if reflink_file(src, dst):
+        return
+    if is_immutable_file(os.path.basename(src)) and hardlink_file(src, dst):
+        return
+    shutil.copy2(src, dst)
+
+
+def clone_datadir(src, dst, ignore=None):
+    """
+    Recursively clone directory src to dst, which must not exist.
+    ignore: the same as shutil.copytree ignore argument, e.g. shutil.ignore_patterns("*.log")
+    """
+    names = os.listdir(src)
+    ignored_names = ignore(src, names) if ignore is not None else set()
+    os.makedirs(dst)
+    for name in names:
+        if name in ignored_names:
+            continue
+        src_path = os.path.join(src, name)
+        dst_path = os.path.join(dst, name)
+        if os.path.islink(src_path):
+            os.symlink(os.readlink(src_path), dst_path)
+        elif os.path.isdir(src_path):
+            clone_datadir(src_path, dst_path, ignore)
+        else:
+            clone_file(src_path, dst_path)
+    shutil.copystat(src, dst)
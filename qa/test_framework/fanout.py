@@ -0,0 +1,81 @@
+#
+# Concurrent requests to many nodes at once
+#
+
+import sys
+import threading
+
+"""
+The node proxies (AuthServiceProxy, SidechainAuthServiceProxy) are blocking clients: asking the same thing to N nodes
+one after another costs N round trips. The helpers below send the requests to all the nodes at the same time, one
+thread per node, so the cost is the one of the slowest node.
+
+    heights = NodesFanOut(sc_nodes).block_best()          # same call to every node, results in nodes order
+    counts = gather([node.getblockcount for node in mc_nodes])
+
+Each proxy keeps a single HTTP connection, so a node must not appear twice in the same fan-out.
+"""
+
+
+class FanOutException(Exception):
+    """
+    Raised when at least one of the gathered calls failed. errors is the list of (index, exception) of failed calls,
+    results the list of all the results with None in place of the failed ones.
+    """
+
+    def __init__(self, errors, results):
+        Exception.__init__(self, "{0} of {1} calls failed, first error: {2!r}".format(len(errors), len(results),
+                                                                                     errors[0][1]))
+        self.errors = errors
+        self.results = results
+
+
+def gather(calls):
+    """
+    Run all the calls at the same time and return their results, in the same order of calls.
+    calls: list of callables with no parameters
+    """
+    results = [None] * len(calls)
+    errors = []
+    lock = threading.Lock()
+
+    def run(index):
+        try:
+            results[index] = calls[index]()
+        except Exception:
+            with lock:
+                errors.append((index, sys.exc_info()[1]))
+
+    if len(calls) == 1:
+        run(0)
+    else:
+        threads = [threading.Thread(target=run, args=(index,)) for index in range(len(calls))]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+    if len(errors) > 0:
+        errors.sort(key=lambda error: error[0])
+        raise FanOutException(errors, results)
+    return results
+
+
+class NodesFanOut(object):
+    """
+    Proxy to a group of nodes: any method called on it is called on every node at the same time,
+    with the same parameters, and the list of the results is returned.
+    """
+
+    def __init__(self, nodes):
+        self.nodes = list(nodes)
+
+    def __getattr__(self, name):
+        if name.startswith('__') and name.endswith('__'):
+            # Python internal stuff
+            raise AttributeError
+        methods = [getattr(node, name) for node in self.nodes]
+
+        def call(*args, **kwargs):
+            return gather([lambda method=method: method(*args, **kwargs) for method in methods])
+        return call
@@ -0,0 +1,98 @@
+#
+# JSON decoding of node responses
+#
+
+import decimal
+import json
+import re
+
+try:
+    import simplejson
+except ImportError:
+    simplejson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+"""
+Node responses are decoded by a JSONCodec, which uses the fastest available decoder that keeps numbers exact:
+ - JSON numbers with a fractional part are decoded as Decimal, so that amounts are compared without float rounding.
+   Decimal parsing is only needed when the document contains a '.', otherwise every number is an integer;
+ - ujson, if installed, decodes documents with no '.' (e.g. SC node responses, where amounts are in satoshi,
+   and most of the mainchain ones);
+ - simplejson, if installed, decodes the other documents with its C speedups and use_decimal;
+ - the standard json module is the fallback for both cases.
+
+A LazyJSON keeps the raw bytes of a response and decodes them only on first access, so that callers only
+checking the status of a request, or forwarding the raw data, never pay for decoding.
+"""
+
+# Floats written in exponent notation without a '.' (e.g. 1e-08) are not produced by zend nor by the SC node
+# serializers, anyway they are looked for to keep the fast path safe.
+EXPONENT_NUMBER = re.compile(br'[:,\[]\s*-?\d+[eE]')
+
+
+class JSONCodec(object):
+
+    def __init__(self, use_decimal=True, fast_decoder=True):
+        """
+        use_decimal: decode numbers with a fractional part as Decimal instead of float
+        fast_decoder: use ujson/simplejson when they are installed
+        """
+        self.use_decimal = use_decimal
+        self.fast_decoder = fast_decoder
+
+    def may_contain_floats(self, data):
+        return b'.' in data or EXPONENT_NUMBER.search(data) is not None
+
+    def decode(self, data):
+        """
+        data: bytes or text of a JSON document
+        """
+        if isinstance(data, bytes):
+            raw = data
+        else:
+            raw = data.encode('utf8')
+        if self.fast_decoder and ujson is not None and (not self.use_decimal or not self.may_contain_floats(raw)):
+            try:
+                return ujson.loads(raw)
+            except (ValueError, OverflowError):
+                pass  # e.g. integers too big for ujson: let the other decoders try
+        text = raw.decode('utf8')
+        if not self.use_decimal:
+            return json.loads(text)
+        if self.fast_decoder and simplejson is not None:
+            return simplejson.loads(text, use_decimal=True)
+        return json.loads(text, parse_float=decimal.Decimal)
+
+    def encode(self, obj, default=None):
+        return json.dumps(obj, default=default)
+
+
+class LazyJSON(object):
+    """
+    Raw response data, decoded on first call of json()
+    """
+
+    def __init__(self, raw, codec):
+        self.raw = raw
+        self.__codec = codec
+        self.__decoded = False
+        self.__value = None
+
+    def json(self):
+        if not self.__decoded:
+            self.__value = self.__codec.decode(self.raw)
+            self.__decoded = True
+        return self.__value
+
+    def __getitem__(self, key):
+        return self.json()[key]
+
+    def __contains__(self, key):
+        return key in self.json()
+
+
+DEFAULT_CODEC = JSONCodec()
@@ -0,0 +1,103 @@
+#
+# Incremental parsing of the elements of a JSON array inside a large document
+#
+
+import re
+
+from json_codec import DEFAULT_CODEC
+
+"""
+iter_json_array reads a JSON document chunk by chunk and yields, one at a time, the elements of the array found at
+the given path, e.g. ["result", "boxes"] for {"result": {"boxes": [ ... ]}}. Only the structural characters of the
+document are scanned, each element is decoded on its own when its end is found, so memory usage is bounded by the
+size of the biggest element instead of the size of the whole document.
+Arrays nested in other arrays are addressed with "*" in the path, e.g. ["result", "blocks", "*", "transactions"].
+"""
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+STRUCTURAL_CHAR = re.compile(br'["{}\[\]:,]')
+STRING_END = re.compile(br'(?:[^"\\]|\\.)*"', re.DOTALL)
+# Short strings are remembered as possible object keys, long ones (e.g. hex data) are never keys of interest.
+MAX_KEY_LENGTH = 256
+
+
+class JSONStreamException(Exception):
+    def __init__(self, message):
+        Exception.__init__(self, message)
+
+
+def iter_json_array(read, path, codec=DEFAULT_CODEC, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    read: function returning the next chunk of at most n bytes of the document, an empty string at the end
+    path: list of keys (or "*" for arrays) leading to the array
+    """
+    path = tuple(path)
+    buf = b""
+    pos = 0
+    eof = False
+    # One [container, key] per open container: container is "{" or "[", key is the key of the value being parsed
+    stack = []
+    last_string = None
+    capture_depth = None
+    element_start = None
+
+    while True:
+        # Position of the first byte not scanned yet, or the start of a string token not complete in buf yet
+        pending = pos
+        match = STRUCTURAL_CHAR.search(buf, pos)
+        if match is not None and buf[match.start():match.start() + 1] == b'"':
+            string_end = STRING_END.match(buf, match.start() + 1)
+            if string_end is None:
+                pending = match.start()
+                match = None
+        if match is None:
+            if eof:
+                if len(stack) > 0:
+                    raise JSONStreamException("Unexpected end of JSON document")
+                return
+            # Keep only the data still needed: the element being captured, or the token being scanned
+            keep_from = pending if element_start is None else min(element_start, pending)
+            buf = buf[keep_from:]
+            pos -= keep_from
+            if element_start is not None:
+                element_start -= keep_from
+            chunk = read(chunk_size)
+            if not chunk:
+                eof = True
+            buf += chunk
+            continue
+
+        char = buf[match.start():match.start() + 1]
+        if char == b'"':
+            end = string_end.end()
+            if capture_depth is None:
+                last_string = codec.decode(buf[match.start():end]) if end - match.start() <= MAX_KEY_LENGTH else None
+            pos = end
+            continue
+        pos = match.end()
+        if char == b':':
+            if len(stack) > 0 and stack[-1][0] == b'{':
+                stack[-1][1] = last_string
+        elif char == b',':
+            if capture_depth is not None and len(stack) == capture_depth:
+                yield codec.decode(buf[element_start:match.start()])
+                element_start = pos
+        elif char in (b'{', b'['):
+            if (char == b'[' and capture_depth is None and
+                    tuple(key if container == b'{' else "*" for container, key in stack) == path):
+                stack.append([char, None])
+                capture_depth = len(stack)
+                element_start = pos
+            else:
+                stack.append([char, None])
+        else:  # closing } or ]
+            if len(stack) == 0:
+                raise JSONStreamException("Unbalanced JSON document")
+            if capture_depth is not None and len(stack) == capture_depth:
+                element = buf[element_start:match.start()]
+                if element.strip():
+                    yield codec.decode(element)
+                capture_depth = None
+                element_start = None
+            stack.pop()
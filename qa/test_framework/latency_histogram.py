@@ -0,0 +1,109 @@
+#
+# HDR-style latency histograms
+#
+
+import math
+
+"""
+LatencyHistogram records latencies with a bounded relative error and a memory usage independent from the number
+of recorded values, like HdrHistogram: values (in microseconds) are grouped in buckets whose width grows with the
+value, each power of 2 range being split in 2^(SUB_BUCKET_BITS - 1) sub-buckets: a percentile is at most
+1 / 2^(SUB_BUCKET_BITS - 1) (0.8%) above the recorded value.
+
+Histograms of different threads or processes are merged with add(); counts are plain dicts, so they can be pickled
+or written as JSON and loaded back with LatencyHistogram(json.loads(...)).
+"""
+
+SUB_BUCKET_BITS = 8
+
+
+def bucket_of(value):
+    """
+    Lowest value of the bucket including value (non negative integer).
+    """
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    if shift <= 0:
+        return value
+    return (value >> shift) << shift
+
+
+def bucket_width(bucket):
+    shift = bucket.bit_length() - SUB_BUCKET_BITS
+    return 1 << shift if shift > 0 else 1
+
+
+class LatencyHistogram(object):
+
+    def __init__(self, counts=None):
+        # Keys of counts loaded from JSON are strings
+        self.counts = dict((int(bucket), bucket_count) for bucket, bucket_count in counts.items()) \
+            if counts is not None else {}
+        self.count = sum(self.counts.values())
+        self.total = 0
+        self.min = None
+        self.max = None
+        for bucket, bucket_count in self.counts.items():
+            self.__update_stats(bucket, bucket_count)
+
+    def __update_stats(self, value, count):
+        self.total += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def record(self, seconds, count=1):
+        value = max(0, int(round(seconds * 1e6)))
+        bucket = bucket_of(value)
+        self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.count += count
+        self.__update_stats(value, count)
+
+    def add(self, other):
+        for bucket, bucket_count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + bucket_count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def percentile(self, percent):
+        """
+        Latency in seconds below which percent % of the recorded values are: the highest value of the bucket of
+        the value of that rank, like HdrHistogram.
+        """
+        if self.count == 0:
+            return None
+        rank = max(1, int(math.ceil(self.count * percent / 100.0)))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return max(self.min, min(bucket + bucket_width(bucket) - 1, self.max)) / 1e6
+        return self.max / 1e6
+
+    def mean(self):
+        if self.count == 0:
+            return None
+        return self.total / float(self.count) / 1e6
+
+    def summary(self, percentiles=(50, 90, 99, 99.9)):
+        """
+        Output: a dict with count, min, mean, max and the requested percentiles, in seconds
+        """
+        result = {"count": self.count,
+                  "min": None if self.min is None else self.min / 1e6,
+                  "mean": self.mean(),
+                  "max": None if self.max is None else self.max / 1e6}
+        for percent in percentiles:
+            result["p{0}".format(percent)] = self.percentile(percent)
+        return result
+
+    def format_summary(self, name, percentiles=(50, 90, 99, 99.9)):
+        if self.count == 0:
+            return "{0}: no values".format(name)
+        summary = self.summary(percentiles)
+        return "{0}: count={1} min={2:.1f}ms mean={3:.1f}ms {4} max={5:.1f}ms".format(
+            name, summary["count"], summary["min"] * 1000, summary["mean"] * 1000,
+            " ".join("p{0}={1:.1f}ms".format(percent, summary["p{0}".format(percent)] * 1000)
+                     for percent in percentiles),
+            summary["max"] * 1000)
@@ -0,0 +1,289 @@
+#
+# Push notifications of mainchain node events through zend websocket interface
+#
+
+import base64
+import json
+import os
+import socket
+import struct
+import threading
+import time
+
+from authproxy import AuthServiceProxy, JSONRPCException
+from util import websocket_port_by_mc_node_index, rpc_port
+
+"""
+zend started with -websocket pushes an event to every connected client when its tip changes:
+    {"msgType": 0, "eventType": 0, "eventPayload": {"height": <height>, "hash": <block hash>, "block": <block hex>}}
+
+MCEventListener keeps a websocket connection to a mainchain node and wakes up the threads waiting for a new block
+as soon as the event is received, instead of polling the node RPC interface. The listeners of several nodes can share
+the same MCEvents, so that a waiter is woken up by a tip change of any of them (see sync_blocks in util.py), and
+wait_for_mc_block checks a node again at every tip change of its listener.
+zend websocket interface has no transactions or certificates notifications: wait_for_certificate polls the mempool
+with a short interval instead.
+"""
+
+WS_OPCODE_CONTINUATION = 0x0
+WS_OPCODE_TEXT = 0x1
+WS_OPCODE_CLOSE = 0x8
+WS_OPCODE_PING = 0x9
+WS_OPCODE_PONG = 0xA
+
+MC_EVENT_MSG_TYPE = 0
+MC_UPDATE_TIP_EVENT_TYPE = 0
+
+MEMPOOL_POLL_INTERVAL = 0.05
+# A node is checked again after this interval also without events, e.g. if its websocket is closed
+MC_BLOCK_POLL_INTERVAL = 1
+
+# Listeners started by start_mc_event_listeners or get_mc_event_listener, by mainchain node index
+mc_event_listeners = {}
+
+
+class MCEvents(object):
+    """
+    Tip changes received by one or more MCEventListener.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.count = 0
+
+    def wait_after(self, count, timeout):
+        """
+        Wait until more than count events have been received, for maximum timeout seconds.
+        Return True if a new event has been received.
+        """
+        deadline = time.time() + timeout
+        with self.condition:
+            while self.count <= count:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+            return True
+
+
+class MCEventListener(object):
+
+    def __init__(self, mc_node_index, host="127.0.0.1", connection_timeout=10, events=None):
+        self.host = host
+        self.port = websocket_port_by_mc_node_index(mc_node_index)
+        self.connection_timeout = connection_timeout
+        self.height = -1
+        self.hash = None
+        self.block_hashes = {}
+        self.connected = False
+        self.events = events if events is not None else MCEvents()
+        self.__sock = None
+        self.__thread = None
+
+    def start(self):
+        """
+        Connect to the mainchain node websocket and start receiving its events in a background thread.
+        """
+        self.__sock = socket.create_connection((self.host, self.port), self.connection_timeout)
+        self.__handshake()
+        self.__sock.settimeout(None)
+        self.connected = True
+        self.__thread = threading.Thread(target=self.__receive_loop)
+        self.__thread.daemon = True
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        if self.__sock is not None:
+            try:
+                self.__send_frame(WS_OPCODE_CLOSE, b"")
+            except socket.error:
+                pass
+            self.__sock.close()
+            self.__sock = None
+        if self.__thread is not None:
+            self.__thread.join(self.connection_timeout)
+            self.__thread = None
+
+    def __handshake(self):
+        key = base64.b64encode(os.urandom(16))
+        request = ("GET / HTTP/1.1\r\n"
+                   "Host: {0}:{1}\r\n"
+                   "Upgrade: websocket\r\n"
+                   "Connection: Upgrade\r\n"
+                   "Sec-WebSocket-Key: {2}\r\n"
+                   "Sec-WebSocket-Version: 13\r\n\r\n").format(self.host, self.port, key)
+        self.__sock.sendall(request.encode('ascii'))
+        response = b""
+        while b"\r\n\r\n" not in response:
+            data = self.__sock.recv(1024)
+            if not data:
+                raise socket.error("Websocket handshake failed: connection closed")
+            response += data
+        status_line = response.split(b"\r\n", 1)[0]
+        if b" 101 " not in status_line:
+            raise socket.error("Websocket handshake failed: " + status_line.decode('ascii', 'replace'))
+
+    def __recv_exactly(self, size):
+        data = b""
+        while len(data) < size:
+            chunk = self.__sock.recv(size - len(data))
+            if not chunk:
+                raise socket.error("Websocket connection closed")
+            data += chunk
+        return data
+
+    def __recv_frame(self):
+        header = bytearray(self.__recv_exactly(2))
+        fin = header[0] & 0x80 != 0
+        opcode = header[0] & 0x0F
+        masked = header[1] & 0x80 != 0
+        length = header[1] & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", self.__recv_exactly(2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", self.__recv_exactly(8))[0]
+        mask = bytearray(self.__recv_exactly(4)) if masked else None
+        payload = bytearray(self.__recv_exactly(length))
+        if mask is not None:
+            for i in range(length):
+                payload[i] ^= mask[i % 4]
+        return fin, opcode, bytes(payload)
+
+    def __send_frame(self, opcode, payload):
+        # Client to server frames must be masked
+        frame = bytearray([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            frame.append(0x80 | length)
+        elif length < (1 << 16):
+            frame.append(0x80 | 126)
+            frame.extend(struct.pack(">H", length))
+        else:
+            frame.append(0x80 | 127)
+            frame.extend(struct.pack(">Q", length))
+        mask = bytearray(os.urandom(4))
+        frame.extend(mask)
+        frame.extend(bytearray(byte ^ mask[i % 4] for i, byte in enumerate(bytearray(payload))))
+        self.__sock.sendall(bytes(frame))
+
+    def __receive_loop(self):
+        message = b""
+        try:
+            while True:
+                fin, opcode, payload = self.__recv_frame()
+                if opcode == WS_OPCODE_CLOSE:
+                    break
+                elif opcode == WS_OPCODE_PING:
+                    self.__send_frame(WS_OPCODE_PONG, payload)
+                elif opcode in (WS_OPCODE_TEXT, WS_OPCODE_CONTINUATION):
+                    message += payload
+                    if fin:
+                        self.__process_message(message)
+                        message = b""
+        except (socket.error, AttributeError):
+            pass  # connection closed by stop() or by the node shutdown
+        finally:
+            with self.events.condition:
+                self.connected = False
+                self.events.condition.notify_all()
+
+    def __process_message(self, message):
+        try:
+            json_message = json.loads(message.decode('utf8'))
+        except ValueError:
+            return
+        if json_message.get("msgType") != MC_EVENT_MSG_TYPE or json_message.get("eventType") != MC_UPDATE_TIP_EVENT_TYPE:
+            return
+        payload = json_message["eventPayload"]
+        with self.events.condition:
+            self.height = payload["height"]
+            self.hash = payload["hash"]
+            self.block_hashes[self.height] = self.hash
+            self.events.count += 1
+            self.events.condition.notify_all()
+
+
+def start_mc_event_listeners(num_nodes):
+    """
+    Start a listener for each of the first num_nodes mainchain nodes, all of them notifying the same MCEvents.
+    Nodes whose websocket can't be reached are skipped: waits on their changes fall back to polling.
+    Output: the shared MCEvents
+    """
+    events = MCEvents()
+    for i in range(num_nodes):
+        try:
+            mc_event_listeners[i] = MCEventListener(i, events=events).start()
+        except socket.error as e:
+            print("MC node {0} websocket not available, its events are polled: {1}".format(i, e))
+    return events
+
+
+def get_mc_event_listener(mc_node_index):
+    """
+    The running listener of the mainchain node, started now if needed.
+    Output: the listener, None if the node websocket can't be reached
+    """
+    listener = mc_event_listeners.get(mc_node_index)
+    if listener is None or not listener.connected:
+        try:
+            listener = mc_event_listeners[mc_node_index] = MCEventListener(mc_node_index).start()
+        except socket.error as e:
+            print("MC node {0} websocket not available, its blocks are polled: {1}".format(mc_node_index, e))
+            return None
+    return listener
+
+
+def wait_for_mc_block(mc_node_index, height_or_hash, timeout=60):
+    """
+    Wait until the active chain of the mainchain node contains the block with the given height or hash, for
+    maximum timeout seconds. The node is asked when the wait starts, so that blocks connected before the listener was
+    started are taken into account, then again at every tip change event (every MC_BLOCK_POLL_INTERVAL at most).
+    Return the hash of the block, or None on timeout.
+    """
+    mc_node = AuthServiceProxy("http://rt:rt@127.0.0.1:%d" % rpc_port(mc_node_index))
+    listener = get_mc_event_listener(mc_node_index)
+
+    def find_block():
+        try:
+            if isinstance(height_or_hash, (int, long)):
+                return mc_node.getblockhash(height_or_hash)
+            # Blocks out of the active chain have -1 confirmations
+            if mc_node.getblockheader(height_or_hash)["confirmations"] >= 0:
+                return height_or_hash
+        except JSONRPCException:
+            pass  # block or height not known yet
+        return None
+
+    deadline = time.time() + timeout
+    while True:
+        seen = listener.events.count if listener is not None else 0
+        block_hash = find_block()
+        remaining = deadline - time.time()
+        if block_hash is not None or remaining <= 0:
+            return block_hash
+        if listener is not None:
+            listener.events.wait_after(seen, min(remaining, MC_BLOCK_POLL_INTERVAL))
+        else:
+            time.sleep(min(remaining, MC_BLOCK_POLL_INTERVAL))
+
+
+def wait_for_certificate(mc_node, timeout=200):
+    """
+    Wait until a certificate appears in the mainchain node mempool, for maximum timeout seconds.
+    Return the certificate hash, or None on timeout.
+    """
+    not_certificates = set()
+    deadline = time.time() + timeout
+    while True:
+        for mempool_hash in mc_node.getrawmempool():
+            if mempool_hash in not_certificates:
+                continue
+            try:
+                mc_node.getrawcertificate(mempool_hash)
+                return mempool_hash
+            except JSONRPCException:
+                not_certificates.add(mempool_hash)
+        if time.time() >= deadline:
+            return None
+        time.sleep(MEMPOOL_POLL_INTERVAL)
@@ -0,0 +1,94 @@
+#
+# Readiness probing of the nodes started by the test framework
+#
+
+import os
+import threading
+import time
+
+"""
+A node is ready when its API answers an application level request (e.g. getblockcount for MC nodes, block/best for
+SC nodes), not just when its port accepts connections.
+
+All the nodes are probed at the same time, each one in its own thread:
+ - a failed probe is retried with an exponential backoff starting from PROBE_MIN_INTERVAL, up to PROBE_MAX_INTERVAL;
+ - probing fails as soon as a node process exits, without waiting for the deadline;
+ - every node has its own deadline, STF_NODE_STARTUP_TIMEOUT seconds after the probing started (default: 120).
+If a node fails all the other probes are stopped and NodeStartupException is raised.
+"""
+
+DEFAULT_NODE_STARTUP_TIMEOUT = 120
+PROBE_MIN_INTERVAL = 0.02
+PROBE_MAX_INTERVAL = 0.25
+# HTTP timeout of a single probe request, so that a hanging node can't make the probe miss its deadline
+PROBE_REQUEST_TIMEOUT = 5
+
+
+class NodeStartupException(Exception):
+    def __init__(self, message):
+        Exception.__init__(self, message)
+
+
+class ReadinessProbe(object):
+    """
+    name: node name used in error messages
+    process: the subprocess.Popen instance of the node
+    check: callable doing the application level request, it must raise an exception if the node is not ready
+    """
+
+    def __init__(self, name, process, check):
+        self.name = name
+        self.process = process
+        self.check = check
+        self.error = None
+        self.elapsed = None
+
+
+def get_node_startup_timeout():
+    return float(os.getenv("STF_NODE_STARTUP_TIMEOUT", DEFAULT_NODE_STARTUP_TIMEOUT))
+
+
+def run_probe(probe, deadline, abort):
+    start = time.time()
+    interval = PROBE_MIN_INTERVAL
+    last_error = None
+    while not abort.is_set():
+        return_code = probe.process.poll()
+        if return_code is not None:
+            probe.error = "{0} exited with code {1} during startup".format(probe.name, return_code)
+            break
+        try:
+            probe.check()
+            probe.elapsed = time.time() - start
+            return
+        except Exception as e:
+            last_error = e
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            probe.error = "{0} not ready after {1:.1f}s, last error: {2!r}".format(probe.name, time.time() - start,
+                                                                                   last_error)
+            break
+        abort.wait(min(interval, remaining))
+        interval = min(interval * 2, PROBE_MAX_INTERVAL)
+    abort.set()
+
+
+def wait_for_nodes_ready(probes, timeout=None):
+    """
+    Probe all the nodes at the same time until each of them is ready.
+    Return the startup time in seconds of each node, in the same order of probes.
+    """
+    if timeout is None:
+        timeout = get_node_startup_timeout()
+    deadline = time.time() + timeout
+    abort = threading.Event()
+    threads = [threading.Thread(target=run_probe, args=(probe, deadline, abort)) for probe in probes]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join()
+    errors = [probe.error for probe in probes if probe.error is not None]
+    if len(errors) > 0:
+        raise NodeStartupException("; ".join(errors))
+    return [probe.elapsed for probe in probes]
@@ -0,0 +1,240 @@
+#
+# Collision-free port allocation for nodes started by the test framework
+#
+
+import atexit
+import errno
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+"""
+Every test process leases a block of ports that no other test process on the same host is using.
+The block is split in one range per node role, each range has room for MAX_NODES nodes:
+
+    block_start + role_index * MAX_NODES + node_index
+
+Leases are stored in a registry file shared by all the processes and guarded by an OS lock on a lock file (flock,
+or msvcrt.locking on Windows): the lock file is never removed, and the OS releases the lock of a process that dies
+while holding it. A lease is released at process exit; leases of processes that died without releasing them are
+reclaimed. Before leasing a block every port in it is checked to be free, so ports taken by other programs are skipped
+too.
+
+Environment variables:
+ - STF_PORT_RANGE: "<first port>-<last port>" the ports that can be leased (default: 20000-60000)
+ - STF_MAX_NODES: the maximum number of nodes of each role a single test can start (default: 100)
+ - STF_PORT_LEASE_DIR: the directory of the registry and lock files (default: system temp dir)
+"""
+
+MC_P2P_PORT = "mc_p2p"
+MC_RPC_PORT = "mc_rpc"
+MC_WEBSOCKET_PORT = "mc_websocket"
+SC_P2P_PORT = "sc_p2p"
+SC_RPC_PORT = "sc_rpc"
+
+ROLES = [MC_P2P_PORT, MC_RPC_PORT, MC_WEBSOCKET_PORT, SC_P2P_PORT, SC_RPC_PORT]
+
+DEFAULT_PORT_RANGE = "20000-60000"
+DEFAULT_MAX_NODES = 100
+
+LOCK_TIMEOUT = 60
+LOCK_POLL_INTERVAL = 0.01
+
+
+class PortLeaseException(Exception):
+    def __init__(self, message):
+        Exception.__init__(self, message)
+
+
+class PortLease(object):
+    """
+    A block of ports leased by the current process.
+    """
+
+    def __init__(self, block_index, block_start, max_nodes):
+        self.block_index = block_index
+        self.block_start = block_start
+        self.max_nodes = max_nodes
+
+    def port(self, role, n):
+        if n < 0 or n >= self.max_nodes:
+            raise PortLeaseException("Node index {0} is out of the leased range: at most {1} nodes per role "
+                                     "are supported, see STF_MAX_NODES.".format(n, self.max_nodes))
+        return self.block_start + ROLES.index(role) * self.max_nodes + n
+
+    def ports(self):
+        return range(self.block_start, self.block_start + len(ROLES) * self.max_nodes)
+
+
+def _lease_dir():
+    return os.getenv("STF_PORT_LEASE_DIR", tempfile.gettempdir())
+
+
+def _registry_path():
+    return os.path.join(_lease_dir(), "stf_port_leases.json")
+
+
+def _lock_path():
+    return os.path.join(_lease_dir(), "stf_port_leases.lock")
+
+
+def _port_range():
+    first, last = os.getenv("STF_PORT_RANGE", DEFAULT_PORT_RANGE).split("-")
+    return int(first), int(last)
+
+
+def _max_nodes():
+    return int(os.getenv("STF_MAX_NODES", DEFAULT_MAX_NODES))
+
+
+def _is_process_alive(pid):
+    if sys.platform.startswith('win'):
+        import ctypes
+        SYNCHRONIZE = 0x100000
+        handle = ctypes.windll.kernel32.OpenProcess(SYNCHRONIZE, False, pid)
+        if handle == 0:
+            return False
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return True
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno == errno.EPERM
+    return True
+
+
+def _is_port_free(port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.bind(("127.0.0.1", port))
+        return True
+    except socket.error:
+        return False
+    finally:
+        sock.close()
+
+
+def _try_lock(fd):
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except (IOError, OSError) as e:
+        if e.errno not in (errno.EAGAIN, errno.EACCES, errno.EWOULDBLOCK, errno.EDEADLK):
+            raise
+        return False
+
+
+def _acquire_lock():
+    """
+    Output: the descriptor of the locked lock file, to be passed to _release_lock
+    """
+    fd = os.open(_lock_path(), os.O_CREAT | os.O_RDWR, 0o666)
+    start = time.time()
+    try:
+        while not _try_lock(fd):
+            if time.time() - start >= LOCK_TIMEOUT:
+                raise PortLeaseException("Timeout while waiting for port lease lock " + _lock_path())
+            time.sleep(LOCK_POLL_INTERVAL)
+    except:
+        os.close(fd)
+        raise
+    return fd
+
+
+def _release_lock(fd):
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
+
+
+def _load_registry():
+    try:
+        with open(_registry_path(), 'r') as registry_file:
+            return json.load(registry_file)
+    except (IOError, ValueError):
+        return {}
+
+
+def _save_registry(registry):
+    tmp_path = _registry_path() + "." + str(os.getpid())
+    with open(tmp_path, 'w') as registry_file:
+        json.dump(registry, registry_file)
+    if os.path.exists(_registry_path()) and sys.platform.startswith('win'):
+        os.remove(_registry_path())
+    os.rename(tmp_path, _registry_path())
+
+
+def acquire_port_lease():
+    """
+    Lease a block of free ports for the current process. The lease is released at process exit.
+    """
+    first_port, last_port = _port_range()
+    max_nodes = _max_nodes()
+    block_size = len(ROLES) * max_nodes
+    number_of_blocks = (last_port - first_port + 1) // block_size
+
+    lock = _acquire_lock()
+    try:
+        registry = dict((index, lease) for index, lease in _load_registry().items()
+                        if _is_process_alive(lease["pid"]))
+        for block_index in range(number_of_blocks):
+            if str(block_index) in registry:
+                continue
+            lease = PortLease(block_index, first_port + block_index * block_size, max_nodes)
+            if all(_is_port_free(port) for port in lease.ports()):
+                registry[str(block_index)] = {"pid": os.getpid(), "time": time.time()}
+                _save_registry(registry)
+                return lease
+        _save_registry(registry)
+    finally:
+        _release_lock(lock)
+    raise PortLeaseException("No free block of {0} ports in range {1}-{2}.".format(block_size, first_port, last_port))
+
+
+def release_port_lease(lease):
+    lock = _acquire_lock()
+    try:
+        registry = _load_registry()
+        if registry.get(str(lease.block_index), {}).get("pid") == os.getpid():
+            del registry[str(lease.block_index)]
+            _save_registry(registry)
+    finally:
+        _release_lock(lock)
+
+
+current_lease = None
+current_lease_pid = None
+
+
+def get_port_lease():
+    """
+    Return the lease of the current process, acquiring it on first use.
+    """
+    global current_lease, current_lease_pid
+    # A forked child must not share the lease of its parent.
+    if current_lease is None or current_lease_pid != os.getpid():
+        current_lease = acquire_port_lease()
+        current_lease_pid = os.getpid()
+        atexit.register(release_port_lease, current_lease)
+    return current_lease
+
+
+def lease_port(role, n):
+    return get_port_lease().port(role, n)
@@ -12,8 +12,10 @@ import os
 import sys
 
 from binascii import hexlify, unhexlify
+from distutils.spawn import find_executable
 from base64 import b64encode
 from decimal import Decimal, ROUND_DOWN
+import hashlib
 import json
 import random
 import shutil
@@ -22,13 +24,25 @@ import time
 import re
 
 from authproxy import AuthServiceProxy
+from fanout import NodesFanOut
+from datadir_clone import clone_datadir
+from port_lease import lease_port, MC_P2P_PORT, MC_RPC_PORT, MC_WEBSOCKET_PORT
+from node_readiness import ReadinessProbe, wait_for_nodes_ready, PROBE_REQUEST_TIMEOUT
+
+# Number of blocks to mine in regtest to enable the sidechain logic
+SC_ENABLED_CHAIN_HEIGHT = 219
+# The cached sidechain enabled chain is mined with real timestamps: zend is in initial block download while its tip is
+# older than 24 hours, so the cache is rebuilt once older than this number of seconds.
+# Overridden by the SC_ENABLED_CHAIN_MAX_AGE environment variable.
+DEFAULT_SC_ENABLED_CHAIN_MAX_AGE = 12 * 3600
+SC_ENABLED_CHAIN_CACHE_FILE = "sc_enabled_chain.json"
 
 def p2p_port(n):
-    return 11000 + n + os.getpid()%999
+    return lease_port(MC_P2P_PORT, n)
 def rpc_port(n):
-    return 12000 + n + os.getpid()%999
+    return lease_port(MC_RPC_PORT, n)
 def websocket_port_by_mc_node_index(n):
-    return 13000 + n + os.getpid()%999
+    return lease_port(MC_WEBSOCKET_PORT, n)
 
 def check_json_precision():
     """Make sure json library being used does not lose precision converting BTC values"""
@@ -46,15 +60,21 @@ def hex_str_to_bytes(hex_str):
 def str_to_b64str(string):
     return b64encode(string.encode('utf-8')).decode('ascii')
 
-def sync_blocks(rpc_connections, wait=1):
+def sync_blocks(rpc_connections, wait=1, events=None):
     """
-    Wait until everybody has the same block count
+    Wait until everybody has the same block count.
+    With the MCEvents of the nodes (see mc_event_listener.py) the counts are checked again as soon as a tip
+    changes, and at most every wait seconds.
     """
     while True:
-        counts = [ x.getblockcount() for x in rpc_connections ]
+        seen_events = events.count if events is not None else 0
+        counts = NodesFanOut(rpc_connections).getblockcount()
         if counts == [ counts[0] ]*len(counts):
             break
-        time.sleep(wait)
+        if events is not None:
+            events.wait_after(seen_events, wait)
+        else:
+            time.sleep(wait)
 
 def sync_mempools(rpc_connections, wait=1):
     """
@@ -62,10 +82,11 @@ def sync_mempools(rpc_connections, wait=1):
     pools
     """
     while True:
-        pool = set(rpc_connections[0].getrawmempool())
+        pools = NodesFanOut(rpc_connections).getrawmempool()
+        pool = set(pools[0])
         num_match = 1
         for i in range(1, len(rpc_connections)):
-            if set(rpc_connections[i].getrawmempool()) == pool:
+            if set(pools[i]) == pool:
                 num_match = num_match+1
         if num_match == len(rpc_connections):
             break
@@ -95,11 +116,10 @@ def initialize_chain(test_dir):
     """
     Create (or copy from cache) a 200-block-long chain and
     4 wallets.
-    bitcoind and bitcoin-cli must be in search path.
+    bitcoind must be in search path.
     """
 
     if not os.path.isdir(os.path.join("cache", "node0")):
-        devnull = open("/dev/null", "w+")
         # Create cache directories, run bitcoinds:
         for i in range(4):
             datadir=initialize_datadir("cache", i, [])
@@ -107,13 +127,11 @@ def initialize_chain(test_dir):
             if i > 0:
                 args.append("-connect=127.0.0.1:"+str(p2p_port(0)))
             bitcoind_processes[i] = subprocess.Popen(args)
-            if os.getenv("PYTHON_DEBUG", ""):
-                print "initialize_chain: bitcoind started, calling bitcoin-cli -rpcwait getblockcount"
-            subprocess.check_call([ os.getenv("BITCOINCLI", "bitcoin-cli"), "-datadir="+datadir,
-                                    "-rpcwait", "getblockcount"], stdout=devnull)
-            if os.getenv("PYTHON_DEBUG", ""):
-                print "initialize_chain: bitcoin-cli -rpcwait getblockcount completed"
-        devnull.close()
+        if os.getenv("PYTHON_DEBUG", ""):
+            print "initialize_chain: bitcoinds started, probing getblockcount"
+        wait_for_nodes_ready([mc_node_readiness_probe(i, "http://rt:rt@127.0.0.1:%d"%(rpc_port(i),)) for i in range(4)])
+        if os.getenv("PYTHON_DEBUG", ""):
+            print "initialize_chain: bitcoinds ready"
         rpcs = []
         for i in range(4):
             try:
@@ -149,9 +167,91 @@ def initialize_chain(test_dir):
     for i in range(4):
         from_dir = os.path.join("cache", "node"+str(i))
         to_dir = os.path.join(test_dir,  "node"+str(i))
-        shutil.copytree(from_dir, to_dir)
+        clone_datadir(from_dir, to_dir)
         initialize_datadir(test_dir, i) # Overwrite port/rpcport in zcash.conf
 
+def get_binary_hash(binary):
+    """
+    Hash of the content of an executable, looked up in PATH if needed.
+    """
+    path = binary if os.path.isfile(binary) else find_executable(binary)
+    if path is None:
+        raise RuntimeError("Executable {0} not found".format(binary))
+    return get_file_hash(path)
+
+def get_file_hash(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as hashed_file:
+        for chunk in iter(lambda: hashed_file.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def build_sc_enabled_chain_cache(cache_dir):
+    """
+    Create a single node datadir with a chain of SC_ENABLED_CHAIN_HEIGHT blocks mined by the node itself.
+    The datadir is built aside and then moved in place, so concurrent test processes never see a partial cache.
+    An expired cache already in place is replaced.
+    """
+    build_dir = "{0}.{1}.tmp".format(cache_dir, os.getpid())
+    datadir = initialize_datadir(build_dir, 0)
+    args = [ os.getenv("BITCOIND", "bitcoind"), "-keypool=1", "-datadir="+datadir, "-discover=0" ]
+    bitcoind_processes[0] = subprocess.Popen(args)
+    url = "http://rt:rt@127.0.0.1:%d"%(rpc_port(0),)
+    wait_for_nodes_ready([mc_node_readiness_probe(0, url)])
+    rpcs = [ AuthServiceProxy(url) ]
+    rpcs[0].generate(SC_ENABLED_CHAIN_HEIGHT)
+    stop_nodes(rpcs)
+    wait_bitcoinds()
+    for logname in ["debug.log", "db.log", "peers.dat", "fee_estimates.dat"]:
+        if os.path.isfile(log_filename(build_dir, 0, logname)):
+            os.remove(log_filename(build_dir, 0, logname))
+    with open(os.path.join(build_dir, SC_ENABLED_CHAIN_CACHE_FILE), 'w') as cache_file:
+        json.dump({"height": SC_ENABLED_CHAIN_HEIGHT, "time": time.time()}, cache_file)
+
+    if os.path.isdir(cache_dir):
+        # An expired cache, or one built meanwhile by another test process.
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    try:
+        os.rename(build_dir, cache_dir)
+    except OSError:
+        shutil.rmtree(build_dir, ignore_errors=True)
+
+def get_sc_enabled_chain_max_age():
+    return int(os.getenv("SC_ENABLED_CHAIN_MAX_AGE", DEFAULT_SC_ENABLED_CHAIN_MAX_AGE))
+
+def is_sc_enabled_chain_cache_valid(cache_dir):
+    """
+    The cache is valid if it is complete and its tip is recent enough to keep the nodes out of initial block download.
+    """
+    try:
+        with open(os.path.join(cache_dir, SC_ENABLED_CHAIN_CACHE_FILE), 'r') as cache_file:
+            cache_info = json.load(cache_file)
+    except (IOError, ValueError):
+        return False
+    return time.time() - cache_info["time"] <= get_sc_enabled_chain_max_age()
+
+def initialize_sc_enabled_chain(test_dir, num_nodes):
+    """
+    Create (or copy from cache) a chain of SC_ENABLED_CHAIN_HEIGHT blocks, the height at which sidechains
+    can be created, and num_nodes wallets. All the blocks are mined by node 0, so only its wallet has coins,
+    the other nodes share the chain with an empty wallet: the same state as mining the blocks in the test.
+    The cache is built once for every zend binary and rebuilt when older than SC_ENABLED_CHAIN_MAX_AGE seconds.
+    bitcoind must be in search path.
+    """
+    binary_hash = get_binary_hash(os.getenv("BITCOIND", "bitcoind"))
+    cache_dir = os.path.join("cache", "sc_enabled_" + binary_hash)
+    if not is_sc_enabled_chain_cache_valid(cache_dir):
+        build_sc_enabled_chain_cache(cache_dir)
+
+    from_dir = os.path.join(cache_dir, "node0")
+    for i in range(num_nodes):
+        to_dir = os.path.join(test_dir, "node"+str(i))
+        if i == 0:
+            clone_datadir(from_dir, to_dir)
+        else:
+            clone_datadir(from_dir, to_dir, ignore=shutil.ignore_patterns("wallet.dat", "database", "db.log"))
+        initialize_datadir(test_dir, i, websocket_port_by_mc_node_index(i)) # Overwrite ports in zen.conf
+
 def initialize_chain_clean(test_dir, num_nodes):
     """
     Create an empty blockchain and num_nodes wallets.
@@ -180,9 +280,17 @@ def _rpchost_to_args(rpchost):
         rv += ['-rpcport=' + rpcport]
     return rv
 
-def start_node(i, dirname, extra_args=None, rpchost=None, timewait=None, binary=None):
+def mc_node_readiness_probe(i, url):
     """
-    Start a bitcoind and return RPC connection to it
+    MC node i is ready when it answers getblockcount: zend returns an error while it is still loading its datadir.
+    """
+    def check():
+        AuthServiceProxy(url, timeout=PROBE_REQUEST_TIMEOUT).getblockcount()
+    return ReadinessProbe("MC node " + str(i), bitcoind_processes[i], check)
+
+def launch_node(i, dirname, extra_args=None, rpchost=None, timewait=None, binary=None):
+    """
+    Start a bitcoind without waiting for it to be ready and return RPC connection to it
     """
     datadir = os.path.join(dirname, "node"+str(i))
     if binary is None:
@@ -190,15 +298,6 @@ def start_node(i, dirname, extra_args=None, rpchost=None, timewait=None, binary=
     args = [ binary, "-datadir="+datadir, "-keypool=1", "-discover=0", "-rest", "-websocket"]
     if extra_args is not None: args.extend(extra_args)
     bitcoind_processes[i] = subprocess.Popen(args)
-    devnull = open(os.devnull, "w+")
-    if os.getenv("PYTHON_DEBUG", ""):
-        print "start_node: bitcoind started, calling bitcoin-cli -rpcwait getblockcount"
-    subprocess.check_call([ os.getenv("BITCOINCLI", "bitcoin-cli"), "-datadir="+datadir] +
-                          _rpchost_to_args(rpchost)  +
-                          ["-rpcwait", "getblockcount"], stdout=devnull)
-    if os.getenv("PYTHON_DEBUG", ""):
-        print "start_node: calling bitcoin-cli -rpcwait getblockcount returned"
-    devnull.close()
     url = "http://rt:rt@%s:%d" % (rpchost or '127.0.0.1', rpc_port(i))
     if timewait is not None:
         proxy = AuthServiceProxy(url, timeout=timewait)
@@ -207,13 +306,34 @@ def start_node(i, dirname, extra_args=None, rpchost=None, timewait=None, binary=
     proxy.url = url # store URL on proxy for info
     return proxy
 
-def start_nodes(num_nodes, dirname, extra_args=None, rpchost=None, binary=None):
+def start_node(i, dirname, extra_args=None, rpchost=None, timewait=None, binary=None):
+    """
+    Start a bitcoind and return RPC connection to it
     """
-    Start multiple bitcoinds, return RPC connections to them
+    proxy = launch_node(i, dirname, extra_args, rpchost, timewait, binary)
+    if os.getenv("PYTHON_DEBUG", ""):
+        print "start_node: bitcoind started, probing getblockcount"
+    wait_for_nodes_ready([mc_node_readiness_probe(i, proxy.url)])
+    if os.getenv("PYTHON_DEBUG", ""):
+        print "start_node: bitcoind ready"
+    return proxy
+
+def launch_nodes(num_nodes, dirname, extra_args=None, rpchost=None, binary=None):
+    """
+    Start multiple bitcoinds without waiting for them to be ready, return RPC connections to them
     """
     if extra_args is None: extra_args = [ None for i in range(num_nodes) ]
     if binary is None: binary = [ None for i in range(num_nodes) ]
-    return [ start_node(i, dirname, extra_args[i], rpchost, binary=binary[i]) for i in range(num_nodes) ]
+    return [ launch_node(i, dirname, extra_args[i], rpchost, binary=binary[i]) for i in range(num_nodes) ]
+
+def start_nodes(num_nodes, dirname, extra_args=None, rpchost=None, binary=None):
+    """
+    Start multiple bitcoinds, return RPC connections to them.
+    All the bitcoinds are started at once and warm up at the same time.
+    """
+    nodes = launch_nodes(num_nodes, dirname, extra_args, rpchost, binary)
+    wait_for_nodes_ready([ mc_node_readiness_probe(i, node.url) for i, node in enumerate(nodes) ])
+    return nodes
 
 def log_filename(dirname, n_node, logname):
     return os.path.join(dirname, "node"+str(n_node), "regtest", logname)
@@ -476,9 +596,8 @@ Output: an array of two information:
 """
 def initialize_new_sidechain_in_mainchain(mainchain_node, withdrawal_epoch_length,
                                           public_key, forward_transfer_amount, vrf_public_key, genSysConstant, verificationKey):
-    number_of_blocks_to_enable_sc_logic = 219
     number_of_blocks = mainchain_node.getblockcount()
-    diff = number_of_blocks_to_enable_sc_logic - number_of_blocks
+    diff = SC_ENABLED_CHAIN_HEIGHT - number_of_blocks
     if diff > 1:
         mainchain_node.generate(diff)
 
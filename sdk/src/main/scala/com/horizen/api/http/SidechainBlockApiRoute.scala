@@ -8,8 +8,9 @@ import com.horizen.api.http.JacksonSupport._
 import com.horizen.api.http.SidechainBlockErrorResponse._
 import com.horizen.api.http.SidechainBlockRestSchema._
 import com.horizen.block.SidechainBlock
-import com.horizen.consensus.{intToConsensusEpochNumber, intToConsensusSlotNumber}
+import com.horizen.consensus.{ConsensusEpochAndSlot, intToConsensusEpochNumber, intToConsensusSlotNumber}
 import com.horizen.forge.Forger.ReceivableMessages.{GetForgingInfo, StartForging, StopForging, TryForgeNextBlockForEpochAndSlot}
+import com.horizen.forge.Forger.SlotSkippedException
 import com.horizen.forge.ForgingInfo
 import com.horizen.serialization.Views
 import com.horizen.utils.BytesUtils
@@ -17,6 +18,7 @@ import scorex.core.settings.RESTApiSettings
 import scorex.util.ModifierId
 
 import scala.collection.JavaConverters._
+import scala.collection.mutable.ArrayBuffer
 import scala.concurrent.{Await, ExecutionContext, Future}
 import scala.util.{Failure, Success, Try}
 
@@ -25,7 +27,7 @@ case class SidechainBlockApiRoute(override val settings: RESTApiSettings, sidech
   extends SidechainApiRoute {
 
   override val route: Route = pathPrefix("block") {
-    findById ~ findLastIds ~ findIdByHeight ~ getBestBlockInfo ~ startForging ~ stopForging ~ generateBlockForEpochNumberAndSlot ~ getForgingInfo
+    findById ~ findLastIds ~ findIdByHeight ~ getBestBlockInfo ~ startForging ~ stopForging ~ generateBlockForEpochNumberAndSlot ~ generateNextBlocks ~ getForgingInfo
   }
 
   /**
@@ -126,6 +128,66 @@ case class SidechainBlockApiRoute(override val settings: RESTApiSettings, sidech
     }
   }
 
+  private def tryToForgeBlock(epochAndSlot: ConsensusEpochAndSlot): Try[ModifierId] = {
+    // Ask timeouts are failures of the forging like the ones reported by the actor
+    Try {
+      val future = sidechainBlockActorRef ? TryForgeNextBlockForEpochAndSlot(epochAndSlot.epochNumber, epochAndSlot.slotNumber)
+      val submitResultFuture = Await.result(future, timeout.duration).asInstanceOf[Future[Try[ModifierId]]]
+      Await.result(submitResultFuture, timeout.duration)
+    }.flatten
+  }
+
+  private def nextEpochAndSlot(epochAndSlot: ConsensusEpochAndSlot, slotsInEpoch: Int): ConsensusEpochAndSlot = {
+    if (epochAndSlot.slotNumber >= slotsInEpoch)
+      ConsensusEpochAndSlot(intToConsensusEpochNumber(epochAndSlot.epochNumber + 1), intToConsensusSlotNumber(1))
+    else
+      ConsensusEpochAndSlot(epochAndSlot.epochNumber, intToConsensusSlotNumber(epochAndSlot.slotNumber + 1))
+  }
+
+  /**
+    * Forge up to the given number of blocks one after another, in the first slots with an eligible forger box after the best block.
+    * Slots without eligible forger box are skipped; forging stops with an error after a whole epoch of skipped slots.
+    * No block is started once the API timeout is elapsed, so that the response comes before the HTTP request timeout:
+    * callers ask again for the missing blocks.
+    * Returns the ids of the forged blocks, with the error if forging failed after some blocks.
+    */
+  def generateNextBlocks: Route = (post & path("generateNext")) {
+    entity(as[ReqGenerateNext]) { body =>
+      Try(Await.result(forgerRef ? GetForgingInfo, timeout.duration).asInstanceOf[Try[ForgingInfo]]).flatten match {
+        case Success(forgingInfo) =>
+          val deadline = timeout.duration.fromNow
+          val blockIds = ArrayBuffer[String]()
+          var epochAndSlot = forgingInfo.currentBestEpochAndSlot
+          var skippedSlots = 0
+          var error: Option[Throwable] = None
+          while (blockIds.size < body.number && error.isEmpty && deadline.hasTimeLeft()) {
+            epochAndSlot = nextEpochAndSlot(epochAndSlot, forgingInfo.consensusSlotsInEpoch)
+            tryToForgeBlock(epochAndSlot) match {
+              case Success(id) =>
+                blockIds += id.asInstanceOf[String]
+                skippedSlots = 0
+              case Failure(_: SlotSkippedException) if skippedSlots + 1 < forgingInfo.consensusSlotsInEpoch =>
+                skippedSlots += 1
+              case Failure(e) =>
+                error = Some(e)
+            }
+          }
+          error match {
+            case None =>
+              ApiResponseUtil.toResponse(RespGenerateNext(blockIds, None))
+            case Some(e) if blockIds.isEmpty =>
+              ApiResponseUtil.toResponse(ErrorBlockNotCreated(s"Block was not created: ${e.getMessage}", None))
+            case Some(e) =>
+              val notCreated = ErrorBlockNotCreated(s"Block was not created after ${blockIds.size} blocks", Some(e))
+              ApiResponseUtil.toResponse(RespGenerateNext(blockIds,
+                Some(SidechainApiManagedError(notCreated.code, notCreated.description, Option(e.getMessage)))))
+          }
+        case Failure(e) =>
+          ApiResponseUtil.toResponse(ErrorGetForgingInfo(s"Failed to get forging info: ${e.getMessage}", None))
+      }
+    }
+  }
+
   def getForgingInfo: Route = (post & path("forgingInfo")){
     val future = forgerRef ? GetForgingInfo
     val result = Await.result(future, timeout.duration).asInstanceOf[Try[ForgingInfo]]
@@ -195,6 +257,14 @@ object SidechainBlockRestSchema {
   @JsonView(Array(classOf[Views.Default]))
   private[api] case class RespGenerate(blockId: String) extends SuccessResponse
 
+  @JsonView(Array(classOf[Views.Default]))
+  private[api] case class ReqGenerateNext(number: Int) {
+    require(number > 0, s"Invalid number $number. Number must be > 0")
+  }
+
+  @JsonView(Array(classOf[Views.Default]))
+  private[api] case class RespGenerateNext(blockIds: Seq[String], error: Option[SidechainApiManagedError]) extends SuccessResponse
+
   @JsonView(Array(classOf[Views.Default]))
   private[api] object RespGenerateSkipSlot extends SuccessResponse {
     val result = "No block is generated due no eligible forger box are present, skip slot"
@@ -11,6 +11,7 @@ import com.horizen.block.SidechainBlock
 import com.horizen.companion.SidechainTransactionsCompanion
 import com.horizen.consensus.{ConsensusEpochAndSlot, ConsensusEpochNumber, ConsensusSlotNumber, TimeToEpochSlotConverter}
 import com.horizen.forge.Forger.ReceivableMessages.{GetForgingInfo, StartForging, StopForging, TryForgeNextBlockForEpochAndSlot}
+import com.horizen.forge.Forger.SlotSkippedException
 import com.horizen.params.NetworkParams
 import scorex.core.NodeViewHolder.ReceivableMessages
 import scorex.core.NodeViewHolder.ReceivableMessages.LocallyGeneratedModifier
@@ -106,7 +107,7 @@ class Forger(settings: SidechainSettings,
 
       case Success(SkipSlot) => {
         log.info(s"Slot is skipped")
-        respondsToOpt.map(respondsTo => respondsTo ! Failure(new RuntimeException("Slot had been skipped")))
+        respondsToOpt.map(respondsTo => respondsTo ! Failure(new SlotSkippedException))
       }
 
       case Success(ForgeFailed(ex)) => {
@@ -146,6 +147,9 @@ class Forger(settings: SidechainSettings,
 }
 
 object Forger extends ScorexLogging {
+  // Forging failure for a slot without eligible forger box
+  class SlotSkippedException extends RuntimeException("Slot had been skipped")
+
   object ReceivableMessages {
     case object StartForging
     case object StopForging
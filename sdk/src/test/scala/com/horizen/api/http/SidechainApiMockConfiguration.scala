@@ -20,6 +20,8 @@ class SidechainApiMockConfiguration {
   var should_blockActor_ForgingInfo_reply: Try[ForgingInfo] = Failure(new NullPointerException)
 
   val blockActor_ForgingEpochAndSlot_reply: mutable.Map[ConsensusEpochAndSlot, Try[ModifierId]] = mutable.Map[ConsensusEpochAndSlot, Try[ModifierId]]()
+  // Slots whose forging request is never answered, e.g. to check ask timeouts
+  val blockActor_ForgingEpochAndSlot_noReply: mutable.Set[ConsensusEpochAndSlot] = mutable.Set[ConsensusEpochAndSlot]()
   private var should_peerManager_GetAllPeers_reply: Boolean = true
   private var should_networkController_GetConnectedPeers_reply = true
   private var should_peerManager_GetBlacklistedPeers_reply = true
@@ -198,6 +198,8 @@ abstract class SidechainApiRouteTest extends WordSpec with Matchers with Scalate
         case TryForgeNextBlockForEpochAndSlot(epoch, slot) => {
           sidechainApiMockConfiguration.blockActor_ForgingEpochAndSlot_reply.get(ConsensusEpochAndSlot(epoch, slot)) match {
             case Some(blockIdTry) => sender ! Future[Try[ModifierId]]{blockIdTry}
+            case None if sidechainApiMockConfiguration.blockActor_ForgingEpochAndSlot_noReply.contains(ConsensusEpochAndSlot(epoch, slot)) =>
+              // no reply: the ask of the route times out
             case None => sender ! Failure(new RuntimeException("Forge is failed"))
           }
         }
@@ -6,6 +6,7 @@ import com.horizen.api.http.SidechainBlockErrorResponse._
 import com.horizen.api.http.SidechainBlockRestSchema._
 import com.horizen.consensus.{ConsensusEpochAndSlot, intToConsensusEpochNumber, intToConsensusSlotNumber}
 import com.horizen.forge
+import com.horizen.forge.Forger.SlotSkippedException
 import com.horizen.serialization.SerializationUtil
 import org.junit.Assert._
 import scorex.util.bytesToId
@@ -277,6 +278,100 @@ class SidechainBlockApiRouteTest extends SidechainApiRouteTest {
       }
     }
 
+    "Successfully reply at /generateNext" in {
+      val firstBlockId = bytesToId("generateNextFirstBlock".getBytes())
+      val secondBlockId = bytesToId("generateNextSecondBlock".getBytes())
+      sidechainApiMockConfiguration.should_blockActor_ForgingInfo_reply =
+        Success(forge.ForgingInfo(10, 3, ConsensusEpochAndSlot(intToConsensusEpochNumber(3), intToConsensusSlotNumber(2))))
+      sidechainApiMockConfiguration.blockActor_ForgingEpochAndSlot_reply.put(
+        ConsensusEpochAndSlot(intToConsensusEpochNumber(3), intToConsensusSlotNumber(3)), Success(firstBlockId))
+      sidechainApiMockConfiguration.blockActor_ForgingEpochAndSlot_reply.put(
+        ConsensusEpochAndSlot(intToConsensusEpochNumber(4), intToConsensusSlotNumber(1)), Failure(new SlotSkippedException))
+      sidechainApiMockConfiguration.blockActor_ForgingEpochAndSlot_reply.put(
+        ConsensusEpochAndSlot(intToConsensusEpochNumber(4), intToConsensusSlotNumber(2)), Success(secondBlockId))
+
+      Post(basePath + "generateNext").withEntity(SerializationUtil.serialize(ReqGenerateNext(2))) ~> sidechainBlockApiRoute ~> check {
+        status.intValue() shouldBe StatusCodes.OK.intValue
+        responseEntity.getContentType() shouldEqual ContentTypes.`application/json`
+        mapper.readTree(entityAs[String]).get("result") match {
+          case result => {
+            assertEquals(1, result.elements().asScala.length)
+            val blockIds: Array[String] = result.get("blockIds").elements().asScala.map(_.asText()).toArray
+            blockIds shouldEqual Array(firstBlockId, secondBlockId)
+          }
+        }
+      }
+    }
+
+    "Reply at /generateNext with the forged blocks and the error" in {
+      val blockId = bytesToId("generateNextPartialBlock".getBytes())
+      sidechainApiMockConfiguration.should_blockActor_ForgingInfo_reply =
+        Success(forge.ForgingInfo(10, 3, ConsensusEpochAndSlot(intToConsensusEpochNumber(8), intToConsensusSlotNumber(1))))
+      sidechainApiMockConfiguration.blockActor_ForgingEpochAndSlot_reply.put(
+        ConsensusEpochAndSlot(intToConsensusEpochNumber(8), intToConsensusSlotNumber(2)), Success(blockId))
+      sidechainApiMockConfiguration.blockActor_ForgingEpochAndSlot_reply.put(
+        ConsensusEpochAndSlot(intToConsensusEpochNumber(8), intToConsensusSlotNumber(3)), Failure(new IllegalStateException("Forging failed")))
+
+      Post(basePath + "generateNext").withEntity(SerializationUtil.serialize(ReqGenerateNext(3))) ~> sidechainBlockApiRoute ~> check {
+        status.intValue() shouldBe StatusCodes.OK.intValue
+        responseEntity.getContentType() shouldEqual ContentTypes.`application/json`
+        mapper.readTree(entityAs[String]).get("result") match {
+          case result => {
+            assertEquals(2, result.elements().asScala.length)
+            result.get("blockIds").elements().asScala.map(_.asText()).toArray shouldEqual Array(blockId)
+            assertEquals(ErrorBlockNotCreated("", None).code, result.get("error").get("code").asText())
+            assertEquals("Forging failed", result.get("error").get("detail").asText())
+          }
+        }
+      }
+
+      // The forging request of the second block times out
+      sidechainApiMockConfiguration.blockActor_ForgingEpochAndSlot_reply.remove(
+        ConsensusEpochAndSlot(intToConsensusEpochNumber(8), intToConsensusSlotNumber(3)))
+      sidechainApiMockConfiguration.blockActor_ForgingEpochAndSlot_noReply.add(
+        ConsensusEpochAndSlot(intToConsensusEpochNumber(8), intToConsensusSlotNumber(3)))
+
+      Post(basePath + "generateNext").withEntity(SerializationUtil.serialize(ReqGenerateNext(3))) ~> sidechainBlockApiRoute ~> check {
+        status.intValue() shouldBe StatusCodes.OK.intValue
+        responseEntity.getContentType() shouldEqual ContentTypes.`application/json`
+        val result = mapper.readTree(entityAs[String]).get("result")
+        result.get("blockIds").elements().asScala.map(_.asText()).toArray shouldEqual Array(blockId)
+        assertEquals(ErrorBlockNotCreated("", None).code, result.get("error").get("code").asText())
+      }
+    }
+
+    "Failed reply at /generateNext" in {
+      Post(basePath + "generateNext").withEntity("{\"number\": 0}") ~> sidechainBlockApiRoute ~> check {
+        rejection.getClass.getCanonicalName.contains(MalformedRequestContentRejection.getClass.getCanonicalName.toString)
+      }
+
+      // Whole epoch without eligible forger box
+      sidechainApiMockConfiguration.should_blockActor_ForgingInfo_reply =
+        Success(forge.ForgingInfo(10, 2, ConsensusEpochAndSlot(intToConsensusEpochNumber(6), intToConsensusSlotNumber(2))))
+      sidechainApiMockConfiguration.blockActor_ForgingEpochAndSlot_reply.put(
+        ConsensusEpochAndSlot(intToConsensusEpochNumber(7), intToConsensusSlotNumber(1)), Failure(new SlotSkippedException))
+      sidechainApiMockConfiguration.blockActor_ForgingEpochAndSlot_reply.put(
+        ConsensusEpochAndSlot(intToConsensusEpochNumber(7), intToConsensusSlotNumber(2)), Failure(new SlotSkippedException))
+
+      Post(basePath + "generateNext").withEntity(SerializationUtil.serialize(ReqGenerateNext(1))) ~> sidechainBlockApiRoute ~> check {
+        status.intValue() shouldBe StatusCodes.OK.intValue
+        responseEntity.getContentType() shouldEqual ContentTypes.`application/json`
+        assertsOnSidechainErrorResponseSchema(entityAs[String], ErrorBlockNotCreated("", None).code)
+      }
+
+      // Ask timeout of the first block
+      sidechainApiMockConfiguration.should_blockActor_ForgingInfo_reply =
+        Success(forge.ForgingInfo(10, 2, ConsensusEpochAndSlot(intToConsensusEpochNumber(9), intToConsensusSlotNumber(1))))
+      sidechainApiMockConfiguration.blockActor_ForgingEpochAndSlot_noReply.add(
+        ConsensusEpochAndSlot(intToConsensusEpochNumber(9), intToConsensusSlotNumber(2)))
+
+      Post(basePath + "generateNext").withEntity(SerializationUtil.serialize(ReqGenerateNext(1))) ~> sidechainBlockApiRoute ~> check {
+        status.intValue() shouldBe StatusCodes.OK.intValue
+        responseEntity.getContentType() shouldEqual ContentTypes.`application/json`
+        assertsOnSidechainErrorResponseSchema(entityAs[String], ErrorBlockNotCreated("", None).code)
+      }
+    }
+
     "Successfully reply at /forgingInfo" in {
       val expectedConsensusSecondsInSlot = 1000
       val expectedConsensusSlotsInEpoch = 60
@@ -0,0 +1,17 @@
+package com.horizen;
+
+import java.util.ArrayList;
+import java.util.List;
+
+public class BufferedPrinter implements MessagePrinter {
+    private List<String> messages = new ArrayList<>();
+
+    @Override
+    public void print(String message) {
+        messages.add(message);
+    }
+
+    public List<String> messages() {
+        return messages;
+    }
+}
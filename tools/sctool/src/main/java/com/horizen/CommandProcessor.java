@@ -63,6 +63,12 @@ public class CommandProcessor {
             case "generateVrfKey":
                 processGenerateVrfKey(command.data());
                 break;
+            case "generatekeys":
+                processGenerateKeys(command.data());
+                break;
+            case "generateVrfKeys":
+                processGenerateVrfKeys(command.data());
+                break;
             case "generateProofInfo":
                 processGenerateProofInfo(command.data());
                 break;
@@ -95,10 +101,14 @@ public class CommandProcessor {
         printer.print("Usage:\n" +
                       "\tFrom command line: <program name> <command name> [<json data>]\n" +
                       "\tFor interactive mode: <command name> [<json data>]\n" +
+                      "\tFor server mode: <program name> server, then one <command name> [<json data>] per line;\n" +
+                      "\t\teach response is a single line {\"result\": <json>} or {\"error\": <message>}\n" +
                       "Supported commands:\n" +
                       "\thelp\n" +
                       "\tgeneratekey <arguments>\n" +
                       "\tgenerateVrfKey <arguments>\n" +
+                      "\tgeneratekeys <arguments>\n" +
+                      "\tgenerateVrfKeys <arguments>\n" +
                       "\tgenerateProofInfo <arguments>\n" +
                       "\tgenesisinfo <arguments>\n" +
                       "\texit\n"
@@ -121,13 +131,47 @@ public class CommandProcessor {
             printGenerateKeyUsageMsg("seed is not specified or has invalid format.");
             return;
         }
-        PrivateKey25519 key = PrivateKey25519Creator.getInstance().generateSecret(json.get("seed").asText().getBytes());
-
         SidechainSecretsCompanion secretsCompanion = new SidechainSecretsCompanion(new HashMap<>());
 
+        String res = generateKey(json.get("seed").asText(), secretsCompanion).toString();
+        printer.print(res);
+    }
+
+    private ObjectNode generateKey(String seed, SidechainSecretsCompanion secretsCompanion) {
+        PrivateKey25519 key = PrivateKey25519Creator.getInstance().generateSecret(seed.getBytes());
+
         ObjectNode resJson = new ObjectMapper().createObjectNode();
         resJson.put("secret", BytesUtils.toHexString(secretsCompanion.toBytes(key)));
         resJson.put("publicKey", BytesUtils.toHexString(key.publicImage().bytes()));
+        return resJson;
+    }
+
+    private void printGenerateKeysUsageMsg(String error) {
+        printer.print("Error: " + error);
+        printer.print("Usage:\n" +
+                      "\tgeneratekeys {\"seed\":\"my seed\", \"count\":10}\n" +
+                      "\tkeys are generated from seeds \"my seed_1\" ... \"my seed_10\".");
+    }
+
+    private void processGenerateKeys(JsonNode json) {
+        if(!json.has("seed") || !json.get("seed").isTextual()) {
+            printGenerateKeysUsageMsg("seed is not specified or has invalid format.");
+            return;
+        }
+
+        if(!json.has("count") || !json.get("count").isInt() || json.get("count").asInt() <= 0) {
+            printGenerateKeysUsageMsg("count is not specified or has invalid value.");
+            return;
+        }
+
+        SidechainSecretsCompanion secretsCompanion = new SidechainSecretsCompanion(new HashMap<>());
+        String seed = json.get("seed").asText();
+        int count = json.get("count").asInt();
+
+        ObjectNode resJson = new ObjectMapper().createObjectNode();
+        ArrayNode keyArrayNode = resJson.putArray("keys");
+        for (int i = 1; i <= count; i++)
+            keyArrayNode.add(generateKey(seed + "_" + i, secretsCompanion));
 
         String res = resJson.toString();
         printer.print(res);
@@ -148,11 +192,45 @@ public class CommandProcessor {
 
         SidechainSecretsCompanion secretsCompanion = new SidechainSecretsCompanion(new HashMap<>());
 
-        VrfSecretKey vrfSecretKey = VrfKeyGenerator.getInstance().generateSecret(json.get("seed").asText().getBytes());
+        String res = generateVrfKey(json.get("seed").asText(), secretsCompanion).toString();
+        printer.print(res);
+    }
+
+    private ObjectNode generateVrfKey(String seed, SidechainSecretsCompanion secretsCompanion) {
+        VrfSecretKey vrfSecretKey = VrfKeyGenerator.getInstance().generateSecret(seed.getBytes());
 
         ObjectNode resJson = new ObjectMapper().createObjectNode();
         resJson.put("vrfSecret", BytesUtils.toHexString(secretsCompanion.toBytes(vrfSecretKey)));
         resJson.put("vrfPublicKey", BytesUtils.toHexString(vrfSecretKey.getPublicBytes()));
+        return resJson;
+    }
+
+    private void printGenerateVrfKeysUsageMsg(String error) {
+        printer.print("Error: " + error);
+        printer.print("Usage:\n" +
+                      "\tgenerateVrfKeys {\"seed\":\"my seed\", \"count\":10}\n" +
+                      "\tkeys are generated from seeds \"my seed_1\" ... \"my seed_10\".");
+    }
+
+    private void processGenerateVrfKeys(JsonNode json) {
+        if(!json.has("seed") || !json.get("seed").isTextual()) {
+            printGenerateVrfKeysUsageMsg("seed is not specified or has invalid format.");
+            return;
+        }
+
+        if(!json.has("count") || !json.get("count").isInt() || json.get("count").asInt() <= 0) {
+            printGenerateVrfKeysUsageMsg("count is not specified or has invalid value.");
+            return;
+        }
+
+        SidechainSecretsCompanion secretsCompanion = new SidechainSecretsCompanion(new HashMap<>());
+        String seed = json.get("seed").asText();
+        int count = json.get("count").asInt();
+
+        ObjectNode resJson = new ObjectMapper().createObjectNode();
+        ArrayNode keyArrayNode = resJson.putArray("keys");
+        for (int i = 1; i <= count; i++)
+            keyArrayNode.add(generateVrfKey(seed + "_" + i, secretsCompanion));
 
         String res = resJson.toString();
         printer.print(res);
@@ -314,6 +392,13 @@ public class CommandProcessor {
             return;
         }
 
+        // Hidden parameter for STF tests: number of consensus slots between the genesis block and the current time,
+        // so that at most that number of blocks can be forged at once without having blocks in the future.
+        if(json.has("genesisSlotsRewind") && (!json.get("genesisSlotsRewind").isInt() || json.get("genesisSlotsRewind").asInt() <= 0)) {
+            printGenesisInfoUsageMsg("'genesisSlotsRewind' expected to be a positive integer.");
+            return;
+        }
+
         // Parsing the info: scid, powdata vector, mc block height, mc block hex
         int offset = 0;
         try {
@@ -362,8 +447,8 @@ public class CommandProcessor {
             VrfProof vrfProof  = vrfSecretKey.prove(vrfMessage).getKey();
             MerklePath mp = new MerklePath(new ArrayList<>());
             // Set genesis block timestamp to not to have block in future exception during STF tests.
-            // TODO: timestamp should be a hidden optional parameter during SC bootstrapping and must be used by STF
-            long timestamp = System.currentTimeMillis() / 1000 - (params.consensusSlotsInEpoch() / 2 * params.consensusSecondsInSlot());
+            int genesisSlotsRewind = json.has("genesisSlotsRewind") ? json.get("genesisSlotsRewind").asInt() : params.consensusSlotsInEpoch() / 2;
+            long timestamp = System.currentTimeMillis() / 1000 - ((long) genesisSlotsRewind * params.consensusSecondsInSlot());
 
             SidechainBlock sidechainBlock = SidechainBlock.create(
                     params.sidechainGenesisBlockParentId(),
@@ -1,9 +1,19 @@
 package com.horizen;
+import com.fasterxml.jackson.databind.JsonNode;
+import com.fasterxml.jackson.databind.ObjectMapper;
+import com.fasterxml.jackson.databind.node.ObjectNode;
+
+import java.io.PrintStream;
 import java.util.Arrays;
 import java.util.Scanner;
 
 public class ScBootstrappingTool {
     public static void main(String args[]) {
+        if(args.length == 1 && args[0].equals("server")) {
+            runServer();
+            return;
+        }
+
         MessagePrinter printer = new ConsolePrinter();
         CommandProcessor processor = new CommandProcessor(printer);
         if(args.length > 0)
@@ -31,4 +41,45 @@ public class ScBootstrappingTool {
             }
         }
     }
+
+    // Server mode: requests are read from stdin one per line, with the same structure as in interactive mode.
+    // For each request exactly one line is written to stdout: {"result": <command output>} or {"error": "<message>"}.
+    // Anything else written to stdout (e.g. by libraries) is redirected to stderr to keep the protocol clean.
+    private static void runServer() {
+        PrintStream out = System.out;
+        System.setOut(System.err);
+
+        ObjectMapper mapper = new ObjectMapper();
+        Scanner scanner = new Scanner(System.in);
+        while(scanner.hasNextLine()) {
+            String input = scanner.nextLine();
+            if(input.trim().isEmpty())
+                continue;
+            if(input.startsWith("exit"))
+                break;
+
+            BufferedPrinter printer = new BufferedPrinter();
+            ObjectNode response = mapper.createObjectNode();
+            try {
+                new CommandProcessor(printer).processCommand(input);
+                JsonNode result = null;
+                if(printer.messages().size() == 1) {
+                    try {
+                        result = mapper.readTree(printer.messages().get(0));
+                    } catch (Exception e) {
+                        // Not a command output, but an error or usage message.
+                    }
+                }
+                if(result != null && result.isContainerNode())
+                    response.set("result", result);
+                else
+                    response.put("error", String.join("\n", printer.messages()));
+            }
+            catch(Exception e) {
+                response.put("error", e.getMessage());
+            }
+            out.println(response.toString());
+            out.flush();
+        }
+    }
 }